@@ -0,0 +1,203 @@
+"""Модуль общего кэша ресурсов.
+
+Текстуры и звуки загружаются с диска один раз за процесс и дальше берутся из
+кэша по пути к файлу. Отражённые варианты текстур тоже хранятся в кэше, поэтому
+новая ночь собирает персонажей, не читая и не декодируя файлы заново. Кэш можно
+заполнить заранее фоновой подготовкой (модуль preload), пока открыто меню.
+"""
+
+
+import os
+from functools import partial
+import arcade
+from PIL import Image
+
+
+class AssetCache:
+    """Текстуры и звуки по ключу пути со счётчиками попаданий и промахов."""
+
+    def __init__(self):
+        """Создаёт пустой кэш."""
+        self.textures = {}
+        self.sounds = {}
+        self.hits = 0
+        self.misses = 0
+
+    def texture(self, path: str, flipped: bool = False):
+        """Текстура из файла; отражённая по горизонтали строится из исходной один раз.
+
+        :param path: путь к изображению
+        :type path: str
+        :param flipped: отразить ли текстуру по горизонтали
+        :type flipped: bool
+        :rtype: arcade.Texture
+        """
+        key = (os.path.normpath(path), flipped)
+        texture = self.textures.get(key)
+        if texture is not None:
+            self.hits += 1
+            return texture
+        self.misses += 1
+        if flipped:
+            texture = self.texture(path).flip_horizontally()
+        else:
+            texture = arcade.load_texture(key[0])
+        self.textures[key] = texture
+        return texture
+
+    def sound(self, path: str):
+        """Звук из файла, декодированный в память целиком.
+
+        :param path: путь к звуковому файлу
+        :type path: str
+        :rtype: arcade.Sound
+        """
+        key = os.path.normpath(path)
+        sound = self.sounds.get(key)
+        if sound is not None:
+            self.hits += 1
+            return sound
+        self.misses += 1
+        sound = arcade.load_sound(key)
+        self.sounds[key] = sound
+        return sound
+
+    def add_texture(self, path: str, texture):
+        """Кладёт в кэш текстуру, загруженную в обход него (например, фоновым потоком).
+
+        Если текстура по этому пути уже есть, остаётся прежняя.
+
+        :param path: путь к изображению
+        :type path: str
+        :param texture: загруженная текстура
+        :type texture: arcade.Texture
+        :return: текстура из кэша
+        :rtype: arcade.Texture
+        """
+        return self.textures.setdefault((os.path.normpath(path), False), texture)
+
+    def add_sound(self, path: str, sound):
+        """Кладёт в кэш звук, загруженный в обход него.
+
+        :param path: путь к звуковому файлу
+        :type path: str
+        :param sound: загруженный звук
+        :type sound: arcade.Sound
+        :return: звук из кэша
+        :rtype: arcade.Sound
+        """
+        return self.sounds.setdefault(os.path.normpath(path), sound)
+
+    def report(self):
+        """Строка со сводкой кэша.
+
+        :rtype: str
+        """
+        return (f"Ресурсы: текстур {len(self.textures)}, звуков {len(self.sounds)}, "
+                f"попаданий {self.hits}, промахов {self.misses}")
+
+
+# Общий кэш процесса
+ASSETS = AssetCache()
+
+IMAGE_DIR = "images"
+SOUND_DIR = "sounds"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+SOUND_EXTENSIONS = (".mp3", ".wav", ".ogg")
+
+
+def load_texture(path: str, flipped: bool = False):
+    """Текстура из общего кэша процесса.
+
+    :param path: путь к изображению
+    :type path: str
+    :param flipped: отразить ли текстуру по горизонтали
+    :type flipped: bool
+    :rtype: arcade.Texture
+    """
+    return ASSETS.texture(path, flipped)
+
+
+def load_sound(path: str):
+    """Звук из общего кэша процесса.
+
+    :param path: путь к звуковому файлу
+    :type path: str
+    :rtype: arcade.Sound
+    """
+    return ASSETS.sound(path)
+
+
+def asset_files(directory: str, extensions: tuple):
+    """Файлы ресурсов папки и её подпапок в постоянном порядке.
+
+    :param directory: папка ресурсов
+    :type directory: str
+    :param extensions: допустимые расширения в нижнем регистре
+    :type extensions: tuple[str, ...]
+    :rtype: list[str]
+    """
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.lower().endswith(extensions):
+                files.append(os.path.normpath(os.path.join(root, name)))
+    return sorted(files)
+
+
+def _upload_texture(atlas, path: str, texture):
+    """Кладёт текстуру в кэш и выгружает её картинку в атлас видеокарты.
+
+    :param atlas: атлас, из которого рисуют списки спрайтов
+    :type atlas: arcade.TextureAtlasBase
+    :param path: путь к изображению
+    :type path: str
+    :param texture: текстура, загруженная фоновым потоком
+    :type texture: arcade.Texture
+    """
+    atlas.add(ASSETS.add_texture(path, texture))
+
+
+def _reserve_atlas(atlas, paths: list):
+    """Заранее увеличивает атлас под все картинки, чтобы он не рос копированием по ходу загрузки.
+
+    Размеры берутся из заголовков файлов без декодирования; места берётся вдвое
+    больше суммарной площади — с запасом на упаковку.
+
+    :param atlas: атлас, из которого рисуют списки спрайтов
+    :type atlas: arcade.TextureAtlasBase
+    :param paths: пути к картинкам
+    :type paths: list[str]
+    """
+    area = 0
+    for path in paths:
+        try:
+            with Image.open(path) as image:
+                area += image.width * image.height
+        except OSError:
+            continue
+    width, height = atlas.size
+    max_width, max_height = atlas.max_size
+    while width * height < 2 * area and (width < max_width or height < max_height):
+        width, height = min(width * 2, max_width), min(height * 2, max_height)
+    atlas.resize((width, height))
+
+
+def preload_assets(preloader, atlas):
+    """Ставит в фоновую очередь все картинки и звуки игры, которых ещё нет в кэше.
+
+    Картинки декодируются и получают хитбоксы в фоновом потоке, а в атлас
+    выгружаются в главном — по одной на задание. Атлас сразу увеличивается до нужного размера.
+
+    :param preloader: очередь фоновой подготовки
+    :type preloader: preload.Preloader
+    :param atlas: атлас, из которого рисуют списки спрайтов
+    :type atlas: arcade.TextureAtlasBase
+    """
+    images = [path for path in asset_files(IMAGE_DIR, IMAGE_EXTENSIONS) if (path, False) not in ASSETS.textures]
+    _reserve_atlas(atlas, images)
+    for path in images:
+        preloader.add(f"texture:{path}", partial(arcade.load_texture, path), partial(_upload_texture, atlas, path))
+    for path in asset_files(SOUND_DIR, SOUND_EXTENSIONS):
+        if path not in ASSETS.sounds:
+            preloader.add(f"sound:{path}", partial(arcade.load_sound, path), partial(ASSETS.add_sound, path))
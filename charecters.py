@@ -1,12 +1,12 @@
 """Модуль персонажей игры Five Nights at Freddy's.
 
 Содержит классы игрока (ночного сторожа) и аниматроников: Бонни, Чика, Фокси, Фредди.
+Спрайты отвечают только за внешний вид и анимации, поведение находится в модуле simulation.
 """
 
 
-import math
-import random
 import arcade
+from assets import load_texture, load_sound
 
 
 class NightGuard(arcade.Sprite):
@@ -19,34 +19,39 @@ class NightGuard(arcade.Sprite):
         """Создаёт спрайт сторожа, загружает текстуры и настраивает анимацию."""
         super().__init__(scale=1.3)
 
-        self.idle_texture = arcade.load_texture("images/player/sprite4.png")
-        self.walk_right_textures = [
-            arcade.load_texture("images/player/sprite0.png"),
-            arcade.load_texture("images/player/sprite1.jpg"),
-            arcade.load_texture("images/player/sprite2.png"),
-            arcade.load_texture("images/player/sprite3.jpg"),
-        ]
-        self.walk_left_textures = [
-            tex.flip_horizontally() for tex in self.walk_right_textures
+        self.idle_texture = load_texture("images/player/sprite4.png")
+        walk_right = [
+            "images/player/sprite0.png",
+            "images/player/sprite1.jpg",
+            "images/player/sprite2.png",
+            "images/player/sprite3.jpg",
         ]
+        self.walk_right_textures = [load_texture(path) for path in walk_right]
+        self.walk_left_textures = [load_texture(path, flipped=True) for path in walk_right]
         self.walk_up_textures = [
-            arcade.load_texture("images/player/sprite8.png"),
-            arcade.load_texture("images/player/sprite9.png"),
-            arcade.load_texture("images/player/sprite10.png"),
-            arcade.load_texture("images/player/sprite11.png"),
+            load_texture("images/player/sprite8.png"),
+            load_texture("images/player/sprite9.png"),
+            load_texture("images/player/sprite10.png"),
+            load_texture("images/player/sprite11.png"),
         ]
         self.walk_down_textures = [
-            arcade.load_texture("images/player/sprite4.png"),
-            arcade.load_texture("images/player/sprite5.png"),
-            arcade.load_texture("images/player/sprite6.png"),
-            arcade.load_texture("images/player/sprite7.png"),
+            load_texture("images/player/sprite4.png"),
+            load_texture("images/player/sprite5.png"),
+            load_texture("images/player/sprite6.png"),
+            load_texture("images/player/sprite7.png"),
         ]
 
-        self.texture = self.idle_texture
         self.speed = 5
+        self.animation_time = 0.15
+        self.reset()
 
+    def reset(self):
+        """Возвращает спрайт в начальное состояние перед новой ночью."""
+        self.texture = self.idle_texture
+        self.alpha = 255
+        self.change_x = 0
+        self.change_y = 0
         self.cur_texture_index = 0
-        self.animation_time = 0.15
         self.time_since_last_frame = 0
         self.facing_direction = 1  # 1 - вправо, -1 - влево
 
@@ -98,10 +103,13 @@ class Freddy(arcade.Sprite):
         """Загружает текстуры и звуки, инициализирует состояние."""
         super().__init__(scale=1.3)
 
-        self.jumpscare = arcade.load_texture('images/freddy/jumpscare.jpg')
-        self.jumpscare_sound = arcade.load_sound('sounds/scearm_sound.mp3')
-        self.not_activate = arcade.load_texture('images/freddy/sprite00.png')
+        self.jumpscare = load_texture('images/freddy/jumpscare.jpg')
+        self.jumpscare_sound = load_sound('sounds/scearm_sound.mp3')
+        self.not_activate = load_texture('images/freddy/sprite00.png')
+        self.reset()
 
+    def reset(self):
+        """Возвращает спрайт в начальное состояние перед новой ночью."""
         self.state = "inactive"
         self.texture = self.not_activate
         self.alpha = 255
@@ -118,82 +126,47 @@ class Bonnie(arcade.Sprite):
         super().__init__(scale=1.3)
 
         self.activated = False
-        self.jumpscare = arcade.load_texture('images/bonnie/jumpscare.jpg')
-        self.jumpscare_sound = arcade.load_sound('sounds/scearm_sound.mp3')
-        self.not_activate = arcade.load_texture('images/bonnie/sprite00.png')
-        self.idle_texture = arcade.load_texture("images/bonnie/sprite4.png")
-        self.walk_right_textures = [
-            arcade.load_texture("images/bonnie/sprite0.png"),
-            arcade.load_texture("images/bonnie/sprite1.png"),
-            arcade.load_texture("images/bonnie/sprite2.png"),
-            arcade.load_texture("images/bonnie/sprite3.png"),
-        ]
-        self.walk_left_textures = [
-            tex.flip_horizontally() for tex in self.walk_right_textures
+        self.jumpscare = load_texture('images/bonnie/jumpscare.jpg')
+        self.jumpscare_sound = load_sound('sounds/scearm_sound.mp3')
+        self.not_activate = load_texture('images/bonnie/sprite00.png')
+        self.idle_texture = load_texture("images/bonnie/sprite4.png")
+        walk_right = [
+            "images/bonnie/sprite0.png",
+            "images/bonnie/sprite1.png",
+            "images/bonnie/sprite2.png",
+            "images/bonnie/sprite3.png",
         ]
+        self.walk_right_textures = [load_texture(path) for path in walk_right]
+        self.walk_left_textures = [load_texture(path, flipped=True) for path in walk_right]
         self.walk_up_textures = [
-            arcade.load_texture("images/bonnie/sprite8.png"),
-            arcade.load_texture("images/bonnie/sprite9.png"),
-            arcade.load_texture("images/bonnie/sprite10.png"),
-            arcade.load_texture("images/bonnie/sprite11.png"),
+            load_texture("images/bonnie/sprite8.png"),
+            load_texture("images/bonnie/sprite9.png"),
+            load_texture("images/bonnie/sprite10.png"),
+            load_texture("images/bonnie/sprite11.png"),
         ]
         self.walk_down_textures = [
-            arcade.load_texture("images/bonnie/sprite4.png"),
-            arcade.load_texture("images/bonnie/sprite5.png"),
-            arcade.load_texture("images/bonnie/sprite6.png"),
-            arcade.load_texture("images/bonnie/sprite7.png"),
+            load_texture("images/bonnie/sprite4.png"),
+            load_texture("images/bonnie/sprite5.png"),
+            load_texture("images/bonnie/sprite6.png"),
+            load_texture("images/bonnie/sprite7.png"),
         ]
 
+        self.patrol_animation_time = 0.25
+        self.chase_animation_time = 0.1
+        self.reset()
+
+    def reset(self):
+        """Возвращает спрайт в начальное состояние перед новой ночью."""
         self.state = "inactive"
         self.texture = self.not_activate
-        self.speed = 4
-        self.chase_speed = 6
-        self.stuck_timer = 0
-        self.stuck_threshold = 0.5
-        self.last_pos = (self.center_x, self.center_y)
-
+        self.alpha = 255
+        self.change_x = 0
+        self.change_y = 0
         self.cur_texture_index = 0
         self.animation_time = 0.2
-        self.patrol_animation_time = 0.25
-        self.chase_animation_time = 0.1
         self.time_since_last_frame = 0
         self.facing_direction = 1
 
-        self.patrol_timer = 0
-        self.direction_change_interval = random.uniform(2.0, 5.0)
-
-        self.last_dist_to_player = None
-        self.stuck_path_timer = 0
-        self.stuck_path_threshold = 0.5
-        self.teleport_cooldown = 0
-
-    def check_doors(self, doors_list: arcade.SpriteList, dt: float):
-        """Проверяет столкновение с дверью и при необходимости телепортирует.
-
-        :param doors_list: список спрайтов дверей
-        :type doors_list: arcade.SpriteList
-        :param dt: время с предыдущего кадра
-        :type dt: float
-        """
-        if self.teleport_cooldown > 0:
-            self.teleport_cooldown -= dt
-        if self.teleport_cooldown <= 0:
-            door_hit = arcade.check_for_collision_with_list(self, doors_list)
-            if door_hit:
-                door = door_hit[0]
-                orientation = door.properties.get("orientation", None)
-                if orientation is not None:
-                    if self.center_y < door.center_y:
-                        self.center_y = door.center_y + door.height // 2 + self.height // 2 + 30
-                    else:
-                        self.center_y = door.center_y - door.height // 2 - self.height // 2 - 30
-                else:
-                    if self.center_x < door.center_x:
-                        self.center_x = door.center_x + door.width // 2 + self.width // 2 + 30
-                    else:
-                        self.center_x = door.center_x - door.width // 2 - self.width // 2 - 30
-                self.teleport_cooldown = 0.5
-
     def set_state(self, new_state):
         """Безопасно меняет состояние и обновляет скорость анимации.
 
@@ -208,102 +181,6 @@ class Bonnie(arcade.Sprite):
         elif new_state == "patrol":
             self.animation_time = self.patrol_animation_time
 
-    def update(self, dt: float, player: arcade.Sprite, stealth_mode: bool):
-        """Обновляет логику движения в зависимости от состояния.
-
-        :param dt: время с предыдущего кадра
-        :type dt: float
-        :param player: спрайт игрока
-        :type player: arcade.Sprite
-        :param stealth_mode: режим невидимости игрока
-        :type stealth_mode: bool
-        """
-        if self.state == "chase" and stealth_mode:
-            self.set_state("patrol")
-            self.speed = 4
-            self.patrol_timer = 0
-
-        if self.state == "inactive":
-            self.change_x = 0
-            self.change_y = 0
-            return
-
-        if self.state != "chase":
-            dist = arcade.get_distance_between_sprites(self, player)
-            if dist < 400 and not stealth_mode:
-                self.set_state("chase")
-                self.speed = self.chase_speed
-
-        if self.state == "patrol":
-            self._patrol_update(dt)
-            if self.change_x != 0 or self.change_y != 0:
-                if abs(self.center_x - self.last_pos[0]) < 1 and abs(self.center_y - self.last_pos[1]) < 1:
-                    self.stuck_timer += dt
-                else:
-                    self.stuck_timer = 0
-                self.last_pos = (self.center_x, self.center_y)
-
-                if self.stuck_timer > self.stuck_threshold:
-                    angle = random.uniform(0, 2 * math.pi)
-                    self.change_x = math.cos(angle) * self.speed
-                    self.change_y = math.sin(angle) * self.speed
-                    self.stuck_timer = 0
-        elif self.state == "chase":
-            if self.stuck_path_timer <= 0:
-                self._chase_update(player)
-
-            current_dist = arcade.get_distance_between_sprites(self, player)
-            if self.last_dist_to_player is not None:
-                if current_dist >= self.last_dist_to_player - 5:
-                    self.stuck_path_timer += dt
-                else:
-                    self.stuck_path_timer = 0
-            self.last_dist_to_player = current_dist
-
-            if self.stuck_path_timer > self.stuck_path_threshold:
-                dx = player.center_x - self.center_x
-                dy = player.center_y - self.center_y
-                dist = math.hypot(dx, dy)
-                if dist > 0:
-                    if random.random() < 0.5:
-                        self.change_x = -dy / dist * self.speed
-                        self.change_y = dx / dist * self.speed
-                    else:
-                        self.change_x = dy / dist * self.speed
-                        self.change_y = -dx / dist * self.speed
-                else:
-                    angle = random.uniform(0, 2 * math.pi)
-                    self.change_x = math.cos(angle) * self.speed
-                    self.change_y = math.sin(angle) * self.speed
-                self.stuck_path_timer = 0
-
-    def _patrol_update(self, dt: float):
-        """Случайное блуждание в режиме патруля.
-
-        :param dt: время с предыдущего кадра
-        :type dt: float
-        """
-        self.patrol_timer += dt
-        if self.patrol_timer >= self.direction_change_interval:
-            angle = random.uniform(0, 2 * math.pi)
-            self.change_x = math.cos(angle) * self.speed
-            self.change_y = math.sin(angle) * self.speed
-            self.patrol_timer = 0
-            self.direction_change_interval = random.uniform(2.0, 5.0)
-
-    def _chase_update(self, player: arcade.Sprite):
-        """Движение прямо к игроку в режиме погони.
-
-        :param player: спрайт игрока
-        :type player: arcade.Sprite
-        """
-        dx = player.center_x - self.center_x
-        dy = player.center_y - self.center_y
-        dist = math.hypot(dx, dy)
-        if dist > 0:
-            self.change_x = (dx / dist) * self.speed
-            self.change_y = (dy / dist) * self.speed
-
     def update_animation(self, dt: float = 1 / 60):
         """Обновляет анимацию в зависимости от направления движения.
 
@@ -355,11 +232,14 @@ class Chika(arcade.Sprite):
         """Загружает текстуры, звук и инициализирует состояние."""
         super().__init__(scale=1.3)
 
-        self.cupcake = arcade.load_texture('images/chika/cupcake.png')
-        self.not_activate = arcade.load_texture('images/chika/sprite00.png')
-        self.jumpscare_sound = arcade.load_sound('sounds/scearm_sound.mp3')
-        self.jumpscare = arcade.load_texture('images/chika/jumpscare.jpg')
+        self.cupcake = load_texture('images/chika/cupcake.png')
+        self.not_activate = load_texture('images/chika/sprite00.png')
+        self.jumpscare_sound = load_sound('sounds/scearm_sound.mp3')
+        self.jumpscare = load_texture('images/chika/jumpscare.jpg')
+        self.reset()
 
+    def reset(self):
+        """Возвращает спрайт в начальное состояние перед новой ночью."""
         self.state = "inactive"
         self.texture = self.not_activate
         self.alpha = 0
@@ -376,166 +256,57 @@ class Foxy(arcade.Sprite):
         super().__init__(scale=1.3)
 
         self.activated = False
-        self.jumpscare = arcade.load_texture('images/foxy/jumpscare.jpg')
-        self.jumpscare_sound = arcade.load_sound('sounds/scearm_sound.mp3')
-        self.not_activate = arcade.load_texture('images/foxy/sprite00.png')
-        self.idle_texture = arcade.load_texture("images/foxy/sprite4.png")
-        self.walk_left_textures = [
-            arcade.load_texture("images/foxy/sprite0.png"),
-            arcade.load_texture("images/foxy/sprite1.png"),
-            arcade.load_texture("images/foxy/sprite2.png"),
-            arcade.load_texture("images/foxy/sprite3.png"),
-        ]
-        self.walk_right_textures = [
-            tex.flip_horizontally() for tex in self.walk_left_textures
+        self.jumpscare = load_texture('images/foxy/jumpscare.jpg')
+        self.jumpscare_sound = load_sound('sounds/scearm_sound.mp3')
+        self.not_activate = load_texture('images/foxy/sprite00.png')
+        self.idle_texture = load_texture("images/foxy/sprite4.png")
+        walk_left = [
+            "images/foxy/sprite0.png",
+            "images/foxy/sprite1.png",
+            "images/foxy/sprite2.png",
+            "images/foxy/sprite3.png",
         ]
+        self.walk_left_textures = [load_texture(path) for path in walk_left]
+        self.walk_right_textures = [load_texture(path, flipped=True) for path in walk_left]
         self.walk_up_textures = [
-            arcade.load_texture("images/foxy/sprite8.png"),
-            arcade.load_texture("images/foxy/sprite9.png"),
-            arcade.load_texture("images/foxy/sprite10.png"),
-            arcade.load_texture("images/foxy/sprite11.png"),
+            load_texture("images/foxy/sprite8.png"),
+            load_texture("images/foxy/sprite9.png"),
+            load_texture("images/foxy/sprite10.png"),
+            load_texture("images/foxy/sprite11.png"),
         ]
         self.walk_down_textures = [
-            arcade.load_texture("images/foxy/sprite4.png"),
-            arcade.load_texture("images/foxy/sprite5.png"),
-            arcade.load_texture("images/foxy/sprite6.png"),
-            arcade.load_texture("images/foxy/sprite7.png"),
+            load_texture("images/foxy/sprite4.png"),
+            load_texture("images/foxy/sprite5.png"),
+            load_texture("images/foxy/sprite6.png"),
+            load_texture("images/foxy/sprite7.png"),
         ]
 
+        self.animation_time = 0.05
+        self.reset()
+
+    def reset(self):
+        """Возвращает спрайт в начальное состояние перед новой ночью."""
         self.state = "inactive"
         self.step_index = 0
-        self.activation_timer = 0.0
-        self.activation_interval = 20.0
-        self.activation_chance = 0.6
-        self.step_timer = 0.0
-        self.step_interval = 25.0
-        self.step_chance = 0.8
-        self.chase_speed = 8
         self.facing_direction = 1
-
         self.texture = self.not_activate
-
+        self.alpha = 255
+        self.change_x = 0
+        self.change_y = 0
         self.cur_texture_index = 0
-        self.animation_time = 0.05
         self.time_since_last_frame = 0
 
-        self.stuck_timer = 0
-        self.stuck_threshold = 0.5
-        self.last_pos = (self.center_x, self.center_y)
-
-        self.last_dist_to_player = None
-        self.stuck_path_timer = 0
-        self.stuck_path_threshold = 1.0
-        self.teleport_cooldown = 0
-
-    def check_doors(self, doors_list: arcade.SpriteList, dt: float):
-        """Проверяет столкновение с дверью и телепортирует при необходимости.
-
-        :param doors_list: список спрайтов дверей
-        :type doors_list: arcade.SpriteList
-        :param dt: время с предыдущего кадра
-        :type dt: float
-        """
-        if self.teleport_cooldown > 0:
-            self.teleport_cooldown -= dt
-        if self.teleport_cooldown <= 0:
-            door_hit = arcade.check_for_collision_with_list(self, doors_list)
-            if door_hit:
-                door = door_hit[0]
-                orientation = door.properties.get("orientation", None)
-                if orientation is not None:
-                    if self.center_y < door.center_y:
-                        self.center_y = door.center_y + door.height // 2 + self.height // 2 + 30
-                    else:
-                        self.center_y = door.center_y - door.height // 2 - self.height // 2 - 30
-                else:
-                    if self.center_x < door.center_x:
-                        self.center_x = door.center_x + door.width // 2 + self.width // 2 + 30
-                    else:
-                        self.center_x = door.center_x - door.width // 2 - self.width // 2 - 30
-                self.teleport_cooldown = 0.5
-
-    def update(self, dt: float, player: arcade.Sprite, stealth_mode: bool):
-        """Обновляет логику поведения: крадётся или преследует.
+    def set_stalking_step(self, step_index: int):
+        """Показывает текстуру стадии подкрадывания.
 
-        :param dt: время с предыдущего кадра
-        :type dt: float
-        :param player: спрайт игрока
-        :type player: arcade.Sprite
-        :param stealth_mode: режим невидимости игрока
-        :type stealth_mode: bool
-        """
-        if self.state == "inactive":
-            self.activation_timer += dt
-            if self.activation_timer >= self.activation_interval:
-                self.activation_timer = 0
-                if random.random() < self.activation_chance:
-                    self.state = "stalking"
-                    self.step_index = 0
-                    self.texture = self.idle_texture
-
-        elif self.state == "stalking":
-            self.step_timer += dt
-            if self.step_timer >= self.step_interval:
-                self.step_timer = 0
-                if random.random() < self.step_chance:
-                    if self.step_index < 3:
-                        self.step_index += 1
-                        self.texture = self.walk_down_textures[self.step_index]
-                    else:
-                        if stealth_mode:
-                            self.step_index = 0
-                            self.texture = self.idle_texture
-                        else:
-                            self.state = "chasing"
-                            self.center_y -= 200
-                            self.speed = self.chase_speed
-                            self._update_chase_direction(player)
-
-        if self.state == "chasing":
-            if self.stuck_path_timer <= 0:
-                self._update_chase_direction(player)
-
-            current_dist = arcade.get_distance_between_sprites(self, player)
-            if self.last_dist_to_player is not None:
-                if current_dist >= self.last_dist_to_player - 5:
-                    self.stuck_path_timer += dt
-                else:
-                    self.stuck_path_timer = 0
-            self.last_dist_to_player = current_dist
-
-            if self.stuck_path_timer > self.stuck_path_threshold:
-                dx = player.center_x - self.center_x
-                dy = player.center_y - self.center_y
-                dist = math.hypot(dx, dy)
-                if dist > 0:
-                    if random.random() < 0.5:
-                        self.change_x = -dy / dist * self.speed
-                        self.change_y = dx / dist * self.speed
-                    else:
-                        self.change_x = dy / dist * self.speed
-                        self.change_y = -dx / dist * self.speed
-                else:
-                    angle = random.uniform(0, 2 * math.pi)
-                    self.change_x = math.cos(angle) * self.speed
-                    self.change_y = math.sin(angle) * self.speed
-                self.stuck_path_timer = 0
-
-    def _update_chase_direction(self, player: arcade.Sprite):
-        """Устанавливает направление движения прямо к игроку.
-
-        :param player: спрайт игрока
-        :type player: arcade.Sprite
+        :param step_index: номер стадии (0 — исходная поза)
+        :type step_index: int
         """
-        dx = player.center_x - self.center_x
-        dy = player.center_y - self.center_y
-        dist = math.hypot(dx, dy)
-        if dist > 0:
-            self.change_x = (dx / dist) * self.speed
-            self.change_y = (dy / dist) * self.speed
+        if step_index == 0:
+            self.texture = self.idle_texture
         else:
-            self.change_x = 0
-            self.change_y = 0
+            self.texture = self.walk_down_textures[step_index]
+        self.step_index = step_index
 
     def update_animation(self, dt: float = 1 / 60):
         """Обновляет анимацию в зависимости от текущего состояния и движения.
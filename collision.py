@@ -0,0 +1,94 @@
+"""Модуль столкновений с картой.
+
+Сетка столкновений — пространственный индекс карты, в котором слои-препятствия
+выбираются маской битов. Движение тела по оси проверяется только по клеткам,
+в которые заходит его передний край, поэтому стоимость шага зависит от размера
+тела и скорости, а не от числа стен на карте.
+"""
+
+
+import math
+from spatial import SpatialIndex, EDGE_EPSILON
+
+
+class CollisionGrid(SpatialIndex):
+    """Пространственный индекс карты с проверкой движения тел по осям."""
+
+    def _row_blocked(self, mask: int, row: int, first: int, last: int):
+        """Проверяет, занята ли хотя бы одна клетка строки в диапазоне столбцов.
+
+        :rtype: bool
+        """
+        cells = self.cells
+        start = row * self.width
+        for index in range(start + first, start + last + 1):
+            if cells[index] & mask:
+                return True
+        return False
+
+    def _column_blocked(self, mask: int, column: int, first: int, last: int):
+        """Проверяет, занята ли хотя бы одна клетка столбца в диапазоне строк.
+
+        :rtype: bool
+        """
+        cells = self.cells
+        width = self.width
+        for index in range(first * width + column, last * width + column + 1, width):
+            if cells[index] & mask:
+                return True
+        return False
+
+    def sweep_y(self, mask: int, left: float, bottom: float, right: float, top: float, dy: float):
+        """Ищет первую занятую строку на пути прямоугольника по вертикали.
+
+        Клетки, которые прямоугольник уже пересекает, считаются свободными:
+        до сдвига тело выталкивается из препятствий.
+
+        :param dy: сдвиг по Y
+        :type dy: float
+        :return: координата края, в который упирается тело, или None, если путь свободен
+        :rtype: float | None
+        """
+        size = self.tile_size
+        first_column, last_column = self._span(left, right, self.width)
+        if first_column > last_column:
+            return None
+        if dy > 0:
+            first = max(0, math.floor(top / size + EDGE_EPSILON))
+            last = min(self.height - 1, math.ceil((top + dy) / size - EDGE_EPSILON) - 1)
+            for row in range(first, last + 1):
+                if self._row_blocked(mask, row, first_column, last_column):
+                    return row * size
+        else:
+            first = min(self.height - 1, math.ceil(bottom / size - EDGE_EPSILON) - 1)
+            last = max(0, math.floor((bottom + dy) / size + EDGE_EPSILON))
+            for row in range(first, last - 1, -1):
+                if self._row_blocked(mask, row, first_column, last_column):
+                    return (row + 1) * size
+        return None
+
+    def sweep_x(self, mask: int, left: float, bottom: float, right: float, top: float, dx: float):
+        """Ищет первый занятый столбец на пути прямоугольника по горизонтали.
+
+        :param dx: сдвиг по X
+        :type dx: float
+        :return: координата края, в который упирается тело, или None, если путь свободен
+        :rtype: float | None
+        """
+        size = self.tile_size
+        first_row, last_row = self._span(bottom, top, self.height)
+        if first_row > last_row:
+            return None
+        if dx > 0:
+            first = max(0, math.floor(right / size + EDGE_EPSILON))
+            last = min(self.width - 1, math.ceil((right + dx) / size - EDGE_EPSILON) - 1)
+            for column in range(first, last + 1):
+                if self._column_blocked(mask, column, first_row, last_row):
+                    return column * size
+        else:
+            first = min(self.width - 1, math.ceil(left / size - EDGE_EPSILON) - 1)
+            last = max(0, math.floor((left + dx) / size + EDGE_EPSILON))
+            for column in range(first, last - 1, -1):
+                if self._column_blocked(mask, column, first_row, last_row):
+                    return (column + 1) * size
+        return None
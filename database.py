@@ -12,28 +12,40 @@ DB_NAME = "results.db"
 
 
 def init_db():
-    """Создаёт таблицу Savegames, если она не существует."""
+    """Создаёт таблицу Savegames, если она не существует, и добавляет недостающие столбцы."""
     with sqlite3.connect(DB_NAME) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS Savegames (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 date TEXT NOT NULL,
-                time REAL NOT NULL
+                time REAL NOT NULL,
+                seed INTEGER,
+                replay BLOB
             )
         """)
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(Savegames)")}
+        if "seed" not in columns:
+            cursor.execute("ALTER TABLE Savegames ADD COLUMN seed INTEGER")
+        if "replay" not in columns:
+            cursor.execute("ALTER TABLE Savegames ADD COLUMN replay BLOB")
 
 
-def save_result(total_time: float):
-    """Сохраняет результат игры: текущую дату/время и время в секундах.
+def save_result(total_time: float, seed: int = None, replay: bytes = None):
+    """Сохраняет результат игры: текущую дату/время, время в секундах, сид и запись ввода.
 
     :param total_time: общее время игры в секундах
     :type total_time: float
+    :param seed: сид ночи, по которому её можно воспроизвести
+    :type seed: int
+    :param replay: запись ввода игрока (см. модуль replay)
+    :type replay: bytes
     """
     with sqlite3.connect(DB_NAME) as conn:
         cursor = conn.cursor()
         now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        cursor.execute("INSERT INTO Savegames (date, time) VALUES (?, ?)", (now, total_time))
+        cursor.execute("INSERT INTO Savegames (date, time, seed, replay) VALUES (?, ?, ?, ?)",
+                       (now, total_time, seed, replay))
 
 
 def get_top_results(limit: int = 10):
@@ -41,10 +53,39 @@ def get_top_results(limit: int = 10):
 
     :param limit: максимальное количество записей (по умолчанию 10)
     :type limit: int
-    :return: список кортежей (дата, время)
-    :rtype: list[tuple[str, float]]
+    :return: список кортежей (дата, время, сид)
+    :rtype: list[tuple[str, float, int | None]]
     """
     with sqlite3.connect(DB_NAME) as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT date, time FROM Savegames ORDER BY time DESC LIMIT ?", (limit,))
+        cursor.execute("SELECT date, time, seed FROM Savegames ORDER BY time DESC LIMIT ?", (limit,))
         return cursor.fetchall()
+
+
+def get_replays(limit: int = 50):
+    """Возвращает последние результаты, для которых сохранена запись ввода.
+
+    :param limit: максимальное количество записей (по умолчанию 50)
+    :type limit: int
+    :return: список кортежей (номер, дата, время, сид)
+    :rtype: list[tuple[int, str, float, int]]
+    """
+    with sqlite3.connect(DB_NAME) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, date, time, seed FROM Savegames WHERE replay IS NOT NULL "
+                       "ORDER BY id DESC LIMIT ?", (limit,))
+        return cursor.fetchall()
+
+
+def get_replay(result_id: int):
+    """Возвращает сохранённое время и запись ввода результата.
+
+    :param result_id: номер результата
+    :type result_id: int
+    :return: кортеж (время, запись ввода) или None, если записи нет
+    :rtype: tuple[float, bytes] | None
+    """
+    with sqlite3.connect(DB_NAME) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT time, replay FROM Savegames WHERE id = ? AND replay IS NOT NULL", (result_id,))
+        return cursor.fetchone()
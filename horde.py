@@ -0,0 +1,557 @@
+"""Режим бесконечной орды.
+
+Сотни патрульных в духе Бонни хранятся не объектами, а столбцами массивов NumPy
+(позиции, скорости, состояния, таймеры) и обновляются пакетно: обход маршрутов патруля,
+замечание игрока, погоня по общему полю расстояний и столкновения со стенами считаются
+одними операциями над массивами для всей орды сразу. Основные аниматроники ночи
+остаются прежними, поэтому ночи с тем же сидом проходят одинаково и в этом режиме.
+"""
+
+
+import math
+import numpy as np
+from level import Level
+from navigation import NavGrid, FlowField, LineOfSight
+from patrol import PatrolRoutes
+from portals import PortalGraph
+from simulation import Simulation, Body, BONNIE_SIZE, PLAYER_SIZE, FRAME_RATE, STEP, WAYPOINT_RADIUS, derive_rng
+
+
+# Коды состояний патрульных орды
+PATROL = 0
+CHASE = 1
+
+# Настраиваемые параметры орды
+HORDE_PARAMS = {
+    "initial_count": 20,
+    "spawn_interval": 3.0,
+    "spawn_batch": 10,
+    "max_count": 600,
+    "spawn_distance": 900.0,
+}
+
+# Допуск в долях клетки: касание стены не считается столкновением
+EDGE_EPSILON = 1e-6
+
+
+class HordeStore:
+    """Патрульные орды в виде столбцов массивов.
+
+    Все патрульные одного размера и скоростей Бонни. Друг с другом они не сталкиваются,
+    патрулируют по тем же маршрутам, что и Бонни, преследуют по тому же полю расстояний
+    и так же переносятся дверями на другую сторону проёма.
+    """
+
+    FIELDS = ("x", "y", "vx", "vy", "stuck_timer", "last_x", "last_y", "sidestep_timer", "teleport_cooldown")
+    INDEX_FIELDS = ("route_node", "route_goal")
+
+    def __init__(self, level: Level, nav: NavGrid, routes: PatrolRoutes, portals: PortalGraph,
+                 capacity: int = 64):
+        """Готовит пустое хранилище и таблицы карты.
+
+        :param level: карта уровня
+        :type level: Level
+        :param nav: граф проходимости для хитбокса Бонни
+        :type nav: NavGrid
+        :param routes: маршруты патруля для хитбокса Бонни
+        :type routes: PatrolRoutes
+        :param portals: дверные проёмы и комнаты карты
+        :type portals: PortalGraph
+        :param capacity: начальная ёмкость массивов
+        :type capacity: int
+        """
+        self.level = level
+        self.nav = nav
+        self.portals = portals
+        self.half_width = BONNIE_SIZE[0] / 2
+        self.half_height = BONNIE_SIZE[1] / 2
+        self.patrol_speed = 4
+        self.chase_speed = 6
+        self.detection_distance = 400
+        self.stuck_threshold = 0.5
+        self.sidestep_duration = 0.3
+
+        self.tile_size = level.tile_size
+        # Рамка из стен не выпускает тела за край карты
+        self.wall_sums = self._sum_table("walls", 1)
+        self.door_sums = self._sum_table("doors", 0)
+
+        anchors = nav.anchors
+        self.anchor_x = np.array([math.nan if a is None else a[0] for a in anchors])
+        self.anchor_y = np.array([math.nan if a is None else a[1] for a in anchors])
+        # Узел графа под каждой клеткой карты (-1 — рядом нет проходимых клеток)
+        nodes = (nav.nearest(*level.tile_center(index % level.width, index // level.width))
+                 for index in range(level.width * level.height))
+        self.tile_node = np.array([-1 if node is None else node for node in nodes], dtype=np.int64)
+
+        # Маршруты патруля в виде массивов: узлы, следующий узел к цели, выход на граф из клетки
+        self.node_x = np.array([point[0] for point in routes.points])
+        self.node_y = np.array([point[1] for point in routes.points])
+        self.route_next = np.array([[-1 if node is None else node for node in row] for row in routes.next_node],
+                                   dtype=np.int64)
+        self.node_component = np.array(routes.component, dtype=np.int64)
+        self.component_nodes = [np.array(members, dtype=np.int64) for members in routes.components]
+        self.join_node = np.array([-1 if node is None else node for node in routes.join_node], dtype=np.int64)
+        self.join_x = np.array([math.nan if point is None else point[0] for point in routes.join_point])
+        self.join_y = np.array([math.nan if point is None else point[1] for point in routes.join_point])
+        # Появляются патрульные в узлах комнат с дверьми: из глухих комнат им не выйти
+        door_rooms = {room for doorway in portals.doorways for room in doorway.rooms if room is not None}
+        spawn = [node for node, room in enumerate(routes.rooms) if room in door_rooms]
+        self.spawn_x = self.node_x[spawn]
+        self.spawn_y = self.node_y[spawn]
+
+        self.count = 0
+        self.capacity = capacity
+        for name in self.FIELDS:
+            setattr(self, name, np.zeros(capacity))
+        for name in self.INDEX_FIELDS:
+            setattr(self, name, np.full(capacity, -1, dtype=np.int64))
+        self.state = np.zeros(capacity, dtype=np.int8)
+        self.rng = np.random.default_rng(0)
+
+        self.table_rebuilds = None
+        self.next_node = None
+
+    def clear(self, rng: np.random.Generator):
+        """Убирает всех патрульных.
+
+        :param rng: генератор случайных чисел орды
+        :type rng: numpy.random.Generator
+        """
+        self.count = 0
+        self.rng = rng
+        self.table_rebuilds = None
+        self.next_node = None
+
+    def _grow(self, needed: int):
+        """Увеличивает ёмкость массивов вдвое, пока не хватит места.
+
+        :param needed: требуемое число патрульных
+        :type needed: int
+        """
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        for name in self.FIELDS + self.INDEX_FIELDS + ("state",):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def _random_velocity(self, count: int, speed: float):
+        """Скорости заданной величины в случайных направлениях.
+
+        :rtype: tuple[numpy.ndarray, numpy.ndarray]
+        """
+        angle = self.rng.uniform(0, 2 * math.pi, count)
+        return np.cos(angle) * speed, np.sin(angle) * speed
+
+    def spawn(self, count: int, player: Body, min_distance: float):
+        """Добавляет патрульных в свободных точках карты вдали от игрока.
+
+        :param count: сколько добавить
+        :type count: int
+        :param player: тело игрока
+        :type player: Body
+        :param min_distance: наименьшее расстояние от игрока до точки появления
+        :type min_distance: float
+        :return: сколько патрульных добавлено
+        :rtype: int
+        """
+        far = np.hypot(self.spawn_x - player.center_x, self.spawn_y - player.center_y) >= min_distance
+        candidates = np.flatnonzero(far)
+        if count <= 0 or not len(candidates):
+            return 0
+        picks = candidates[self.rng.integers(0, len(candidates), count)]
+        self._grow(self.count + count)
+        new = slice(self.count, self.count + count)
+        self.x[new] = self.spawn_x[picks]
+        self.y[new] = self.spawn_y[picks]
+        self.last_x[new] = self.x[new]
+        self.last_y[new] = self.y[new]
+        self.vx[new] = 0
+        self.vy[new] = 0
+        self.state[new] = PATROL
+        self.route_node[new] = -1
+        self.route_goal[new] = -1
+        self.stuck_timer[new] = 0
+        self.sidestep_timer[new] = 0
+        self.teleport_cooldown[new] = 0
+        self.count += count
+        return count
+
+    def _sum_table(self, layer: str, border: int):
+        """Строит таблицу сумм по слою: число занятых клеток в любом прямоугольнике — четыре чтения.
+
+        :param layer: имя слоя
+        :type layer: str
+        :param border: чем считать клетки рамки вокруг карты (1 — занятыми)
+        :type border: int
+        :rtype: numpy.ndarray
+        """
+        level = self.level
+        grid = (np.array(level.layers[layer]) != 0).astype(np.int32).reshape(level.height, level.width)
+        grid = np.pad(grid, 1, constant_values=border)
+        sums = np.zeros((grid.shape[0] + 1, grid.shape[1] + 1), dtype=np.int32)
+        sums[1:, 1:] = grid.cumsum(axis=0).cumsum(axis=1)
+        return sums
+
+    def _blocked(self, x: np.ndarray, y: np.ndarray):
+        """Проверяет для каждого хитбокса, задевает ли он стену.
+
+        :param x: координаты X центров
+        :type x: numpy.ndarray
+        :param y: координаты Y центров
+        :type y: numpy.ndarray
+        :rtype: numpy.ndarray
+        """
+        return self._overlaps(self.wall_sums, x, y)
+
+    def _overlaps(self, sums: np.ndarray, x: np.ndarray, y: np.ndarray):
+        """Проверяет для каждого хитбокса, задевает ли он занятую клетку слоя.
+
+        :param sums: таблица сумм слоя
+        :type sums: numpy.ndarray
+        :param x: координаты X центров
+        :type x: numpy.ndarray
+        :param y: координаты Y центров
+        :type y: numpy.ndarray
+        :rtype: numpy.ndarray
+        """
+        size = self.tile_size
+        rows, cols = sums.shape
+        # Границы прямоугольника клеток в координатах таблицы: рамка сдвигает их на единицу
+        first_col = np.clip(np.floor((x - self.half_width) / size + EDGE_EPSILON) + 1, 0, cols - 2).astype(np.int64)
+        last_col = np.clip(np.ceil((x + self.half_width) / size - EDGE_EPSILON) + 1, 1, cols - 1).astype(np.int64)
+        first_row = np.clip(np.floor((y - self.half_height) / size + EDGE_EPSILON) + 1, 0, rows - 2).astype(np.int64)
+        last_row = np.clip(np.ceil((y + self.half_height) / size - EDGE_EPSILON) + 1, 1, rows - 1).astype(np.int64)
+        count = (sums[last_row, last_col] - sums[first_row, last_col]
+                 - sums[last_row, first_col] + sums[first_row, first_col])
+        return count > 0
+
+    def _move(self, frames: float):
+        """Сдвигает всех сначала по Y, затем по X, упирая в стены, как PhysicsEngine.
+
+        :param frames: длительность шага в кадрах 60 FPS
+        :type frames: float
+        """
+        n = self.count
+        size = self.tile_size
+        x, y, vx, vy = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n]
+
+        new_y = y + vy * frames
+        hit = self._blocked(x, new_y)
+        if hit.any():
+            up = hit & (vy > 0)
+            down = hit & (vy < 0)
+            new_y[up] = (np.ceil((new_y[up] + self.half_height) / size) - 1) * size - self.half_height
+            new_y[down] = (np.floor((new_y[down] - self.half_height) / size) + 1) * size + self.half_height
+            # Если прижать к стене не вышло, тело остаётся на месте
+            still = hit & self._blocked(x, new_y)
+            new_y[still] = y[still]
+            vy[hit] = 0.0
+        y[:] = new_y
+
+        new_x = x + vx * frames
+        hit = self._blocked(new_x, y)
+        if hit.any():
+            right = hit & (vx > 0)
+            left = hit & (vx < 0)
+            new_x[right] = (np.ceil((new_x[right] + self.half_width) / size) - 1) * size - self.half_width
+            new_x[left] = (np.floor((new_x[left] - self.half_width) / size) + 1) * size + self.half_width
+            still = hit & self._blocked(new_x, y)
+            new_x[still] = x[still]
+        x[:] = new_x
+
+    def _tiles(self, indices: np.ndarray):
+        """Номера клеток карты под центрами патрульных.
+
+        :rtype: numpy.ndarray
+        """
+        level = self.level
+        size = self.tile_size
+        cols = np.clip((self.x[indices] // size).astype(np.int64), 0, level.width - 1)
+        rows = np.clip((self.y[indices] // size).astype(np.int64), 0, level.height - 1)
+        return rows * level.width + cols
+
+    def _pick_goals(self, indices: np.ndarray):
+        """Выбирает патрульным случайные цели среди узлов, достижимых из их узла.
+
+        :param indices: номера патрульных, стоящих в узлах маршрута
+        :type indices: numpy.ndarray
+        """
+        components = self.node_component[self.route_node[indices]]
+        for component in np.unique(components):
+            chosen = indices[components == component]
+            members = self.component_nodes[component]
+            self.route_goal[chosen] = members[self.rng.integers(0, len(members), len(chosen))]
+
+    def _patrol(self, patrol: np.ndarray):
+        """Ведёт патрульных от узла к узлу маршрута к их случайным целям.
+
+        Кто ещё не на маршруте, идёт по таблице выхода на граф; кому выйти некуда,
+        сохраняет прежнюю скорость.
+
+        :param patrol: номера патрульных, которыми надо управлять
+        :type patrol: numpy.ndarray
+        """
+        x, y = self.x[patrol], self.y[patrol]
+        route_node = self.route_node
+        tiles = self._tiles(patrol)
+        joining = route_node[patrol] < 0
+        route_node[patrol[joining]] = self.join_node[tiles[joining]]
+
+        target_x = self.join_x[tiles]
+        target_y = self.join_y[tiles]
+        node = route_node[patrol]
+        on_route = node >= 0
+        target_x[on_route] = self.node_x[node[on_route]]
+        target_y[on_route] = self.node_y[node[on_route]]
+
+        arrived = on_route & (np.hypot(target_x - x, target_y - y) <= WAYPOINT_RADIUS)
+        halt = np.zeros(len(patrol), dtype=bool)
+        if arrived.any():
+            here = patrol[arrived]
+            goal = self.route_goal[here]
+            following = self.route_next[goal, route_node[here]]
+            # Цель из другой части графа недостижима — её тоже заменяет новая
+            need = (goal < 0) | (goal == route_node[here]) | (following < 0)
+            if need.any():
+                self._pick_goals(here[need])
+                following = self.route_next[self.route_goal[here], route_node[here]]
+            moves = following >= 0
+            route_node[here[moves]] = following[moves]
+            # Цель совпала с узлом — стоим шаг и выбираем новую
+            halt[np.flatnonzero(arrived)[~moves]] = True
+            target_x[arrived] = self.node_x[route_node[here]]
+            target_y[arrived] = self.node_y[route_node[here]]
+
+        steer = ~np.isnan(target_x)
+        dx = target_x[steer] - x[steer]
+        dy = target_y[steer] - y[steer]
+        dist = np.hypot(dx, dy)
+        dist[dist == 0] = 1.0
+        self.vx[patrol[steer]] = dx / dist * self.patrol_speed
+        self.vy[patrol[steer]] = dy / dist * self.patrol_speed
+        self.vx[patrol[halt]] = 0.0
+        self.vy[patrol[halt]] = 0.0
+
+    def _cross_doors(self, dt: float):
+        """Переносит через дверные проёмы патрульных, коснувшихся двери.
+
+        :param dt: время шага
+        :type dt: float
+        """
+        n = self.count
+        cooldown = self.teleport_cooldown[:n]
+        cooldown -= dt
+        ready = np.flatnonzero(cooldown <= 0)
+        touching = ready[self._overlaps(self.door_sums, self.x[ready], self.y[ready])]
+        for i in touching:
+            body = Body(BONNIE_SIZE, (self.x[i], self.y[i]))
+            doorway = self.portals.touching(body.left, body.bottom, body.right, body.top)
+            if doorway is None:
+                continue
+            doorway.teleport(body)
+            if self._blocked(np.array([body.center_x]), np.array([body.center_y]))[0]:
+                # За узким проёмом хитбокс задевает стену — ставим его в ближайшую опорную точку
+                index = self.nav.nearest(*body.position)
+                if index is None:
+                    continue
+                body.position = self.nav.anchors[index]
+            self.x[i], self.y[i] = body.position
+            self.last_x[i], self.last_y[i] = body.position
+            cooldown[i] = 0.5
+            self.route_node[i] = -1
+            self.route_goal[i] = -1
+
+    def _chase_targets(self, chasing: np.ndarray, player: Body, flow: FlowField):
+        """Точки, к которым идут преследователи: следующий узел поля или сам игрок.
+
+        Поле достраивается на всю карту, а следующие шаги выкладываются в массив
+        один раз на каждую новую клетку игрока.
+
+        :param chasing: номера преследующих патрульных
+        :type chasing: numpy.ndarray
+        :param player: тело игрока
+        :type player: Body
+        :param flow: общее поле расстояний до игрока
+        :type flow: FlowField
+        :rtype: tuple[numpy.ndarray, numpy.ndarray]
+        """
+        target_x = np.full(len(chasing), player.center_x)
+        target_y = np.full(len(chasing), player.center_y)
+        if flow is None:
+            return target_x, target_y
+        flow.set_target(player.center_x, player.center_y)
+        if flow.goal is None:
+            return target_x, target_y
+        if flow.rebuilds != self.table_rebuilds:
+            flow.settle_all()
+            self.next_node = np.array([-1 if hop is None else hop for hop in flow.next_hop], dtype=np.int64)
+            self.table_rebuilds = flow.rebuilds
+
+        node = self.tile_node[self._tiles(chasing)]
+        hop = np.where(node >= 0, self.next_node[node], -1)
+        # Из клетки игрока, соседней с ней или без пути идём прямо на игрока
+        follow = (hop >= 0) & (node != flow.goal) & (hop != flow.goal)
+        target_x[follow] = self.anchor_x[hop[follow]]
+        target_y[follow] = self.anchor_y[hop[follow]]
+        return target_x, target_y
+
+    def update(self, dt: float, player: Body, stealth_mode: bool, flow: FlowField = None,
+               sight: LineOfSight = None):
+        """Обновляет всю орду за один шаг.
+
+        :param dt: время шага
+        :type dt: float
+        :param player: тело игрока
+        :type player: Body
+        :param stealth_mode: режим невидимости игрока
+        :type stealth_mode: bool
+        :param flow: общее поле расстояний до игрока
+        :type flow: FlowField
+        :param sight: проверка прямой видимости
+        :type sight: LineOfSight
+        :return: True, если кто-то из орды поймал игрока
+        :rtype: bool
+        """
+        n = self.count
+        if not n:
+            return False
+        x, y, vx, vy, state = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n], self.state[:n]
+        frames = dt * FRAME_RATE
+        px, py = player.center_x, player.center_y
+
+        if stealth_mode:
+            lost = np.flatnonzero(state == CHASE)
+            if len(lost):
+                state[lost] = PATROL
+                self.sidestep_timer[lost] = 0
+                self.route_node[lost] = -1
+                self.route_goal[lost] = -1
+        else:
+            near = (state == PATROL) & ((x - px) ** 2 + (y - py) ** 2 < self.detection_distance ** 2)
+            for i in np.flatnonzero(near):
+                if sight is None or sight.visible((x[i], y[i]), (px, py)):
+                    state[i] = CHASE
+
+        # Застревание: тело с ненулевой скоростью почти не сдвинулось за прошлый шаг
+        moving = (vx != 0) | (vy != 0)
+        still = moving & (np.abs(x - self.last_x[:n]) < frames) & (np.abs(y - self.last_y[:n]) < frames)
+        stuck_timer = self.stuck_timer[:n]
+        stuck_timer[:] = np.where(still, stuck_timer + dt, 0.0)
+        self.last_x[:n] = x
+        self.last_y[:n] = y
+        stuck = stuck_timer > self.stuck_threshold
+        stuck_timer[stuck] = 0
+
+        sidestep = self.sidestep_timer
+        patrol = np.flatnonzero(state == PATROL)
+        if len(patrol):
+            sidestep[patrol] -= dt
+            self._patrol(patrol[sidestep[patrol] <= 0])
+            # Путь перегородило что-то — отходим в сторону и заново выходим на маршрут
+            blocked = patrol[stuck[patrol]]
+            if len(blocked):
+                vx[blocked], vy[blocked] = self._random_velocity(len(blocked), self.patrol_speed)
+                sidestep[blocked] = self.sidestep_duration
+                self.route_node[blocked] = -1
+                self.route_goal[blocked] = -1
+
+        chasing = np.flatnonzero(state == CHASE)
+        if len(chasing):
+            sidestep[chasing] -= dt
+            steer = chasing[sidestep[chasing] <= 0]
+            target_x, target_y = self._chase_targets(steer, player, flow)
+            dx = target_x - x[steer]
+            dy = target_y - y[steer]
+            dist = np.hypot(dx, dy)
+            dist[dist == 0] = 1.0
+            vx[steer] = dx / dist * self.chase_speed
+            vy[steer] = dy / dist * self.chase_speed
+
+            # Застрявший преследователь на время шагает вбок от направления погони
+            blocked = steer[stuck[steer]]
+            if len(blocked):
+                sign = np.where(self.rng.random(len(blocked)) < 0.5, 1.0, -1.0)
+                vx[blocked], vy[blocked] = -vy[blocked] * sign, vx[blocked] * sign
+                sidestep[blocked] = self.sidestep_duration
+
+        self._move(frames)
+        self._cross_doors(dt)
+
+        if stealth_mode:
+            return False
+        reach_x = (BONNIE_SIZE[0] + PLAYER_SIZE[0]) / 2
+        reach_y = (BONNIE_SIZE[1] + PLAYER_SIZE[1]) / 2
+        return bool(np.any((np.abs(x - px) < reach_x) & (np.abs(y - py) < reach_y)))
+
+
+class HordeSimulation(Simulation):
+    """Ночь без конца: к обычным аниматроникам волнами добавляются патрульные орды."""
+
+    def __init__(self, level: Level = None, params: dict = None, seed: int = None, horde_params: dict = None):
+        """Создаёт ночь и хранилище орды.
+
+        :param level: загруженная карта (по умолчанию основная карта игры)
+        :type level: Level
+        :param params: переопределения параметров сложности из DEFAULT_PARAMS
+        :type params: dict
+        :param seed: сид ночи (по умолчанию выбирается случайно)
+        :type seed: int
+        :param horde_params: переопределения параметров из HORDE_PARAMS
+        :type horde_params: dict
+        """
+        unknown = set(horde_params or {}) - set(HORDE_PARAMS)
+        if unknown:
+            raise ValueError(f"Неизвестные параметры орды: {', '.join(sorted(unknown))}")
+        self.horde_params = {**HORDE_PARAMS, **(horde_params or {})}
+        self.horde = None
+        super().__init__(level, params, seed)
+
+    def reset(self, seed: int = None, params: dict = None):
+        """Возвращает ночь в начальное состояние и выпускает первую волну орды.
+
+        :param seed: сид ночи (по умолчанию выбирается новый)
+        :type seed: int
+        :param params: новые переопределения параметров из DEFAULT_PARAMS (по умолчанию остаются прежние)
+        :type params: dict
+        """
+        super().reset(seed, params)
+        if self.horde is None:
+            self.horde = HordeStore(self.level, self.nav, self.routes, self.portals)
+        # Отдельный поток случайности: орда не сдвигает случайность остальных аниматроников
+        self.horde.clear(np.random.default_rng(derive_rng(self.seed, "horde").getrandbits(64)))
+        self.spawn_timer = 0.0
+        self._spawn(self.horde_params["initial_count"])
+
+    def _spawn(self, count: int):
+        """Добавляет патрульных, не превышая предел орды.
+
+        :param count: сколько добавить
+        :type count: int
+        """
+        count = min(count, self.horde_params["max_count"] - self.horde.count)
+        self.horde.spawn(count, self.player, self.horde_params["spawn_distance"])
+
+    def step(self, dt: float = STEP):
+        """Продвигает ночь и орду на один шаг.
+
+        :param dt: время шага в секундах (по умолчанию фиксированный шаг STEP)
+        :type dt: float
+        """
+        super().step(dt)
+        if self.game_over:
+            return
+
+        self.spawn_timer += dt
+        if self.spawn_timer >= self.horde_params["spawn_interval"]:
+            self.spawn_timer = 0.0
+            self._spawn(self.horde_params["spawn_batch"])
+
+        if self.horde.update(dt, self.player, self.stealth_mode, self.flow, self.sight):
+            self._die("bonnie")
@@ -0,0 +1,81 @@
+"""Модуль надписей интерфейса.
+
+Надписи создаются один раз и рисуются общей пачкой pyglet за один вызов.
+Раскладка глифов надписи пересобирается только при смене её строки, а
+перемещение и скрытие раскладку не трогают.
+"""
+
+
+import arcade
+import pyglet
+
+
+class TextLayer:
+    """Набор именованных надписей, рисуемых одной пачкой."""
+
+    def __init__(self):
+        """Создаёт пустую пачку надписей."""
+        self.batch = pyglet.graphics.Batch()
+        self.labels = {}
+
+    def add(self, name: str, text: str, x: float, y: float, **style):
+        """Создаёт надпись в пачке.
+
+        :param name: имя, по которому надпись меняется дальше
+        :type name: str
+        :param text: начальный текст
+        :type text: str
+        :param x: координата X привязки
+        :type x: float
+        :param y: координата Y привязки
+        :type y: float
+        :param style: остальные параметры arcade.Text (цвет, размер шрифта, привязка)
+        :return: созданная надпись
+        :rtype: arcade.Text
+        """
+        label = arcade.Text(text, x, y, batch=self.batch, **style)
+        self.labels[name] = label
+        return label
+
+    def set(self, name: str, text: str):
+        """Меняет текст надписи; одинаковая строка раскладку не пересобирает.
+
+        :param name: имя надписи
+        :type name: str
+        :param text: новый текст
+        :type text: str
+        """
+        label = self.labels[name]
+        if label.text != text:
+            label.text = text
+
+    def move(self, name: str, x: float, y: float):
+        """Переносит надпись, не пересобирая раскладку.
+
+        :param name: имя надписи
+        :type name: str
+        """
+        label = self.labels[name]
+        if label.position != (x, y):
+            label.position = (x, y)
+
+    def show(self, name: str, visible: bool):
+        """Показывает или скрывает надпись.
+
+        :param name: имя надписи
+        :type name: str
+        :param visible: показывать ли надпись
+        :type visible: bool
+        """
+        label = self.labels[name]
+        if label.visible != visible:
+            label.visible = visible
+
+    def clear(self):
+        """Убирает все надписи вместе с пачкой."""
+        self.batch = pyglet.graphics.Batch()
+        self.labels.clear()
+
+    def draw(self):
+        """Рисует все видимые надписи одним вызовом."""
+        self.batch.draw()
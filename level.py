@@ -0,0 +1,134 @@
+"""Модуль загрузки карты уровня без графики.
+
+Берёт карту Tiled (TMX) из скомпилированного пакета модуля mapcache,
+хранит слои в виде сеток номеров тайлов и предоставляет геометрические запросы
+для симуляции, которой не нужны окно и OpenGL.
+"""
+
+
+from mapcache import load_map
+
+
+MAP_PATH = "maps/fnaf.tmx"
+MAP_SCALING = 3.7
+
+
+class Level:
+    """Карта уровня в мировых координатах.
+
+    Слои хранятся построчно снизу вверх, как в мировой системе координат arcade:
+    тайл (tx, ty) занимает прямоугольник от (tx * tile_size, ty * tile_size).
+    """
+
+    def __init__(self, path: str = MAP_PATH, scaling: float = MAP_SCALING):
+        """Загружает скомпилированный пакет карты, собирая его из файлов Tiled при необходимости.
+
+        :param path: путь к файлу карты .tmx
+        :type path: str
+        :param scaling: масштаб карты (как у arcade.load_tilemap)
+        :type scaling: float
+        """
+        self.path = path
+        self.scaling = scaling
+        self.bundle = load_map(path)
+        self.width = self.bundle.width
+        self.height = self.bundle.height
+        self.source_tile_width = self.bundle.tile_width
+        self.source_tile_height = self.bundle.tile_height
+        self.tile_size = self.source_tile_width * scaling
+        self.world_width = self.width * self.tile_size
+        self.world_height = self.height * self.source_tile_height * scaling
+        self.layers = self.bundle.layers
+        self.tile_properties = self.bundle.tile_properties
+        self.masks = self.bundle.masks
+        self.mask_layers = self.bundle.mask_layers
+
+    def gid(self, layer: str, tx: int, ty: int):
+        """Возвращает номер тайла в клетке слоя (0 — пусто или за пределами карты).
+
+        :param layer: имя слоя
+        :type layer: str
+        :param tx: столбец
+        :type tx: int
+        :param ty: строка (снизу вверх)
+        :type ty: int
+        :rtype: int
+        """
+        if 0 <= tx < self.width and 0 <= ty < self.height:
+            return self.layers[layer][ty * self.width + tx]
+        return 0
+
+    def tile_at(self, x: float, y: float):
+        """Переводит мировые координаты в координаты клетки.
+
+        :param x: координата X
+        :type x: float
+        :param y: координата Y
+        :type y: float
+        :rtype: tuple[int, int]
+        """
+        return int(x // self.tile_size), int(y // self.tile_size)
+
+    def tile_center(self, tx: int, ty: int):
+        """Возвращает мировые координаты центра клетки.
+
+        :param tx: столбец
+        :type tx: int
+        :param ty: строка
+        :type ty: int
+        :rtype: tuple[float, float]
+        """
+        return (tx + 0.5) * self.tile_size, (ty + 0.5) * self.tile_size
+
+    def tile_rect(self, tx: int, ty: int):
+        """Возвращает прямоугольник клетки (left, bottom, right, top).
+
+        :rtype: tuple[float, float, float, float]
+        """
+        size = self.tile_size
+        return tx * size, ty * size, (tx + 1) * size, (ty + 1) * size
+
+    def tiles_in_rect(self, layer: str, left: float, bottom: float, right: float, top: float):
+        """Перебирает непустые клетки слоя, пересекающие прямоугольник.
+
+        :param layer: имя слоя
+        :type layer: str
+        :return: генератор пар (tx, ty)
+        """
+        size = self.tile_size
+        grid = self.layers[layer]
+        tx0 = max(0, int(left // size))
+        tx1 = min(self.width - 1, int(right // size))
+        ty0 = max(0, int(bottom // size))
+        ty1 = min(self.height - 1, int(top // size))
+        for ty in range(ty0, ty1 + 1):
+            row = ty * self.width
+            for tx in range(tx0, tx1 + 1):
+                if grid[row + tx]:
+                    tile_left = tx * size
+                    tile_bottom = ty * size
+                    # Касание границ не считается пересечением, как у хитбоксов arcade
+                    if (tile_left < right and tile_left + size > left
+                            and tile_bottom < top and tile_bottom + size > bottom):
+                        yield tx, ty
+
+    def overlaps_layer(self, layer: str, left: float, bottom: float, right: float, top: float):
+        """Проверяет, пересекает ли прямоугольник хотя бы одну клетку слоя.
+
+        :rtype: bool
+        """
+        for _ in self.tiles_in_rect(layer, left, bottom, right, top):
+            return True
+        return False
+
+    def layer_tiles(self, layer: str):
+        """Перебирает все непустые клетки слоя.
+
+        :param layer: имя слоя
+        :type layer: str
+        :return: генератор троек (tx, ty, gid)
+        """
+        grid = self.layers[layer]
+        for index, gid in enumerate(grid):
+            if gid:
+                yield index % self.width, index // self.width, gid
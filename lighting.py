@@ -0,0 +1,186 @@
+"""Модуль освещения.
+
+Затемнение, свет вокруг игрока и любые дополнительные источники (мигающие лампы,
+свечение глаз аниматроника) рисуются одним вызовом отрисовки: полноэкранный
+прямоугольник затемнения и по квадрату на каждый источник в общем буфере вершин.
+Форму круга и мягкий край считает фрагментный шейдер, поэтому экран закрашивается
+затемнением один раз, а каждый новый источник стоит лишь площади своего круга.
+Источник с многоугольником видимости рисуется веером треугольников этого
+многоугольника вместо квадрата, и свет не проходит сквозь стены.
+"""
+
+
+import math
+from array import array
+import numpy as np
+import arcade
+from arcade.gl import BufferDescription
+
+
+# Под сколько источников буфер вершин выделяется сразу; при нехватке он растёт
+RESERVED_LIGHTS = 64
+# Вершина: позиция в пикселях кадра, центр круга, радиус и ширина края, цвет и непрозрачность
+VERTEX_FORMAT = "2f 2f 2f 4f"
+VERTEX_FLOATS = 10
+
+VERTEX_SHADER = """
+#version 330
+uniform vec2 screen_size;
+in vec2 in_vert;
+in vec2 in_center;
+in vec2 in_shape;
+in vec4 in_color;
+out vec2 center;
+out vec2 shape;
+out vec4 color;
+void main() {
+    center = in_center;
+    shape = in_shape;
+    color = in_color;
+    gl_Position = vec4(in_vert / screen_size * 2.0 - 1.0, 0.0, 1.0);
+}
+"""
+
+# Прямоугольники смешиваются по альфе по очереди: сначала затемнение, затем источники
+FRAGMENT_SHADER = """
+#version 330
+in vec2 center;
+in vec2 shape;
+in vec4 color;
+out vec4 fragColor;
+void main() {
+    float cover = clamp((shape.x - distance(gl_FragCoord.xy, center)) / shape.y, 0.0, 1.0);
+    fragColor = vec4(color.rgb, color.a * cover);
+}
+"""
+
+
+class Light:
+    """Круглый источник света в мировых координатах."""
+
+    def __init__(self, position: tuple, radius: float, color: tuple = (255, 255, 255),
+                 intensity: float = 1.0, softness: float = 0.0, flicker: float = 0.0, polygon=None):
+        """Создаёт источник света.
+
+        :param position: центр в мировых координатах
+        :type position: tuple[float, float]
+        :param radius: радиус в пикселях мира
+        :type radius: float
+        :param color: цвет света
+        :type color: tuple[int, int, int]
+        :param intensity: непрозрачность света в центре (0..1)
+        :type intensity: float
+        :param softness: ширина плавного края в пикселях мира
+        :type softness: float
+        :param flicker: на какую долю яркость проседает при мигании (0 — не мигает)
+        :type flicker: float
+        :param polygon: вершины многоугольника видимости в мировых координатах, по порядку обхода;
+            свет рисуется только внутри него (None — весь круг)
+        :type polygon: numpy.ndarray | None
+        """
+        self.position = position
+        self.radius = radius
+        self.color = color
+        self.intensity = intensity
+        self.softness = softness
+        self.flicker = flicker
+        self.polygon = polygon
+
+
+class LightingPass:
+    """Затемнение кадра со списком источников света за один вызов отрисовки."""
+
+    def __init__(self, ctx: arcade.ArcadeContext, darkness: float):
+        """Собирает шейдер и буфер вершин.
+
+        :param ctx: контекст OpenGL окна
+        :type ctx: arcade.ArcadeContext
+        :param darkness: непрозрачность затемнения вне света (0..1)
+        :type darkness: float
+        """
+        self.ctx = ctx
+        self.darkness = darkness
+        self.lights = []
+        self.program = ctx.program(vertex_shader=VERTEX_SHADER, fragment_shader=FRAGMENT_SHADER)
+        # Два треугольника на прямоугольник: затемнение и каждый источник;
+        # лишние источники и веера многоугольников видимости расширяют буфер по мере надобности
+        self.buffer = ctx.buffer(reserve=(RESERVED_LIGHTS + 1) * 6 * VERTEX_FLOATS * 4)
+        self.geometry = ctx.geometry([BufferDescription(self.buffer, VERTEX_FORMAT,
+                                                        ["in_vert", "in_center", "in_shape", "in_color"])],
+                                     mode=ctx.TRIANGLES)
+
+    @staticmethod
+    def _quad(data: array, left: float, bottom: float, right: float, top: float, attributes: tuple):
+        """Дописывает в данные два треугольника прямоугольника с общими атрибутами.
+
+        :param attributes: центр, радиус, край и цвет, одинаковые для всех вершин
+        :type attributes: tuple[float, ...]
+        """
+        for x, y in ((left, bottom), (right, bottom), (right, top), (left, bottom), (right, top), (left, top)):
+            data.append(x)
+            data.append(y)
+            data.extend(attributes)
+
+    @staticmethod
+    def _fan(data: array, corners: np.ndarray, x: float, y: float, attributes: tuple):
+        """Дописывает в данные веер треугольников от центра к соседним вершинам многоугольника.
+
+        :param corners: вершины многоугольника в пикселях кадра, массив (N, 2)
+        :type corners: numpy.ndarray
+        :param attributes: центр, радиус, край и цвет, одинаковые для всех вершин
+        :type attributes: tuple[float, ...]
+        """
+        vertices = np.empty((len(corners), 3, VERTEX_FLOATS), dtype=np.float32)
+        vertices[:, 0, :2] = (x, y)
+        vertices[:, 1, :2] = corners
+        vertices[:, 2, :2] = np.roll(corners, -1, axis=0)
+        vertices[:, :, 2:] = attributes
+        data.frombytes(vertices.tobytes())
+
+    def draw(self, camera: arcade.Camera2D, pixel_ratio: float, time: float):
+        """Затемняет кадр, оставляя светлыми круги источников.
+
+        :param camera: мировая камера, через которую источники переводятся в экран
+        :type camera: arcade.Camera2D
+        :param pixel_ratio: сколько пикселей кадра приходится на пиксель окна
+        :type pixel_ratio: float
+        :param time: время для мигания, в секундах
+        :type time: float
+        """
+        width, height = self.ctx.viewport[2:]
+        data = array("f")
+        # Радиус больше кадра — затемнение покрывает его целиком
+        self._quad(data, 0, 0, width, height, (0.0, 0.0, float(width + height), 1.0, 0.0, 0.0, 0.0, self.darkness))
+
+        scale = camera.zoom * pixel_ratio
+        for i, light in enumerate(self.lights):
+            x, y = camera.project(light.position)[:2]
+            x, y = x * pixel_ratio, y * pixel_ratio
+            radius = light.radius * scale
+            if light.intensity <= 0 or x + radius < 0 or x - radius > width or y + radius < 0 or y - radius > height:
+                continue
+            # Мигание зависит только от времени, поэтому считается здесь, а не для каждого пикселя
+            intensity = light.intensity
+            if light.flicker:
+                wave = math.sin(time * 23.0 + i * 7.1) * math.sin(time * 7.3 + i * 3.7)
+                intensity *= 1.0 - light.flicker * (0.5 + 0.5 * wave)
+            red, green, blue = light.color[:3]
+            # Край меньше пикселя кадра всё равно сглаживается на один пиксель
+            attributes = (x, y, radius, max(light.softness * scale, 1.0), red / 255, green / 255, blue / 255, intensity)
+            if light.polygon is not None and len(light.polygon):
+                # Многоугольник строится вокруг мира, поэтому переносится в кадр относительно центра света
+                corners = (light.polygon - light.position) * scale + (x, y)
+                self._fan(data, corners, x, y, attributes)
+            else:
+                self._quad(data, x - radius, y - radius, x + radius, y + radius, attributes)
+
+        if len(data) * 4 > self.buffer.size:
+            self.buffer.orphan(size=len(data) * 8)
+        self.buffer.write(data)
+        self.program["screen_size"] = (width, height)
+        ctx = self.ctx
+        original_blend = ctx.blend_func
+        ctx.blend_func = ctx.BLEND_DEFAULT
+        with ctx.enabled(ctx.BLEND):
+            self.geometry.render(self.program, vertices=len(data) // VERTEX_FLOATS)
+        ctx.blend_func = original_blend
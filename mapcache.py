@@ -0,0 +1,281 @@
+"""Модуль скомпилированных карт.
+
+Карта Tiled (TMX) вместе с наборами тайлов (TSX) один раз переводится в двоичный
+пакет: массивы номеров тайлов по слоям, свойства тайлов, описание наборов и
+упакованные маски слоёв (байт на клетку, по биту на слой). Пакет лежит рядом с
+картой в папке __pycache__ и проверяется по времени изменения и размеру исходных
+файлов, а если они изменились — по их хэшу. Загрузка пакета — отображение файла
+в память и несколько срезов без разбора XML.
+
+Формат пакета: сигнатура, длина заголовка, заголовок JSON, затем выровненные
+по четырём байтам массивы слоёв (uint32, строки снизу вверх) и массив масок (uint8).
+"""
+
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import xml.etree.ElementTree as ET
+from array import array
+
+
+MAGIC = b"FNAFMAP\0"
+VERSION = 1
+# Старшие биты gid в Tiled хранят флаги отражения тайла
+GID_MASK = 0x0FFFFFFF
+# Слои, маски которых собираются в пакет, по биту на слой в этом порядке
+MASK_LAYERS = ("walls", "doors", "objects", "textures")
+CACHE_DIR = "__pycache__"
+
+
+class MapBundle:
+    """Загруженный пакет карты: сетки слоёв и маски поверх буфера файла."""
+
+    def __init__(self, buffer):
+        """Разбирает заголовок и создаёт представления массивов без копирования.
+
+        :param buffer: содержимое пакета (отображение файла или байты)
+        :type buffer: mmap.mmap | bytes
+        """
+        self.buffer = buffer
+        header_size = struct.unpack_from("<I", buffer, len(MAGIC))[0]
+        start = len(MAGIC) + 4
+        self.header = json.loads(bytes(buffer[start:start + header_size]))
+        header = self.header
+        self.width = header["width"]
+        self.height = header["height"]
+        self.tile_width = header["tilewidth"]
+        self.tile_height = header["tileheight"]
+        self.tilesets = header["tilesets"]
+        self.tile_properties = {int(gid): properties for gid, properties in header["tile_properties"].items()}
+        self.layer_visible = {name: visible for name, _, visible in header["layers"]}
+
+        view = memoryview(buffer)
+        cells = self.width * self.height
+        self.layers = {}
+        for name, offset, _ in header["layers"]:
+            self.layers[name] = view[offset:offset + cells * 4].cast("I")
+        self.mask_layers = tuple(header["masks"]["layers"])
+        offset = header["masks"]["offset"]
+        self.masks = view[offset:offset + cells]
+
+    def valid(self):
+        """Проверяет, что пакет собран этой версией и исходные файлы не менялись.
+
+        Время изменения и размер проверяются сразу; если они другие, сравнивается хэш,
+        поэтому пересохранённая без изменений карта пакет не сбрасывает.
+
+        :rtype: bool
+        """
+        header = self.header
+        if header.get("version") != VERSION or header.get("byteorder") != sys.byteorder:
+            return False
+        for path, (mtime, size, digest) in header["sources"].items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return False
+            if (stat.st_mtime_ns, stat.st_size) != (mtime, size) and _digest(path) != digest:
+                return False
+        return True
+
+
+def _digest(path: str):
+    """Хэш SHA-1 содержимого файла.
+
+    :rtype: str
+    """
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def _source(path: str):
+    """Отметка исходного файла для проверки пакета: время изменения, размер и хэш.
+
+    :rtype: list
+    """
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size, _digest(path)]
+
+
+def _parse_tileset(element: ET.Element, map_dir: str, sources: dict, tile_properties: dict):
+    """Читает набор тайлов: геометрию картинки и свойства тайлов.
+
+    :param element: элемент <tileset> карты
+    :type element: ET.Element
+    :param map_dir: папка файла карты
+    :type map_dir: str
+    :param sources: отметки исходных файлов, дополняется внешним набором
+    :type sources: dict
+    :param tile_properties: свойства тайлов по gid, дополняется
+    :type tile_properties: dict
+    :return: описание набора для пакета
+    :rtype: dict
+    """
+    first_gid = int(element.get("firstgid"))
+    tileset_dir = map_dir
+    source = element.get("source")
+    if source is not None:
+        path = os.path.normpath(os.path.join(map_dir, source))
+        sources[path] = _source(path)
+        element = ET.parse(path).getroot()
+        tileset_dir = os.path.dirname(path)
+
+    for tile in element.iter("tile"):
+        properties = {}
+        for prop in tile.iter("property"):
+            properties[prop.get("name")] = prop.get("value")
+        if properties:
+            tile_properties[str(first_gid + int(tile.get("id")))] = properties
+
+    image = element.find("image")
+    return {
+        "firstgid": first_gid,
+        "image": None if image is None else os.path.normpath(os.path.join(tileset_dir, image.get("source"))),
+        "tilewidth": int(element.get("tilewidth")),
+        "tileheight": int(element.get("tileheight")),
+        "columns": int(element.get("columns", 0)),
+        "spacing": int(element.get("spacing", 0)),
+        "margin": int(element.get("margin", 0)),
+    }
+
+
+def compile_map(path: str):
+    """Переводит карту Tiled в байты пакета.
+
+    :param path: путь к файлу карты .tmx
+    :type path: str
+    :rtype: bytes
+    """
+    sources = {os.path.normpath(path): _source(path)}
+    root = ET.parse(path).getroot()
+    width = int(root.get("width"))
+    height = int(root.get("height"))
+    map_dir = os.path.dirname(path)
+
+    tile_properties = {}
+    tilesets = [_parse_tileset(tileset, map_dir, sources, tile_properties) for tileset in root.iter("tileset")]
+
+    grids = []
+    for layer in root.iter("layer"):
+        text = layer.find("data").text
+        values = [int(value) & GID_MASK for value in text.replace("\n", "").split(",") if value.strip()]
+        # В TMX строки идут сверху вниз, а в мире — снизу вверх
+        grid = array("I")
+        for row in range(height - 1, -1, -1):
+            grid.extend(values[row * width:(row + 1) * width])
+        grids.append((layer.get("name"), grid, layer.get("visible", "1") != "0"))
+
+    masks = bytearray(width * height)
+    for bit, name in enumerate(MASK_LAYERS):
+        for grid_name, grid, _ in grids:
+            if grid_name == name:
+                for index, gid in enumerate(grid):
+                    if gid:
+                        masks[index] |= 1 << bit
+
+    header = {
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "sources": sources,
+        "width": width,
+        "height": height,
+        "tilewidth": int(root.get("tilewidth")),
+        "tileheight": int(root.get("tileheight")),
+        "tilesets": tilesets,
+        "tile_properties": tile_properties,
+        "layers": [],
+        "masks": {"layers": list(MASK_LAYERS), "offset": 0},
+    }
+    # Смещения массивов зависят от длины заголовка, а она — от смещений:
+    # повторяем, пока длина не перестанет меняться
+    header_size = -1
+    while True:
+        encoded = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        if len(encoded) == header_size:
+            break
+        header_size = len(encoded)
+        offset = _align(len(MAGIC) + 4 + header_size)
+        header["layers"] = []
+        for name, grid, visible in grids:
+            header["layers"].append([name, offset, visible])
+            offset += len(grid) * grid.itemsize
+        header["masks"]["offset"] = offset
+
+    data = bytearray(MAGIC)
+    data += struct.pack("<I", header_size)
+    data += encoded
+    data += bytes(_align(len(data)) - len(data))
+    for _, grid, _ in grids:
+        data += grid.tobytes()
+    data += masks
+    return bytes(data)
+
+
+def _align(offset: int):
+    """Округляет смещение вверх до кратного четырём.
+
+    :rtype: int
+    """
+    return (offset + 3) & ~3
+
+
+def cache_path(path: str):
+    """Путь к пакету карты.
+
+    :rtype: str
+    """
+    return os.path.join(os.path.dirname(path), CACHE_DIR, os.path.basename(path) + ".bin")
+
+
+def _open(path: str):
+    """Отображает пакет в память.
+
+    :return: пакет или None, если файла нет, он повреждён или устарел
+    :rtype: MapBundle | None
+    """
+    try:
+        with open(path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if buffer[:len(MAGIC)] != MAGIC:
+        buffer.close()
+        return None
+    try:
+        bundle = MapBundle(buffer)
+    except (ValueError, KeyError, TypeError, struct.error):
+        return None
+    if not bundle.valid():
+        return None
+    return bundle
+
+
+def load_map(path: str):
+    """Загружает пакет карты, собирая его заново, если он устарел.
+
+    Если пакет не удаётся записать на диск, карта загружается из собранных в памяти байтов.
+
+    :param path: путь к файлу карты .tmx
+    :type path: str
+    :rtype: MapBundle
+    """
+    target = cache_path(path)
+    bundle = _open(target)
+    if bundle is not None:
+        return bundle
+    data = compile_map(path)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Пакет пишется во временный файл и подменяется целиком, чтобы его не прочли наполовину
+        temporary = f"{target}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(data)
+        os.replace(temporary, target)
+    except OSError:
+        return MapBundle(data)
+    bundle = _open(target)
+    return bundle if bundle is not None else MapBundle(data)
@@ -0,0 +1,229 @@
+"""Пакетный прогон ночей для настройки сложности.
+
+Симулирует тысячи ночей без окна на пуле процессов со скриптовыми стратегиями
+игрока и печатает распределение времени выживания и причин смерти для каждого
+набора параметров.
+
+Пример::
+
+    python montecarlo.py --nights 20000 --policy evasive \\
+        --set bonnie_activation_chance=0.6,0.8 --set freddy_activation_chance=0.5,0.7
+"""
+
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from collections import Counter
+from level import Level, MAP_PATH
+from policies import POLICIES
+from simulation import Simulation, DEFAULT_PARAMS, STEP, derive_rng
+
+
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+_level = None
+_sim = None
+
+
+def _init_worker(map_path: str):
+    """Загружает карту и собирает производные от неё структуры симуляции один раз на процесс пула.
+
+    Навигация, поле погони, двери и маршруты от параметров сложности не зависят,
+    поэтому порции ночей только сбрасывают симуляцию с нужными параметрами.
+
+    :param map_path: путь к файлу карты
+    :type map_path: str
+    """
+    global _level, _sim
+    _level = Level(map_path)
+    _sim = Simulation(_level)
+
+
+def run_night(sim: Simulation, policy, max_time: float, step: float = STEP):
+    """Прогоняет одну ночь до смерти игрока или до лимита времени.
+
+    :param sim: симуляция, уже сброшенная в начальное состояние
+    :type sim: Simulation
+    :param policy: стратегия игрока
+    :type policy: policies.Policy
+    :param max_time: лимит времени ночи в секундах
+    :type max_time: float
+    :param step: шаг симуляции
+    :type step: float
+    :return: время выживания и причина смерти ("survived", если игрок дожил до лимита)
+    :rtype: tuple[float, str]
+    """
+    while not sim.game_over and sim.total_play_time < max_time:
+        policy.act(sim, step)
+        sim.step(step)
+    return sim.total_play_time, sim.death_cause or "survived"
+
+
+def _run_chunk(task):
+    """Прогоняет серию ночей с одним набором параметров в процессе пула.
+
+    :param task: (номер набора, параметры, стратегия, первый сид, число ночей, лимит, шаг)
+    :type task: tuple
+    :return: номер набора и список результатов ночей
+    :rtype: tuple[int, list[tuple[float, str]]]
+    """
+    index, params, policy_name, first_seed, count, max_time, step = task
+    results = []
+    for seed in range(first_seed, first_seed + count):
+        _sim.reset(seed, params)
+        policy = POLICIES[policy_name](derive_rng(seed, "policy"))
+        results.append(run_night(_sim, policy, max_time, step))
+    return index, results
+
+
+def percentile(sorted_values: list, q: float):
+    """Перцентиль по методу ближайшего ранга.
+
+    :param sorted_values: отсортированные значения
+    :type sorted_values: list[float]
+    :param q: перцентиль от 0 до 100
+    :type q: float
+    :rtype: float
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(results: list, max_time: float, bins: int = 10):
+    """Сводит результаты ночей в статистику.
+
+    :param results: список пар (время выживания, причина смерти)
+    :type results: list[tuple[float, str]]
+    :param max_time: лимит времени ночи, задаёт ширину корзин гистограммы
+    :type max_time: float
+    :param bins: число корзин гистограммы времени выживания
+    :type bins: int
+    :rtype: dict
+    """
+    times = sorted(result[0] for result in results)
+    causes = Counter(result[1] for result in results)
+    histogram = [0] * bins
+    for value in times:
+        histogram[min(int(value / max_time * bins), bins - 1)] += 1
+    return {
+        "nights": len(results),
+        "mean": sum(times) / len(times) if times else 0.0,
+        "percentiles": {q: percentile(times, q) for q in PERCENTILES},
+        "causes": dict(causes.most_common()),
+        "histogram": histogram,
+    }
+
+
+def parse_sweep(assignments: list):
+    """Строит все сочетания параметров из аргументов вида name=v1,v2.
+
+    :param assignments: список строк name=v1,v2,...
+    :type assignments: list[str]
+    :return: список словарей переопределений
+    :rtype: list[dict]
+    """
+    names = []
+    values = []
+    for assignment in assignments:
+        name, _, raw = assignment.partition("=")
+        if name not in DEFAULT_PARAMS:
+            raise ValueError(f"Неизвестный параметр: {name}")
+        names.append(name)
+        values.append([float(value) for value in raw.split(",")])
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def run_sweep(param_sets: list, nights: int, policy: str, max_time: float,
+              step: float = STEP, workers: int = None, seed: int = 0, map_path: str = MAP_PATH):
+    """Прогоняет все наборы параметров на пуле процессов.
+
+    :param param_sets: список переопределений параметров
+    :type param_sets: list[dict]
+    :param nights: число ночей на набор
+    :type nights: int
+    :param policy: имя стратегии из policies.POLICIES
+    :type policy: str
+    :param max_time: лимит времени ночи
+    :type max_time: float
+    :param step: шаг симуляции
+    :type step: float
+    :param workers: число процессов (по умолчанию — число ядер)
+    :type workers: int
+    :param seed: первый сид; ночь i набора получает сид seed + i
+    :type seed: int
+    :param map_path: путь к карте
+    :type map_path: str
+    :return: сводка для каждого набора в исходном порядке
+    :rtype: list[dict]
+    """
+    workers = workers or os.cpu_count() or 1
+    # Мелкие порции выравнивают нагрузку между ядрами
+    chunk = max(1, min(200, nights // (workers * 4)))
+    tasks = []
+    for index, params in enumerate(param_sets):
+        for first in range(0, nights, chunk):
+            tasks.append((index, params, policy, seed + first, min(chunk, nights - first), max_time, step))
+
+    results = [[] for _ in param_sets]
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(map_path,)) as pool:
+        for index, chunk_results in pool.imap_unordered(_run_chunk, tasks):
+            results[index].extend(chunk_results)
+    return [summarize(night_results, max_time) for night_results in results]
+
+
+def format_report(params: dict, summary: dict, max_time: float):
+    """Форматирует сводку одного набора параметров для вывода в консоль.
+
+    :rtype: str
+    """
+    lines = [f"Параметры: {json.dumps(params, ensure_ascii=False) if params else 'по умолчанию'}",
+             f"  ночей: {summary['nights']}, среднее время: {summary['mean']:.1f} с"]
+    lines.append("  перцентили: " + ", ".join(f"p{q}={value:.1f}" for q, value in summary["percentiles"].items()))
+    lines.append("  причины: " + ", ".join(f"{cause}={count}" for cause, count in summary["causes"].items()))
+    width = max_time / len(summary["histogram"])
+    peak = max(summary["histogram"]) or 1
+    for i, count in enumerate(summary["histogram"]):
+        bar = "#" * round(count / peak * 40)
+        lines.append(f"  {i * width:6.0f}–{(i + 1) * width:<6.0f} {count:7d} {bar}")
+    return "\n".join(lines)
+
+
+def main():
+    """Точка входа командной строки."""
+    parser = argparse.ArgumentParser(description="Монте-Карло прогон ночей без окна")
+    parser.add_argument("--nights", type=int, default=1000, help="ночей на набор параметров")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="wander", help="стратегия игрока")
+    parser.add_argument("--max-time", type=float, default=600.0, help="лимит ночи в секундах")
+    parser.add_argument("--step", type=float, default=STEP, help="шаг симуляции в секундах")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов")
+    parser.add_argument("--seed", type=int, default=0, help="первый сид")
+    parser.add_argument("--set", dest="sweep", action="append", default=[],
+                        help="параметр и значения через запятую: name=v1,v2")
+    parser.add_argument("--json", help="сохранить сводку в JSON-файл")
+    args = parser.parse_args()
+
+    param_sets = parse_sweep(args.sweep)
+    started = time.perf_counter()
+    summaries = run_sweep(param_sets, args.nights, args.policy, args.max_time,
+                          args.step, args.workers, args.seed)
+    elapsed = time.perf_counter() - started
+
+    for params, summary in zip(param_sets, summaries):
+        print(format_report(params, summary, args.max_time))
+    total = args.nights * len(param_sets)
+    print(f"Всего {total} ночей за {elapsed:.1f} с ({total / elapsed:.0f} ночей/с)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump([{"params": params, **summary} for params, summary in zip(param_sets, summaries)],
+                      file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,480 @@
+"""Модуль навигации аниматроников по карте.
+
+Строит граф проходимости по слою стен при загрузке карты, ищет пути алгоритмом A*
+с кэшем готовых маршрутов, держит общее поле расстояний до игрока, по которому
+охотники выбирают направление погони, и проверяет прямую видимость между клетками. Аниматроники крупнее клетки, поэтому граф
+и спрямление пути учитывают весь хитбокс, а не только его центр.
+"""
+
+
+import heapq
+import math
+from collections import OrderedDict
+from level import Level
+
+
+SQRT2 = math.sqrt(2)
+
+NEIGHBOURS = (
+    (1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+    (1, 1, SQRT2), (1, -1, SQRT2), (-1, 1, SQRT2), (-1, -1, SQRT2),
+)
+
+# Опорная точка ищется на сетке смещений от центра клетки до её края, ближние смещения первыми
+ANCHOR_STEPS = 4
+ANCHOR_OFFSETS = sorted(((dx, dy) for dx in range(-ANCHOR_STEPS, ANCHOR_STEPS + 1)
+                         for dy in range(-ANCHOR_STEPS, ANCHOR_STEPS + 1)),
+                        key=lambda offset: offset[0] ** 2 + offset[1] ** 2)
+
+# Насколько далеко (в клетках) искать проходимую клетку рядом с точкой, где хитбокс не помещается
+NEAREST_RADIUS = 3
+
+
+class NavGrid:
+    """Граф проходимости по клеткам карты с поиском путей для тела заданного размера.
+
+    Каждой клетке ставится в соответствие опорная точка — ближайшая к центру клетки
+    позиция, в которой хитбокс не задевает стен. Соседние клетки связаны, если хитбокс
+    проходит между их опорными точками по прямой. По умолчанию двери не считаются
+    препятствием: аниматроники проходят их телепортом.
+    """
+
+    def __init__(self, level: Level, body_size: tuple, cache_size: int = 4096, layers: tuple = ("walls",)):
+        """Строит опорные точки и рёбра графа по слоям препятствий.
+
+        :param level: карта уровня
+        :type level: Level
+        :param body_size: размеры самого крупного хитбокса, который водит сетка
+        :type body_size: tuple[float, float]
+        :param cache_size: сколько спрямлённых путей хранить в кэше
+        :type cache_size: int
+        :param layers: имена слоёв-препятствий
+        :type layers: tuple[str, ...]
+        """
+        self.level = level
+        self.layers = layers
+        self.width = level.width
+        self.height = level.height
+        self.half_width = body_size[0] / 2
+        self.half_height = body_size[1] / 2
+        self.anchors = [self._anchor(index % self.width, index // self.width)
+                        for index in range(self.width * self.height)]
+        self.edges = [[] for _ in self.anchors]
+        for index, anchor in enumerate(self.anchors):
+            if anchor is None:
+                continue
+            tx, ty = index % self.width, index // self.width
+            # Рёбра симметричны, поэтому проверяем только половину соседей
+            for dx, dy, cost in NEIGHBOURS[::2]:
+                neighbour = self.index(tx + dx, ty + dy)
+                if neighbour is not None and self.sweep_clear(anchor, self.anchors[neighbour]):
+                    self.edges[index].append((neighbour, cost))
+                    self.edges[neighbour].append((index, cost))
+        self._nearest = {}
+        self.cache_size = cache_size
+        self._paths = OrderedDict()
+        self.searches = 0
+
+    def index(self, tx: int, ty: int):
+        """Номер клетки, через которую может пройти хитбокс.
+
+        :return: номер клетки или None, если клетка за картой или хитбокс в ней не помещается
+        :rtype: int | None
+        """
+        if 0 <= tx < self.width and 0 <= ty < self.height:
+            index = ty * self.width + tx
+            if self.anchors[index] is not None:
+                return index
+        return None
+
+    def fits(self, x: float, y: float):
+        """Проверяет, помещается ли хитбокс с центром в точке между препятствиями.
+
+        :rtype: bool
+        """
+        return not self._blocked(x, y)
+
+    def _blocked(self, x: float, y: float):
+        """Проверяет, задевает ли хитбокс с центром в точке клетку слоёв-препятствий.
+
+        :rtype: bool
+        """
+        left, bottom = x - self.half_width, y - self.half_height
+        right, top = x + self.half_width, y + self.half_height
+        for layer in self.layers:
+            if self.level.overlaps_layer(layer, left, bottom, right, top):
+                return True
+        return False
+
+    def _anchor(self, tx: int, ty: int):
+        """Ищет ближайшую к центру клетки точку внутри неё, где помещается хитбокс.
+
+        :return: мировые координаты точки или None, если хитбокс в клетке не помещается
+        :rtype: tuple[float, float] | None
+        """
+        if any(self.level.gid(layer, tx, ty) for layer in self.layers):
+            return None
+        x, y = self.level.tile_center(tx, ty)
+        offset = self.level.tile_size / (2 * ANCHOR_STEPS)
+        for dx, dy in ANCHOR_OFFSETS:
+            if self.fits(x + dx * offset, y + dy * offset):
+                return x + dx * offset, y + dy * offset
+        return None
+
+    def sweep_clear(self, start: tuple, goal: tuple):
+        """Проверяет, что хитбокс пройдёт по прямой между точками, не задев препятствий.
+
+        :param start: мировые координаты начала
+        :type start: tuple[float, float]
+        :param goal: мировые координаты конца
+        :type goal: tuple[float, float]
+        :rtype: bool
+        """
+        dx = goal[0] - start[0]
+        dy = goal[1] - start[1]
+        # Шаг проверки меньше клетки и меньше хитбокса, поэтому стена не проскочит между проверками
+        samples = max(1, math.ceil(math.hypot(dx, dy) / (self.level.tile_size / 4)))
+        for i in range(samples + 1):
+            x = start[0] + dx * i / samples
+            y = start[1] + dy * i / samples
+            if self._blocked(x, y):
+                return False
+        return True
+
+    def find_path(self, start: int, goal: int):
+        """Ищет кратчайший путь A* по рёбрам графа.
+
+        :param start: номер клетки начала
+        :type start: int
+        :param goal: номер клетки цели
+        :type goal: int
+        :return: опорные точки от start до goal или None, если пути нет
+        :rtype: list[tuple[float, float]] | None
+        """
+        self.searches += 1
+        width = self.width
+        gx, gy = goal % width, goal // width
+
+        def heuristic(index):
+            dx = abs(index % width - gx)
+            dy = abs(index // width - gy)
+            return dx + dy + (SQRT2 - 2) * min(dx, dy)
+
+        costs = {start: 0.0}
+        came_from = {start: None}
+        frontier = [(heuristic(start), 0.0, start)]
+        while frontier:
+            _, cost, index = heapq.heappop(frontier)
+            if index == goal:
+                break
+            if cost > costs[index]:
+                continue
+            for neighbour, step in self.edges[index]:
+                next_cost = cost + step
+                if next_cost < costs.get(neighbour, math.inf):
+                    costs[neighbour] = next_cost
+                    came_from[neighbour] = index
+                    heapq.heappush(frontier, (next_cost + heuristic(neighbour), next_cost, neighbour))
+        else:
+            return None
+
+        path = []
+        index = goal
+        while index is not None:
+            path.append(self.anchors[index])
+            index = came_from[index]
+        path.reverse()
+        return path
+
+    def nearest(self, x: float, y: float):
+        """Клетка графа под точкой или, если хитбокс там не помещается, ближайшая из окрестных.
+
+        Ответ для клетки без опорной точки вычисляется один раз от её центра и запоминается.
+
+        :return: номер клетки или None, если рядом нет проходимых клеток
+        :rtype: int | None
+        """
+        tx, ty = self.level.tile_at(x, y)
+        index = self.index(tx, ty)
+        if index is not None:
+            return index
+        key = (tx, ty)
+        if key not in self._nearest:
+            self._nearest[key] = self._search_nearest(tx, ty)
+        return self._nearest[key]
+
+    def _search_nearest(self, tx: int, ty: int):
+        """Ищет проходимую клетку, ближайшую к центру клетки, расширяя квадрат поиска.
+
+        :rtype: int | None
+        """
+        x, y = self.level.tile_center(tx, ty)
+        best = None
+        best_dist = math.inf
+        for radius in range(1, NEAREST_RADIUS + 1):
+            for nx in range(tx - radius, tx + radius + 1):
+                for ny in range(ty - radius, ty + radius + 1):
+                    if max(abs(nx - tx), abs(ny - ty)) != radius:
+                        continue
+                    neighbour = self.index(nx, ny)
+                    if neighbour is not None:
+                        ax, ay = self.anchors[neighbour]
+                        dist = math.hypot(ax - x, ay - y)
+                        if dist < best_dist:
+                            best = neighbour
+                            best_dist = dist
+            if best is not None:
+                return best
+        return None
+
+    def smooth_path(self, path: list):
+        """Спрямляет путь: оставляет только точки, между которыми хитбокс не проходит напрямую.
+
+        :param path: опорные точки пути
+        :type path: list[tuple[float, float]]
+        :rtype: list[tuple[float, float]]
+        """
+        if len(path) <= 2:
+            return list(path)
+        smoothed = [path[0]]
+        anchor = path[0]
+        for i in range(2, len(path)):
+            if not self.sweep_clear(anchor, path[i]):
+                anchor = path[i - 1]
+                smoothed.append(anchor)
+        smoothed.append(path[-1])
+        return smoothed
+
+    def path(self, start: int, goal: int):
+        """Возвращает спрямлённый путь из кэша или ищет новый.
+
+        :param start: номер клетки начала
+        :type start: int
+        :param goal: номер клетки цели
+        :type goal: int
+        :return: опорные точки пути или None, если пути нет
+        :rtype: list[tuple[float, float]] | None
+        """
+        key = (start, goal)
+        if key in self._paths:
+            self._paths.move_to_end(key)
+            return self._paths[key]
+        raw = self.find_path(start, goal)
+        result = self.smooth_path(raw) if raw is not None else None
+        self._paths[key] = result
+        if len(self._paths) > self.cache_size:
+            self._paths.popitem(last=False)
+        return result
+
+
+class FlowField:
+    """Общее для всех охотников поле расстояний до игрока по графу NavGrid.
+
+    Поле строится алгоритмом Дейкстры от клетки игрока и сбрасывается только тогда,
+    когда игрок переходит в другую клетку. Поиск продолжается лениво: клетки
+    раскрываются по мере запросов, поэтому после сброса обходится лишь часть карты
+    до самого дальнего охотника. Следующий шаг к игроку из любой раскрытой клетки
+    берётся из таблицы за O(1).
+    """
+
+    def __init__(self, nav: NavGrid, lookahead: int = 6):
+        """Создаёт пустое поле.
+
+        :param nav: граф проходимости карты
+        :type nav: NavGrid
+        :param lookahead: на сколько клеток вперёд искать точку, видимую напрямую
+        :type lookahead: int
+        """
+        self.nav = nav
+        self.lookahead = lookahead
+        size = len(nav.anchors)
+        self.goal = None
+        self.distance = [math.inf] * size
+        self.next_hop = [None] * size
+        self.settled = bytearray(size)
+        self._frontier = []
+        self.rebuilds = 0
+
+    def set_target(self, x: float, y: float):
+        """Переносит корень поля в клетку точки, если она сменилась.
+
+        :param x: координата X цели
+        :type x: float
+        :param y: координата Y цели
+        :type y: float
+        :return: True, если поле сброшено
+        :rtype: bool
+        """
+        goal = self.nav.nearest(x, y)
+        if goal == self.goal:
+            return False
+        self.goal = goal
+        self.rebuilds += 1
+        size = len(self.distance)
+        self.distance = [math.inf] * size
+        self.next_hop = [None] * size
+        self.settled = bytearray(size)
+        self._frontier = []
+        if goal is not None:
+            self.distance[goal] = 0.0
+            self._frontier.append((0.0, goal))
+        return True
+
+    def _settle(self, index: int = None):
+        """Продолжает поиск, пока расстояние до клетки не станет окончательным.
+
+        :param index: номер клетки (None — раскрыть все достижимые клетки)
+        :type index: int
+        :return: True, если клетка достижима из корня
+        :rtype: bool
+        """
+        distance = self.distance
+        next_hop = self.next_hop
+        settled = self.settled
+        frontier = self._frontier
+        edges = self.nav.edges
+        while (index is None or not settled[index]) and frontier:
+            cost, current = heapq.heappop(frontier)
+            if settled[current]:
+                continue
+            settled[current] = 1
+            for neighbour, step in edges[current]:
+                next_cost = cost + step
+                if next_cost < distance[neighbour]:
+                    distance[neighbour] = next_cost
+                    # Поиск идёт от игрока, поэтому родитель клетки — её следующий шаг к игроку
+                    next_hop[neighbour] = current
+                    heapq.heappush(frontier, (next_cost, neighbour))
+        return index is None or bool(settled[index])
+
+    def settle_all(self):
+        """Достраивает поле на всю карту — нужно, когда за игроком идут сразу из всех углов."""
+        self._settle()
+
+    def next_waypoint(self, position: tuple, target: tuple):
+        """Точка, к которой надо идти, чтобы добраться до корня поля по коридорам.
+
+        Из цепочки следующих шагов выбирается самая дальняя точка в пределах lookahead,
+        к которой хитбокс проходит по прямой, — так путь спрямляется без отдельного поиска.
+
+        :param position: текущая позиция в мире
+        :type position: tuple[float, float]
+        :param target: позиция цели в мире
+        :type target: tuple[float, float]
+        :return: мировые координаты следующей точки пути или None, если до цели
+            можно идти напрямую либо путь не найден
+        :rtype: tuple[float, float] | None
+        """
+        nav = self.nav
+        start = nav.nearest(*position)
+        if start is None or self.goal is None or start == self.goal or not self._settle(start):
+            return None
+        chain = []
+        index = start
+        while index != self.goal and len(chain) < self.lookahead:
+            index = self.next_hop[index]
+            chain.append(index)
+        if chain[-1] == self.goal and nav.sweep_clear(position, target):
+            return None
+        for index in reversed(chain):
+            if nav.sweep_clear(position, nav.anchors[index]):
+                return nav.anchors[index]
+        # Тело сошло с опорной точки клетки и упирается в угол — сначала возвращаемся на неё
+        return nav.anchors[start]
+
+
+class LineOfSight:
+    """Проверка прямой видимости между клетками по битовой карте стен.
+
+    Луч проводится алгоритмом Брезенхэма от центра клетки до центра клетки, результаты
+    запоминаются для пары клеток и вытесняются по давности использования.
+    """
+
+    def __init__(self, level: Level, cache_size: int = 8192):
+        """Строит карту занятости по слою стен.
+
+        :param level: карта уровня
+        :type level: Level
+        :param cache_size: сколько пар клеток хранить в кэше
+        :type cache_size: int
+        """
+        self.level = level
+        self.width = level.width
+        self.height = level.height
+        self.blocked = bytearray(1 if gid else 0 for gid in level.layers["walls"])
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def _opaque(self, tx: int, ty: int):
+        """Проверяет, закрывает ли клетка обзор (за пределами карты обзор закрыт).
+
+        :rtype: bool
+        """
+        return not (0 <= tx < self.width and 0 <= ty < self.height) or self.blocked[ty * self.width + tx] == 1
+
+    def trace(self, start: tuple, goal: tuple):
+        """Проводит луч между центрами клеток.
+
+        Если луч проходит точно через угол, он не должен проскочить между двумя стенами,
+        касающимися углами, поэтому проверяются обе соседние клетки.
+
+        :param start: клетка начала
+        :type start: tuple[int, int]
+        :param goal: клетка конца
+        :type goal: tuple[int, int]
+        :return: True, если на пути нет стен
+        :rtype: bool
+        """
+        x, y = start
+        gx, gy = goal
+        dx = abs(gx - x)
+        dy = abs(gy - y)
+        step_x = 1 if gx > x else -1
+        step_y = 1 if gy > y else -1
+        error = dx - dy
+        dx2 = dx * 2
+        dy2 = dy * 2
+        if self._opaque(x, y):
+            return False
+        for _ in range(dx + dy):
+            if error > 0:
+                x += step_x
+                error -= dy2
+            elif error < 0:
+                y += step_y
+                error += dx2
+            else:
+                if self._opaque(x + step_x, y) or self._opaque(x, y + step_y):
+                    return False
+                x += step_x
+                y += step_y
+                error += dx2 - dy2
+            if self._opaque(x, y):
+                return False
+            if x == gx and y == gy:
+                break
+        return True
+
+    def visible(self, a: tuple, b: tuple):
+        """Проверяет прямую видимость между двумя точками мира.
+
+        :param a: мировые координаты первой точки
+        :type a: tuple[float, float]
+        :param b: мировые координаты второй точки
+        :type b: tuple[float, float]
+        :rtype: bool
+        """
+        start = self.level.tile_at(*a)
+        goal = self.level.tile_at(*b)
+        # Видимость симметрична, поэтому пара хранится в одном порядке
+        key = (start, goal) if start <= goal else (goal, start)
+        cache = self._cache
+        result = cache.get(key)
+        if result is None:
+            result = self.trace(*key)
+            cache[key] = result
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return result
@@ -0,0 +1,273 @@
+"""Модуль патрульных маршрутов.
+
+При загрузке карты пол каждой комнаты делится на квадраты, в каждом ставится точка
+маршрута, соседние точки связываются спрямлёнными путями, а комнаты — переходами
+через дверные проёмы. Все рёбра графа — отрезки, по которым хитбокс проходит,
+не задевая стен и дверей, поэтому патрульный идёт от точки к точке прямо
+и не трётся о стены. Кратчайшие маршруты между всеми точками считаются заранее.
+"""
+
+
+import heapq
+import math
+from level import Level
+from navigation import NavGrid
+from portals import PortalGraph
+
+
+# Сторона квадрата клеток, в котором ставится одна точка маршрута
+CELL_TILES = 5
+# Во сколько раз путь между соседними точками может быть длиннее прямой, чтобы их связать
+DETOUR_LIMIT = 2.0
+
+
+class PatrolRoutes:
+    """Граф точек патрулирования с готовыми кратчайшими маршрутами.
+
+    Точки маршрута — узлы; у каждого узла есть позиция, комната и рёбра с длинами.
+    Для любой клетки карты заранее известно, куда идти, чтобы выйти на ближайший узел.
+    """
+
+    def __init__(self, level: Level, portals: PortalGraph, body_size: tuple):
+        """Строит узлы, рёбра, маршруты и таблицу выхода на граф.
+
+        :param level: карта уровня
+        :type level: Level
+        :param portals: дверные проёмы и комнаты карты
+        :type portals: PortalGraph
+        :param body_size: размеры хитбокса патрульного
+        :type body_size: tuple[float, float]
+        """
+        self.level = level
+        self.portals = portals
+        # Двери здесь — препятствие: внутри комнаты патрульный их не задевает, а проходит только нарочно
+        self.nav = NavGrid(level, body_size, layers=("walls", "doors"))
+        self.anchor_index = {anchor: index for index, anchor in enumerate(self.nav.anchors) if anchor is not None}
+
+        self.points = []
+        self.rooms = []
+        self.links = []
+        self._tile_node = {}
+        self._build_rooms()
+        self._build_doors(body_size)
+
+        self._build_routes()
+        self._build_join()
+
+    def _add_node(self, point: tuple, room: int):
+        """Добавляет узел или возвращает уже стоящий в опорной точке той же клетки.
+
+        :rtype: int
+        """
+        index = self.anchor_index.get(point)
+        if index is not None and index in self._tile_node:
+            return self._tile_node[index]
+        node = len(self.points)
+        self.points.append(point)
+        self.rooms.append(room)
+        self.links.append([])
+        if index is not None:
+            self._tile_node[index] = node
+        return node
+
+    def _link(self, a: int, b: int):
+        """Связывает два узла ребром длиной в расстояние между ними."""
+        if a == b or any(other == b for other, _ in self.links[a]):
+            return
+        cost = math.dist(self.points[a], self.points[b])
+        self.links[a].append((b, cost))
+        self.links[b].append((a, cost))
+
+    def _link_path(self, start: int, goal: int):
+        """Связывает узлы цепочкой отрезков вдоль пути по сетке.
+
+        Из текущей точки берётся самая дальняя точка пути, видимая по прямой;
+        промежуточные точки становятся узлами.
+
+        :return: False, если пути нет
+        :rtype: bool
+        """
+        nav = self.nav
+        start_tile = nav.nearest(*self.points[start])
+        goal_tile = nav.nearest(*self.points[goal])
+        if start_tile is None or goal_tile is None:
+            return False
+        path = nav.path(start_tile, goal_tile)
+        if path is None:
+            return False
+        room = self.rooms[start]
+        current = start
+        remaining = list(path)
+        if remaining[-1] != self.points[goal]:
+            remaining.append(self.points[goal])
+        while remaining:
+            for i in range(len(remaining) - 1, -1, -1):
+                if nav.sweep_clear(self.points[current], remaining[i]):
+                    break
+            else:
+                return False
+            node = goal if i == len(remaining) - 1 else self._add_node(remaining[i], room)
+            self._link(current, node)
+            current = node
+            remaining = remaining[i + 1:]
+        return True
+
+    def _build_rooms(self):
+        """Ставит по точке в каждый квадрат пола комнат и связывает соседние квадраты."""
+        nav = self.nav
+        width = self.level.width
+        cells = {}
+        for index, anchor in enumerate(nav.anchors):
+            room = self.portals.tile_room[index]
+            if anchor is None or room is None:
+                continue
+            key = (room, index % width // CELL_TILES, index // width // CELL_TILES)
+            cells.setdefault(key, []).append(anchor)
+
+        cell_nodes = {}
+        for key, anchors in sorted(cells.items()):
+            mean_x = sum(x for x, _ in anchors) / len(anchors)
+            mean_y = sum(y for _, y in anchors) / len(anchors)
+            # Точка квадрата — опорная точка, ближайшая к середине его проходимой части
+            point = min(anchors, key=lambda anchor: (anchor[0] - mean_x) ** 2 + (anchor[1] - mean_y) ** 2)
+            cell_nodes[key] = self._add_node(point, key[0])
+
+        for (room, cx, cy), node in sorted(cell_nodes.items()):
+            for dx, dy in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                other = cell_nodes.get((room, cx + dx, cy + dy))
+                if other is None:
+                    continue
+                a, b = self.points[node], self.points[other]
+                tile_a, tile_b = nav.nearest(*a), nav.nearest(*b)
+                path = nav.path(tile_a, tile_b) if tile_a is not None and tile_b is not None else None
+                if path is None:
+                    continue
+                length = sum(math.dist(path[i], path[i + 1]) for i in range(len(path) - 1))
+                # Квадраты рядом, но разделены стеной — такой обход не нужен
+                if length <= DETOUR_LIMIT * math.dist(a, b):
+                    self._link_path(node, other)
+        self.room_nodes = {}
+        for node, room in enumerate(self.rooms):
+            self.room_nodes.setdefault(room, []).append(node)
+
+    def _build_doors(self, body_size: tuple):
+        """Добавляет переходы через дверные проёмы между точками по обе стороны.
+
+        :param body_size: размеры хитбокса патрульного
+        :type body_size: tuple[float, float]
+        """
+        for doorway in self.portals.doorways:
+            if None in doorway.rooms:
+                continue
+            landings = [doorway.landing(side, body_size) for side in (0, 1)]
+            if not all(self.nav.fits(*point) for point in landings):
+                continue
+            sides = []
+            for point, room in zip(landings, doorway.rooms):
+                candidates = self.room_nodes.get(room, [])
+                if not candidates:
+                    break
+                node = self._add_node(point, room)
+                # Ближайшая по прямой точка комнаты может оказаться за стеной — берём первую достижимую
+                nearby = sorted(candidates, key=lambda other: math.dist(self.points[other], point))
+                if not any(self._link_path(node, other) for other in nearby[:4]):
+                    break
+                sides.append(node)
+            else:
+                # Прямой отрезок через проём: касание двери переносит патрульного ровно во вторую точку
+                self._link(*sides)
+
+    def _build_routes(self):
+        """Считает алгоритмом Дейкстры следующий узел на кратчайшем маршруте между любыми двумя узлами."""
+        count = len(self.points)
+        self.next_node = []
+        for goal in range(count):
+            distance = [math.inf] * count
+            parent = [None] * count
+            distance[goal] = 0.0
+            frontier = [(0.0, goal)]
+            while frontier:
+                cost, node = heapq.heappop(frontier)
+                if cost > distance[node]:
+                    continue
+                for other, step in self.links[node]:
+                    if cost + step < distance[other]:
+                        distance[other] = cost + step
+                        # Поиск идёт от цели, поэтому родитель узла — следующий шаг к ней
+                        parent[other] = node
+                        heapq.heappush(frontier, (cost + step, other))
+            self.next_node.append(parent)
+
+        self.component = [None] * count
+        self.components = []
+        for start in range(count):
+            if self.component[start] is not None:
+                continue
+            members = [node for node in range(count)
+                       if node == start or self.next_node[start][node] is not None]
+            for node in members:
+                self.component[node] = len(self.components)
+            self.components.append(members)
+
+    def _build_join(self):
+        """Для каждой клетки карты находит точку, к которой идти, чтобы выйти на ближайший узел.
+
+        Поиск Дейкстры идёт сразу от всех узлов по сетке проходимости.
+        """
+        nav = self.nav
+        level = self.level
+        size = len(nav.anchors)
+        distance = [math.inf] * size
+        parent = [None] * size
+        owner = [None] * size
+        frontier = []
+        for node, point in enumerate(self.points):
+            index = nav.nearest(*point)
+            if index is not None and owner[index] is None:
+                distance[index] = 0.0
+                owner[index] = node
+                frontier.append((0.0, index))
+        heapq.heapify(frontier)
+        while frontier:
+            cost, index = heapq.heappop(frontier)
+            if cost > distance[index]:
+                continue
+            for neighbour, step in nav.edges[index]:
+                if cost + step < distance[neighbour]:
+                    distance[neighbour] = cost + step
+                    parent[neighbour] = index
+                    owner[neighbour] = owner[index]
+                    heapq.heappush(frontier, (cost + step, neighbour))
+
+        # Для клетки карты: узел, на который она выводит, и точка, к которой идти
+        self.join_node = [None] * size
+        self.join_point = [None] * size
+        for tile in range(size):
+            index = nav.nearest(*level.tile_center(tile % level.width, tile // level.width))
+            if index is None or owner[index] is None:
+                continue
+            if parent[index] is None:
+                self.join_node[tile] = owner[index]
+                self.join_point[tile] = self.points[owner[index]]
+            else:
+                self.join_point[tile] = nav.anchors[parent[index]]
+
+    def join(self, x: float, y: float):
+        """Куда идти из точки, чтобы выйти на граф маршрутов.
+
+        :return: точка, к которой идти, и узел, если точка — уже сам узел
+            (None, None — если из точки граф недостижим)
+        :rtype: tuple[tuple[float, float] | None, int | None]
+        """
+        tx, ty = self.level.tile_at(x, y)
+        if not (0 <= tx < self.level.width and 0 <= ty < self.level.height):
+            return None, None
+        tile = ty * self.level.width + tx
+        return self.join_point[tile], self.join_node[tile]
+
+    def step(self, node: int, goal: int):
+        """Следующий узел кратчайшего маршрута к цели.
+
+        :rtype: int | None
+        """
+        return self.next_node[goal][node]
@@ -0,0 +1,138 @@
+"""Модуль скриптовых стратегий игрока для симуляции без окна.
+
+Стратегия каждый шаг смотрит на состояние Simulation и нажимает или отпускает
+управляющие клавиши так же, как это делал бы живой игрок.
+"""
+
+
+import random
+from simulation import (Simulation, CONTROL_UP, CONTROL_DOWN, CONTROL_LEFT, CONTROL_RIGHT,
+                        CONTROL_HIDE, INTERACTION_DISTANCE)
+
+
+MOVES = (
+    (),
+    (CONTROL_UP,),
+    (CONTROL_DOWN,),
+    (CONTROL_LEFT,),
+    (CONTROL_RIGHT,),
+    (CONTROL_UP, CONTROL_LEFT),
+    (CONTROL_UP, CONTROL_RIGHT),
+    (CONTROL_DOWN, CONTROL_LEFT),
+    (CONTROL_DOWN, CONTROL_RIGHT),
+)
+
+
+class Policy:
+    """Базовая стратегия: хранит зажатые клавиши и генератор случайных чисел."""
+
+    def __init__(self, rng: random.Random):
+        """Создаёт стратегию.
+
+        :param rng: генератор случайных чисел стратегии
+        :type rng: random.Random
+        """
+        self.rng = rng
+        self.held = set()
+
+    def hold(self, sim: Simulation, controls):
+        """Оставляет зажатыми ровно указанные клавиши.
+
+        :param sim: симуляция ночи
+        :type sim: Simulation
+        :param controls: клавиши, которые должны быть зажаты
+        """
+        controls = set(controls)
+        for control in self.held - controls:
+            sim.key_release(control)
+        for control in controls - self.held:
+            sim.key_press(control)
+        self.held = controls
+
+    def act(self, sim: Simulation, dt: float):
+        """Принимает решение на текущем шаге.
+
+        :param sim: симуляция ночи
+        :type sim: Simulation
+        :param dt: время шага
+        :type dt: float
+        """
+
+
+class IdlePolicy(Policy):
+    """Игрок, который стоит на месте всю ночь."""
+
+
+class WanderPolicy(Policy):
+    """Игрок, который бродит, меняя направление каждые несколько секунд."""
+
+    def __init__(self, rng: random.Random):
+        """Создаёт стратегию с таймером смены направления.
+
+        :param rng: генератор случайных чисел стратегии
+        :type rng: random.Random
+        """
+        super().__init__(rng)
+        self.move_timer = 0.0
+
+    def act(self, sim: Simulation, dt: float):
+        """Раз в 1–4 секунды выбирает новое направление движения."""
+        self.move_timer -= dt
+        if self.move_timer <= 0:
+            self.move_timer = self.rng.uniform(1.0, 4.0)
+            self.hold(sim, self.rng.choice(MOVES))
+
+
+class EvasivePolicy(WanderPolicy):
+    """Игрок, который бродит и прячется в укрытие, когда за ним гонятся."""
+
+    def __init__(self, rng: random.Random, danger_distance: float = 450):
+        """Создаёт стратегию.
+
+        :param rng: генератор случайных чисел стратегии
+        :type rng: random.Random
+        :param danger_distance: расстояние до преследователя, при котором пора прятаться
+        :type danger_distance: float
+        """
+        super().__init__(rng)
+        self.danger_distance = danger_distance
+
+    def _in_danger(self, sim: Simulation):
+        """Проверяет, гонится ли кто-то за игроком поблизости.
+
+        :rtype: bool
+        """
+        for hunter, state in ((sim.bonnie, "chase"), (sim.foxy, "chasing")):
+            if hunter.state == state and hunter.distance_to(sim.player) < self.danger_distance:
+                return True
+        return sim.foxy.state == "stalking" and sim.foxy.step_index == 3
+
+    def _near_hiding_spot(self, sim: Simulation):
+        """Проверяет, есть ли рядом укрытие, тем же запросом к индексу карты, что и симуляция.
+
+        :rtype: bool
+        """
+        x, y = sim.player.position
+        return sim.collision.nearest(sim.hide_mask, x, y, INTERACTION_DISTANCE) is not None
+
+    def act(self, sim: Simulation, dt: float):
+        """Прячется при опасности рядом с укрытием, иначе бродит."""
+        hiding = CONTROL_HIDE in self.held
+        if hiding and not sim.stealth_mode:
+            # Время в укрытии вышло — отпускаем клавишу и уходим
+            self.hold(sim, ())
+            self.move_timer = 0.0
+        elif not hiding and self._in_danger(sim) and self._near_hiding_spot(sim):
+            self.hold(sim, (CONTROL_HIDE,))
+        elif hiding and not self._in_danger(sim):
+            self.hold(sim, ())
+            self.move_timer = 0.0
+        elif not hiding:
+            super().act(sim, dt)
+
+
+POLICIES = {
+    "idle": IdlePolicy,
+    "wander": WanderPolicy,
+    "evasive": EvasivePolicy,
+}
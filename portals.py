@@ -0,0 +1,237 @@
+"""Модуль дверей и комнат карты.
+
+При загрузке карты соседние клетки дверей собираются в дверные проёмы, для каждого
+проёма заранее считаются точки выхода по обе стороны и комнаты, которые он соединяет.
+Переход через дверь у игрока и у аниматроников становится поиском в таблице,
+а граф комнат и дверей доступен для ИИ и инструментов.
+"""
+
+
+from level import Level
+from spatial import SpatialIndex
+
+
+# Насколько дальше края двери появляется прошедшее через неё тело
+EXIT_GAP = 30
+
+
+class Doorway:
+    """Дверной проём из одной или нескольких клеток дверей в ряд.
+
+    Свойство orientation тайла задаёт ось перехода: у дверей с ним тело переносится
+    по вертикали, у остальных — по горизонтали.
+    """
+
+    def __init__(self, index: int, tiles: list, axis: str, level: Level):
+        """Считает геометрию проёма.
+
+        :param index: номер проёма
+        :type index: int
+        :param tiles: клетки проёма
+        :type tiles: list[tuple[int, int]]
+        :param axis: ось перехода, "x" или "y"
+        :type axis: str
+        :param level: карта уровня
+        :type level: Level
+        """
+        self.index = index
+        self.tiles = tiles
+        self.axis = axis
+        rects = [level.tile_rect(tx, ty) for tx, ty in tiles]
+        self.rect = (min(rect[0] for rect in rects), min(rect[1] for rect in rects),
+                     max(rect[2] for rect in rects), max(rect[3] for rect in rects))
+        left, bottom, right, top = rects[0]
+        # Все клетки проёма стоят поперёк оси перехода, поэтому координата на этой оси у них общая
+        self.center = (right + left) / 2 if axis == "x" else (bottom + top) / 2
+        self.half_thickness = (right - left if axis == "x" else top - bottom) // 2
+        middle_x = (self.rect[0] + self.rect[2]) / 2
+        middle_y = (self.rect[1] + self.rect[3]) / 2
+        self.middle = (middle_x, middle_y)
+        if axis == "x":
+            self.exits = ((self.center - self.half_thickness - EXIT_GAP, middle_y),
+                          (self.center + self.half_thickness + EXIT_GAP, middle_y))
+        else:
+            self.exits = ((middle_x, self.center - self.half_thickness - EXIT_GAP),
+                          (middle_x, self.center + self.half_thickness + EXIT_GAP))
+        self.rooms = (None, None)
+
+    def side(self, x: float, y: float):
+        """Сторона проёма, на которой находится точка.
+
+        :return: 0 — со стороны меньших координат, 1 — со стороны больших
+        :rtype: int
+        """
+        return int((x if self.axis == "x" else y) >= self.center)
+
+    def landing(self, side: int, size: tuple):
+        """Точка, куда проём переносит тело заданного размера, идущее по его середине.
+
+        :param side: 0 — сторона меньших координат, 1 — больших
+        :type side: int
+        :param size: ширина и высота хитбокса
+        :type size: tuple[float, float]
+        :rtype: tuple[float, float]
+        """
+        width, height = size
+        offset = self.half_thickness + (height if self.axis == "y" else width) // 2 + EXIT_GAP
+        position = self.center + offset if side else self.center - offset
+        return (self.middle[0], position) if self.axis == "y" else (position, self.middle[1])
+
+    def teleport(self, body):
+        """Переносит тело на противоположную сторону проёма.
+
+        :param body: тело с center_x, center_y, width и height
+        """
+        if self.axis == "y":
+            if body.center_y < self.center:
+                body.center_y = self.center + self.half_thickness + body.height // 2 + EXIT_GAP
+            else:
+                body.center_y = self.center - self.half_thickness - body.height // 2 - EXIT_GAP
+        else:
+            if body.center_x < self.center:
+                body.center_x = self.center + self.half_thickness + body.width // 2 + EXIT_GAP
+            else:
+                body.center_x = self.center - self.half_thickness - body.width // 2 - EXIT_GAP
+
+
+class PortalGraph:
+    """Таблица дверных проёмов и граф комнат, которые они соединяют.
+
+    Комната — связная по сторонам область клеток пола без стен и дверей.
+    """
+
+    def __init__(self, level: Level, index: SpatialIndex = None):
+        """Собирает проёмы и комнаты по слоям карты.
+
+        :param level: карта уровня
+        :type level: Level
+        :param index: общий пространственный индекс карты (по умолчанию строится свой)
+        :type index: SpatialIndex
+        """
+        self.level = level
+        self.index = index if index is not None else SpatialIndex(level)
+        self.door_mask = self.index.mask(("doors",))
+        self.floor_mask = self.index.mask(("textures",))
+        self.blocked_mask = self.index.mask(("walls", "doors"))
+        self.width = level.width
+        self.doorways = []
+        self.tile_doorway = {}
+        self._collect_doorways()
+
+        self.tile_room = [None] * (level.width * level.height)
+        self.room_count = 0
+        self._collect_rooms()
+
+        self.links = [[] for _ in range(self.room_count)]
+        for doorway in self.doorways:
+            doorway.rooms = (self._room_beside(doorway, -1), self._room_beside(doorway, 1))
+            low, high = doorway.rooms
+            if low is not None and high is not None and low != high:
+                self.links[low].append((doorway, high))
+                self.links[high].append((doorway, low))
+
+    def _collect_doorways(self):
+        """Объединяет соседние клетки дверей с одной осью перехода в проёмы."""
+        level = self.level
+        for tx, ty, _ in level.layer_tiles("doors"):
+            if (tx, ty) in self.tile_doorway:
+                continue
+            axis = self._axis(tx, ty)
+            # Проём тянется поперёк оси перехода: по горизонтали для "y", по вертикали для "x"
+            step = (1, 0) if axis == "y" else (0, 1)
+            tiles = [(tx, ty)]
+            nx, ny = tx + step[0], ty + step[1]
+            while level.gid("doors", nx, ny) and self._axis(nx, ny) == axis:
+                tiles.append((nx, ny))
+                nx, ny = nx + step[0], ny + step[1]
+            doorway = Doorway(len(self.doorways), tiles, axis, level)
+            self.doorways.append(doorway)
+            for tile in tiles:
+                self.tile_doorway[tile] = doorway
+
+    def _axis(self, tx: int, ty: int):
+        """Ось перехода для клетки двери.
+
+        :rtype: str
+        """
+        gid = self.level.gid("doors", tx, ty)
+        return "y" if self.level.tile_properties.get(gid, {}).get("orientation") is not None else "x"
+
+    def _is_floor(self, tx: int, ty: int):
+        """Проверяет, что клетка — пол комнаты.
+
+        :rtype: bool
+        """
+        x, y = self.level.tile_center(tx, ty)
+        return self.index.at(self.floor_mask, x, y) and not self.index.at(self.blocked_mask, x, y)
+
+    def _collect_rooms(self):
+        """Размечает комнаты заливкой пола."""
+        level = self.level
+        for ty in range(level.height):
+            for tx in range(level.width):
+                if self.tile_room[ty * self.width + tx] is not None or not self._is_floor(tx, ty):
+                    continue
+                room = self.room_count
+                self.room_count += 1
+                self.tile_room[ty * self.width + tx] = room
+                stack = [(tx, ty)]
+                while stack:
+                    x, y = stack.pop()
+                    for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                        if self._is_floor(nx, ny) and self.tile_room[ny * self.width + nx] is None:
+                            self.tile_room[ny * self.width + nx] = room
+                            stack.append((nx, ny))
+
+    def _room_beside(self, doorway: Doorway, direction: int):
+        """Комната сразу за проёмом с одной из сторон.
+
+        :param doorway: проём
+        :type doorway: Doorway
+        :param direction: -1 — сторона меньших координат, 1 — больших
+        :type direction: int
+        :rtype: int | None
+        """
+        for tx, ty in doorway.tiles:
+            nx, ny = (tx + direction, ty) if doorway.axis == "x" else (tx, ty + direction)
+            if self._is_floor(nx, ny):
+                return self.tile_room[ny * self.width + nx]
+        return None
+
+    def room_at(self, x: float, y: float):
+        """Комната, в которой находится точка мира.
+
+        :rtype: int | None
+        """
+        tx, ty = self.level.tile_at(x, y)
+        if 0 <= tx < self.level.width and 0 <= ty < self.level.height:
+            return self.tile_room[ty * self.width + tx]
+        return None
+
+    def touching(self, left: float, bottom: float, right: float, top: float):
+        """Проём, клетку которого пересекает прямоугольник.
+
+        :return: первый такой проём или None
+        :rtype: Doorway | None
+        """
+        tile = self.index.first(self.door_mask, left, bottom, right, top)
+        return self.tile_doorway[tile] if tile is not None else None
+
+    def within(self, x: float, y: float, distance: float):
+        """Проём, центр клетки которого ближе всех к точке и не дальше заданного расстояния.
+
+        :return: проём или None
+        :rtype: Doorway | None
+        """
+        tile = self.index.nearest(self.door_mask, x, y, distance)
+        return self.tile_doorway[tile] if tile is not None else None
+
+    def neighbours(self, room: int):
+        """Комнаты, в которые можно попасть из комнаты через одну дверь.
+
+        :param room: номер комнаты
+        :type room: int
+        :return: список пар (проём, соседняя комната)
+        :rtype: list[tuple[Doorway, int]]
+        """
+        return self.links[room]
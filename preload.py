@@ -0,0 +1,151 @@
+"""Модуль фоновой подготовки игры.
+
+Пока открыто главное меню, рабочий поток по очереди выполняет задания, которым
+не нужен OpenGL: декодирует картинки и звуки, собирает карту и симуляцию.
+Готовые результаты забирает главный поток небольшими порциями в каждом кадре —
+выгружает текстуры в атлас видеокарты и собирает сеансы игры, — поэтому меню
+не подвисает, а к нажатию «Играть» всё уже загружено. Во время ночи подготовка
+приостанавливается, чтобы не отнимать время у кадров игры.
+"""
+
+
+import queue
+import threading
+import time
+from collections import deque
+
+
+class Preloader:
+    """Очередь заданий: работа в фоновом потоке, завершение — в главном."""
+
+    def __init__(self):
+        """Создаёт пустую очередь; поток запускается методом start."""
+        self.jobs = deque()
+        self.lock = threading.Lock()
+        self.results = queue.SimpleQueue()
+        self.waiting = set()
+        self.total = 0
+        self.finished = 0
+        self.failed = []
+        self.thread = None
+        # Поток берёт новые задания, только пока подготовка не приостановлена
+        self.running = threading.Event()
+        self.running.set()
+        self.until = None
+
+    def add(self, name: str, work, finish=None):
+        """Ставит задание в конец очереди.
+
+        :param name: уникальное имя задания
+        :type name: str
+        :param work: функция без аргументов, выполняется в фоновом потоке и не трогает OpenGL
+        :type work: callable
+        :param finish: функция от результата работы, выполняется в главном потоке
+        :type finish: callable | None
+        """
+        with self.lock:
+            self.jobs.append((name, work, finish))
+            self.waiting.add(name)
+            self.total += 1
+
+    def start(self):
+        """Запускает фоновый поток, если он ещё не запущен."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="preload", daemon=True)
+            self.thread.start()
+
+    def defer(self, name: str):
+        """Переносит ещё не начатое задание в конец очереди.
+
+        :param name: имя задания
+        :type name: str
+        """
+        with self.lock:
+            for job in self.jobs:
+                if job[0] == name:
+                    self.jobs.remove(job)
+                    self.jobs.append(job)
+                    return
+
+    def pause(self):
+        """Приостанавливает подготовку: начатое задание доделывается, новые не берутся."""
+        self.running.clear()
+
+    def resume(self):
+        """Продолжает подготовку всех оставшихся заданий."""
+        self.until = None
+        self.running.set()
+
+    def run_until(self, name: str):
+        """Приостанавливает подготовку, как только будет выполнено задание.
+
+        :param name: имя задания
+        :type name: str
+        """
+        self.until = name
+
+    def _run(self):
+        """Выполняет задания по очереди и передаёт результаты главному потоку."""
+        while True:
+            self.running.wait()
+            with self.lock:
+                if not self.jobs:
+                    return
+                name, work, finish = self.jobs.popleft()
+            try:
+                self.results.put((name, work(), finish, None))
+            except Exception as error:
+                self.results.put((name, None, finish, error))
+            if name == self.until:
+                self.pause()
+
+    def pump(self, budget: float):
+        """Завершает готовые задания в главном потоке, пока не исчерпан бюджет времени.
+
+        Задание, которое не удалось выполнить в фоне или завершить в главном потоке,
+        просто считается завершённым: тот же ресурс потом загрузится синхронно
+        при первом обращении и покажет ошибку там.
+
+        :param budget: бюджет кадра в секундах
+        :type budget: float
+        """
+        deadline = time.perf_counter() + budget
+        while self.waiting and time.perf_counter() < deadline:
+            try:
+                name, result, finish, error = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if error is None and finish is not None:
+                try:
+                    finish(result)
+                except Exception as finish_error:
+                    error = finish_error
+            if error is not None:
+                self.failed.append((name, error))
+            self.waiting.discard(name)
+            self.finished += 1
+
+    def ready(self, name: str):
+        """Завершено ли задание; задание, которого нет в очереди, ждать не нужно.
+
+        :param name: имя задания
+        :type name: str
+        :rtype: bool
+        """
+        return name not in self.waiting
+
+    @property
+    def busy(self):
+        """Остались ли незавершённые задания.
+
+        :rtype: bool
+        """
+        return bool(self.waiting)
+
+    @property
+    def progress(self):
+        """Доля завершённых заданий от 0 до 1.
+
+        :rtype: float
+        """
+        return self.finished / self.total if self.total else 1.0
@@ -0,0 +1,220 @@
+"""Запись ввода игрока и воспроизведение ночей.
+
+Ввод хранится компактным двоичным потоком событий (шаг, клавиша, нажата/отпущена)
+рядом с результатом в базе данных. Ночь воспроизводится без окна быстрее реального
+времени или в окне с обычной скоростью для визуальной проверки.
+
+Пример::
+
+    python replay.py --list
+    python replay.py 12
+    python replay.py 12 --render
+"""
+
+
+import argparse
+import time
+from simulation import Simulation
+
+
+MAGIC = b"FNR"
+VERSION = 1
+
+
+def _write_varint(out: bytearray, value: int):
+    """Дописывает неотрицательное число в формате LEB128.
+
+    :param out: буфер записи
+    :type out: bytearray
+    :param value: число
+    :type value: int
+    """
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varint(data: bytes, pos: int):
+    """Читает число в формате LEB128.
+
+    :param data: двоичные данные
+    :type data: bytes
+    :param pos: позиция начала числа
+    :type pos: int
+    :return: число и позиция после него
+    :rtype: tuple[int, int]
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+class InputRecorder:
+    """Копит события ввода одной ночи."""
+
+    def __init__(self):
+        """Создаёт пустую запись."""
+        self.events = []
+
+    def record(self, tick: int, control: int, pressed: bool):
+        """Добавляет событие.
+
+        :param tick: номер шага симуляции, перед которым произошло событие
+        :type tick: int
+        :param control: одна из констант CONTROL_*
+        :type control: int
+        :param pressed: True — нажатие, False — отпускание
+        :type pressed: bool
+        """
+        self.events.append((tick, control, pressed))
+
+    def to_bytes(self, seed: int, end_tick: int):
+        """Упаковывает запись: заголовок, сид, длина ночи и события с разностями шагов.
+
+        Типичное событие занимает два байта.
+
+        :param seed: сид ночи
+        :type seed: int
+        :param end_tick: число шагов, прошедших к концу ночи
+        :type end_tick: int
+        :rtype: bytes
+        """
+        out = bytearray(MAGIC)
+        out.append(VERSION)
+        _write_varint(out, seed)
+        _write_varint(out, end_tick)
+        last_tick = 0
+        for tick, control, pressed in self.events:
+            _write_varint(out, tick - last_tick)
+            out.append(control << 1 | int(pressed))
+            last_tick = tick
+        return bytes(out)
+
+
+def decode(data: bytes):
+    """Распаковывает запись ввода.
+
+    :param data: результат InputRecorder.to_bytes
+    :type data: bytes
+    :return: сид, длина ночи в шагах и список событий (шаг, клавиша, нажата)
+    :rtype: tuple[int, int, list[tuple[int, int, bool]]]
+    """
+    if data[:len(MAGIC)] != MAGIC or data[len(MAGIC)] != VERSION:
+        raise ValueError("Неподдерживаемый формат записи ввода")
+    pos = len(MAGIC) + 1
+    seed, pos = _read_varint(data, pos)
+    end_tick, pos = _read_varint(data, pos)
+    events = []
+    tick = 0
+    while pos < len(data):
+        delta, pos = _read_varint(data, pos)
+        tick += delta
+        code = data[pos]
+        pos += 1
+        events.append((tick, code >> 1, bool(code & 1)))
+    return seed, end_tick, events
+
+
+class InputPlayback:
+    """Подаёт записанные события в симуляцию в те же шаги, что и при игре."""
+
+    def __init__(self, events: list):
+        """Создаёт воспроизведение.
+
+        :param events: события (шаг, клавиша, нажата), упорядоченные по шагам
+        :type events: list[tuple[int, int, bool]]
+        """
+        self.events = events
+        self.index = 0
+
+    def apply(self, sim: Simulation):
+        """Применяет события, которые должны произойти перед очередным шагом.
+
+        :param sim: симуляция ночи
+        :type sim: Simulation
+        """
+        events = self.events
+        while self.index < len(events) and events[self.index][0] <= sim.tick:
+            _, control, pressed = events[self.index]
+            if pressed:
+                sim.key_press(control)
+            else:
+                sim.key_release(control)
+            self.index += 1
+
+
+def replay_headless(data: bytes, sim: Simulation = None):
+    """Воспроизводит ночь без окна так быстро, как позволяет процессор.
+
+    :param data: запись ввода
+    :type data: bytes
+    :param sim: симуляция для повторного использования (по умолчанию создаётся новая)
+    :type sim: Simulation
+    :return: симуляция в конечном состоянии
+    :rtype: Simulation
+    """
+    seed, end_tick, events = decode(data)
+    if sim is None:
+        sim = Simulation(seed=seed)
+    else:
+        sim.reset(seed)
+    playback = InputPlayback(events)
+    while not sim.game_over and sim.tick < end_tick:
+        playback.apply(sim)
+        sim.step()
+    return sim
+
+
+def main():
+    """Точка входа командной строки."""
+    from database import init_db, get_replay, get_replays
+
+    parser = argparse.ArgumentParser(description="Воспроизведение записанных ночей")
+    parser.add_argument("result_id", type=int, nargs="?", help="номер результата в базе")
+    parser.add_argument("--list", action="store_true", help="показать результаты с записью ввода")
+    parser.add_argument("--render", action="store_true", help="показать ночь в окне с обычной скоростью")
+    args = parser.parse_args()
+
+    init_db()
+    if args.list or args.result_id is None:
+        for result_id, date, total_time, seed in get_replays():
+            print(f"{result_id:5d}  {date}  {total_time:8.1f} с  сид {seed}")
+        return
+
+    record = get_replay(args.result_id)
+    if record is None:
+        parser.error(f"нет записи ввода для результата {args.result_id}")
+    saved_time, data = record
+
+    if args.render:
+        from arcade import run
+        from views import Game
+        from window import MainWindow
+
+        window = MainWindow(1550, 850, "Five Nights at Freddy's — повтор")
+        window.show_view(Game(replay=data))
+        run()
+        return
+
+    started = time.perf_counter()
+    sim = replay_headless(data)
+    elapsed = time.perf_counter() - started
+    print(f"Шагов: {sim.tick}, время ночи: {sim.total_play_time:.2f} с, причина: {sim.death_cause or '—'}")
+    print(f"Воспроизведено за {elapsed:.2f} с ({sim.total_play_time / elapsed:.0f}× быстрее реального времени)")
+    if abs(sim.total_play_time - saved_time) > 1e-6:
+        print(f"Расхождение с сохранённым результатом: {saved_time:.2f} с")
+
+
+if __name__ == "__main__":
+    main()
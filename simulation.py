@@ -0,0 +1,967 @@
+"""Модуль игровой симуляции без окна.
+
+Содержит всю логику ночи: игрока, Бонни, Чику с кексом, Фокси и Фредди,
+таймеры активации и проверки смерти. Не зависит от arcade, поэтому ночь можно
+прогонять без окна и OpenGL во много раз быстрее реального времени.
+"""
+
+
+import math
+import random
+from array import array
+from collision import CollisionGrid
+from level import Level
+from navigation import NavGrid, FlowField, LineOfSight
+from patrol import PatrolRoutes
+from portals import PortalGraph
+
+
+# Управляющие команды игрока (не зависят от раскладки и библиотеки окна)
+CONTROL_UP = 0
+CONTROL_DOWN = 1
+CONTROL_LEFT = 2
+CONTROL_RIGHT = 3
+CONTROL_HIDE = 4
+CONTROL_DOOR = 5
+
+# Размеры хитбоксов: размер текстуры × масштаб спрайта 1.3
+PLAYER_SIZE = (55.9, 123.5)
+BONNIE_SIZE = (88.4, 169.0)
+CHIKA_SIZE = (88.4, 153.4)
+FOXY_SIZE = (88.4, 153.4)
+FREDDY_SIZE = (88.4, 149.5)
+CUPCAKE_SIZE = (72.0, 72.0)
+
+PLAYER_START = (2100, 1900)
+BONNIE_START = (1600, 2255)
+CHIKA_START = (2100, 2245)
+FOXY_START = (3350, 2200)
+FREDDY_START = (1850, 2245)
+
+INTERACTION_DISTANCE = 110
+# Сколько точек появления кекса приходится на сторону клетки карты
+SPAWN_STEPS = 2
+# Расстояние, на котором охотник считает точку пути достигнутой
+WAYPOINT_RADIUS = 8
+
+# Скорости заданы в пикселях за кадр при 60 FPS и пересчитываются по длительности шага
+FRAME_RATE = 60
+# Фиксированный шаг логики: при любой частоте кадров ночь проходит одинаково
+STEP = 1 / 120
+
+# Настраиваемые параметры сложности ночи
+DEFAULT_PARAMS = {
+    "bonnie_activation_interval": 10.0,
+    "bonnie_activation_chance": 0.8,
+    "chika_activation_interval": 15.0,
+    "chika_activation_chance": 0.7,
+    "cupcake_interval": 15.0,
+    "foxy_activation_interval": 20.0,
+    "foxy_activation_chance": 0.6,
+    "foxy_step_interval": 25.0,
+    "foxy_step_chance": 0.8,
+    "freddy_activation_interval": 20.0,
+    "freddy_activation_chance": 0.7,
+    "time_in_zone_threshold": 20.0,
+    "shake_duration": 5.0,
+    "max_stealth_time": 7.0,
+}
+
+
+def new_seed():
+    """Выбирает сид для новой ночи.
+
+    :rtype: int
+    """
+    return random.SystemRandom().randrange(1 << 32)
+
+
+def derive_rng(seed: int, stream: str):
+    """Создаёт независимый генератор подсистемы из общего сида запуска.
+
+    Потоки разных подсистем не влияют друг на друга, поэтому лишний бросок
+    в одной из них не сдвигает случайность в остальных.
+
+    :param seed: сид запуска
+    :type seed: int
+    :param stream: имя подсистемы ("bonnie", "foxy", "cupcake", ...)
+    :type stream: str
+    :rtype: random.Random
+    """
+    return random.Random(f"{seed}:{stream}")
+
+
+class Body:
+    """Прямоугольное тело: центр, скорость (пикселей за кадр 60 FPS) и размеры хитбокса."""
+
+    def __init__(self, size: tuple, position: tuple = (0.0, 0.0)):
+        """Создаёт тело заданного размера.
+
+        :param size: ширина и высота хитбокса
+        :type size: tuple[float, float]
+        :param position: начальная позиция центра
+        :type position: tuple[float, float]
+        """
+        self.width, self.height = size
+        self.center_x, self.center_y = position
+        self.change_x = 0.0
+        self.change_y = 0.0
+
+    @property
+    def position(self):
+        """Позиция центра тела."""
+        return self.center_x, self.center_y
+
+    @position.setter
+    def position(self, value):
+        self.center_x, self.center_y = value
+
+    @property
+    def left(self):
+        """Левая граница хитбокса."""
+        return self.center_x - self.width / 2
+
+    @property
+    def right(self):
+        """Правая граница хитбокса."""
+        return self.center_x + self.width / 2
+
+    @property
+    def bottom(self):
+        """Нижняя граница хитбокса."""
+        return self.center_y - self.height / 2
+
+    @property
+    def top(self):
+        """Верхняя граница хитбокса."""
+        return self.center_y + self.height / 2
+
+    def overlaps(self, other: "Body"):
+        """Проверяет пересечение хитбоксов двух тел.
+
+        :param other: другое тело
+        :type other: Body
+        :rtype: bool
+        """
+        return (abs(self.center_x - other.center_x) * 2 < self.width + other.width
+                and abs(self.center_y - other.center_y) * 2 < self.height + other.height)
+
+    def distance_to(self, other: "Body"):
+        """Расстояние между центрами тел.
+
+        :param other: другое тело
+        :type other: Body
+        :rtype: float
+        """
+        return math.hypot(self.center_x - other.center_x, self.center_y - other.center_y)
+
+    def stop(self):
+        """Обнуляет скорость тела."""
+        self.change_x = 0.0
+        self.change_y = 0.0
+
+
+class PhysicsEngine:
+    """Аналог arcade.PhysicsEngineSimple для тел симуляции.
+
+    Препятствиями служат занятые клетки сетки столкновений и дополнительные тела.
+    Движение по каждой оси проверяется только по клеткам на пути переднего края тела.
+    """
+
+    def __init__(self, body: Body, grid: CollisionGrid, layers: tuple, bodies: tuple = ()):
+        """Связывает тело с препятствиями.
+
+        :param body: движущееся тело
+        :type body: Body
+        :param grid: сетка столкновений карты
+        :type grid: CollisionGrid
+        :param layers: имена слоёв-препятствий
+        :type layers: tuple[str, ...]
+        :param bodies: тела-препятствия
+        :type bodies: tuple[Body, ...]
+        """
+        self.body = body
+        self.grid = grid
+        self.mask = grid.mask(layers)
+        self.bodies = bodies
+
+    def _blocked(self):
+        """Проверяет, пересекает ли тело препятствие.
+
+        :rtype: bool
+        """
+        body = self.body
+        if self.grid.overlaps(self.mask, body.left, body.bottom, body.right, body.top):
+            return True
+        return any(body.overlaps(other) for other in self.bodies)
+
+    def _wiggle_until_free(self):
+        """Выталкивает тело из препятствия, перебирая сдвиги по восьми направлениям."""
+        body = self.body
+        origin_x, origin_y = body.position
+        distance = 1
+        while distance < self.grid.level.world_width:
+            for dx, dy in ((0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (-1, -1), (1, -1), (-1, 1)):
+                body.position = (origin_x + dx * distance, origin_y + dy * distance)
+                if not self._blocked():
+                    return
+            distance *= 2
+        body.position = (origin_x, origin_y)
+
+    def _sweep_y(self, dy: float):
+        """Край препятствия, в который тело упрётся при сдвиге по Y.
+
+        :rtype: float | None
+        """
+        body = self.body
+        left, bottom, right, top = body.left, body.bottom, body.right, body.top
+        edge = self.grid.sweep_y(self.mask, left, bottom, right, top, dy)
+        for other in self.bodies:
+            if other.left >= right or other.right <= left:
+                continue
+            if dy > 0 and top <= other.bottom < top + dy and (edge is None or other.bottom < edge):
+                edge = other.bottom
+            elif dy < 0 and bottom + dy < other.top <= bottom and (edge is None or other.top > edge):
+                edge = other.top
+        return edge
+
+    def _sweep_x(self, dx: float):
+        """Край препятствия, в который тело упрётся при сдвиге по X.
+
+        :rtype: float | None
+        """
+        body = self.body
+        left, bottom, right, top = body.left, body.bottom, body.right, body.top
+        edge = self.grid.sweep_x(self.mask, left, bottom, right, top, dx)
+        for other in self.bodies:
+            if other.bottom >= top or other.top <= bottom:
+                continue
+            if dx > 0 and right <= other.left < right + dx and (edge is None or other.left < edge):
+                edge = other.left
+            elif dx < 0 and left + dx < other.right <= left and (edge is None or other.right > edge):
+                edge = other.right
+        return edge
+
+    def update(self, dt: float):
+        """Сдвигает тело сначала по Y, затем по X, упираясь в препятствия.
+
+        :param dt: время шага
+        :type dt: float
+        """
+        body = self.body
+        frames = dt * FRAME_RATE
+        if self._blocked():
+            self._wiggle_until_free()
+
+        if body.change_y:
+            # Свободное движение по Y округляется, как в arcade; упор ставит тело ровно к краю
+            target = round(body.center_y + body.change_y * frames, 2)
+            edge = self._sweep_y(target - body.center_y)
+            if edge is None:
+                body.center_y = target
+            else:
+                if body.change_y > 0:
+                    body.center_y = edge - body.height / 2
+                else:
+                    body.center_y = edge + body.height / 2
+                body.change_y = 0.0
+
+        if body.change_x:
+            edge = self._sweep_x(body.change_x * frames)
+            if edge is None:
+                body.center_x += body.change_x * frames
+            elif body.change_x > 0:
+                body.center_x = edge - body.width / 2
+            else:
+                body.center_x = edge + body.width / 2
+
+
+class GuardBody(Body):
+    """Ночной сторож в симуляции."""
+
+    def __init__(self):
+        """Создаёт тело сторожа в стартовой точке."""
+        super().__init__(PLAYER_SIZE, PLAYER_START)
+        self.speed = 5
+
+
+class Hunter(Body):
+    """Общая логика преследующих аниматроников: двери и обход застреваний."""
+
+    def __init__(self, size: tuple, position: tuple, rng: random.Random):
+        """Создаёт тело охотника.
+
+        :param size: размеры хитбокса
+        :type size: tuple[float, float]
+        :param position: стартовая позиция
+        :type position: tuple[float, float]
+        :param rng: собственный генератор случайных чисел аниматроника
+        :type rng: random.Random
+        """
+        super().__init__(size, position)
+        self.rng = rng
+        self.state = "inactive"
+        self.speed = 0
+        self.waypoint = None
+        self.flow_goal = None
+        self.last_dist_to_target = None
+        self.stuck_path_timer = 0
+        self.stuck_path_threshold = 0.5
+        self.sidestep_timer = 0
+        self.sidestep_duration = 0.3
+        self.teleport_cooldown = 0
+        self.route_node = None
+        self.route_goal = None
+
+    def check_doors(self, portals: PortalGraph, dt: float):
+        """Проверяет столкновение с дверью и при необходимости телепортирует.
+
+        :param portals: таблица дверных проёмов карты
+        :type portals: PortalGraph
+        :param dt: время шага
+        :type dt: float
+        """
+        if self.teleport_cooldown > 0:
+            self.teleport_cooldown -= dt
+        if self.teleport_cooldown <= 0:
+            doorway = portals.touching(self.left, self.bottom, self.right, self.top)
+            if doorway is not None:
+                doorway.teleport(self)
+                self.teleport_cooldown = 0.5
+                self.waypoint = None
+                # Патрульный маршрут продолжается от узла, ближайшего к новой позиции;
+                # прежняя цель может остаться в другой, не связанной с этой, части графа
+                self.route_node = None
+                self.route_goal = None
+
+    def _chase_target(self, player: Body, flow: FlowField = None):
+        """Выбирает точку, к которой надо идти, чтобы догнать игрока.
+
+        С полем расстояний это следующая точка спрямлённого пути к игроку в обход стен,
+        без него или при прямой видимости — сам игрок.
+
+        :param player: тело игрока
+        :type player: Body
+        :param flow: поле расстояний до игрока
+        :type flow: FlowField
+        :rtype: tuple[float, float]
+        """
+        if flow is None:
+            return player.position
+        # Поле общее для всех охотников и перестраивается, только когда игрок зашёл в другую клетку
+        flow.set_target(player.center_x, player.center_y)
+        waypoint = self.waypoint
+        # Точку пути держим до её достижения, иначе на границе клеток охотник мечется между двумя точками
+        if (waypoint is None or flow.goal != self.flow_goal
+                or math.hypot(waypoint[0] - self.center_x, waypoint[1] - self.center_y) <= WAYPOINT_RADIUS):
+            self.flow_goal = flow.goal
+            waypoint = flow.next_waypoint(self.position, player.position)
+        if waypoint != self.waypoint:
+            # Новая точка пути: прогресс считается заново
+            self.waypoint = waypoint
+            self.last_dist_to_target = None
+            self.stuck_path_timer = 0
+        return player.position if waypoint is None else waypoint
+
+    def _steer(self, target: tuple):
+        """Направляет движение прямо к точке.
+
+        :param target: мировые координаты точки
+        :type target: tuple[float, float]
+        """
+        dx = target[0] - self.center_x
+        dy = target[1] - self.center_y
+        dist = math.hypot(dx, dy)
+        if dist > 0:
+            self.change_x = (dx / dist) * self.speed
+            self.change_y = (dy / dist) * self.speed
+
+    def _chase_update(self, player: Body, flow: FlowField = None):
+        """Направляет движение к игроку по пути в обход стен.
+
+        :param player: тело игрока
+        :type player: Body
+        :param flow: поле расстояний до игрока
+        :type flow: FlowField
+        """
+        self._steer(self._chase_target(player, flow))
+
+    def _pursue(self, dt: float, player: Body, flow: FlowField = None):
+        """Погоня по пути с обходом препятствия боковым шагом, если точка пути не приближается.
+
+        :param dt: время шага
+        :type dt: float
+        :param player: тело игрока
+        :type player: Body
+        :param flow: поле расстояний до игрока
+        :type flow: FlowField
+        """
+        target = self._chase_target(player, flow)
+        if self.sidestep_timer > 0:
+            # Боковой шаг держится какое-то время, иначе препятствие не обойти
+            self.sidestep_timer -= dt
+            return
+        self._steer(target)
+
+        dx = target[0] - self.center_x
+        dy = target[1] - self.center_y
+        current_dist = math.hypot(dx, dy)
+        if self.last_dist_to_target is not None:
+            if current_dist >= self.last_dist_to_target - 5 * dt * FRAME_RATE:
+                self.stuck_path_timer += dt
+            else:
+                self.stuck_path_timer = 0
+        self.last_dist_to_target = current_dist
+
+        if self.stuck_path_timer > self.stuck_path_threshold:
+            if current_dist > 0:
+                if self.rng.random() < 0.5:
+                    self.change_x = -dy / current_dist * self.speed
+                    self.change_y = dx / current_dist * self.speed
+                else:
+                    self.change_x = dy / current_dist * self.speed
+                    self.change_y = -dx / current_dist * self.speed
+            else:
+                angle = self.rng.uniform(0, 2 * math.pi)
+                self.change_x = math.cos(angle) * self.speed
+                self.change_y = math.sin(angle) * self.speed
+            self.stuck_path_timer = 0
+            self.last_dist_to_target = None
+            self.sidestep_timer = self.sidestep_duration
+            self.waypoint = None
+
+
+class BonnieBody(Hunter):
+    """Бонни: обходит комнаты по маршрутам патруля и бросается в погоню, увидев игрока."""
+
+    def __init__(self, rng: random.Random):
+        """Задаёт скорости и таймеры патруля.
+
+        :param rng: собственный генератор случайных чисел Бонни
+        :type rng: random.Random
+        """
+        super().__init__(BONNIE_SIZE, BONNIE_START, rng)
+        self.speed = 4
+        self.patrol_speed = 4
+        self.chase_speed = 6
+        self.detection_distance = 400
+        self.stuck_timer = 0
+        self.stuck_threshold = 0.5
+        self.last_pos = self.position
+        self.patrol_timer = 0
+        self.direction_change_interval = self.rng.uniform(2.0, 5.0)
+
+    def update(self, dt: float, player: Body, stealth_mode: bool, flow: FlowField = None,
+               sight: LineOfSight = None, routes: PatrolRoutes = None):
+        """Обновляет логику движения в зависимости от состояния.
+
+        :param dt: время шага
+        :type dt: float
+        :param player: тело игрока
+        :type player: Body
+        :param stealth_mode: режим невидимости игрока
+        :type stealth_mode: bool
+        :param flow: поле расстояний до игрока
+        :type flow: FlowField
+        :param sight: проверка прямой видимости (без неё Бонни видит сквозь стены)
+        :type sight: LineOfSight
+        :param routes: маршруты патруля (без них Бонни блуждает случайно)
+        :type routes: PatrolRoutes
+        """
+        if self.state == "chase" and stealth_mode:
+            self.state = "patrol"
+            self.speed = self.patrol_speed
+            self.patrol_timer = 0
+            self.route_node = None
+            self.route_goal = None
+            self.sidestep_timer = 0
+
+        if self.state == "inactive":
+            self.stop()
+            return
+
+        if self.state != "chase":
+            if (self.distance_to(player) < self.detection_distance and not stealth_mode
+                    and (sight is None or sight.visible(self.position, player.position))):
+                self.state = "chase"
+                self.speed = self.chase_speed
+
+        if self.state == "patrol":
+            if self.sidestep_timer > 0:
+                self.sidestep_timer -= dt
+            elif routes is None or not self._route_update(routes):
+                self._patrol_update(dt)
+            if self.change_x != 0 or self.change_y != 0:
+                min_shift = dt * FRAME_RATE
+                if (abs(self.center_x - self.last_pos[0]) < min_shift
+                        and abs(self.center_y - self.last_pos[1]) < min_shift):
+                    self.stuck_timer += dt
+                else:
+                    self.stuck_timer = 0
+                self.last_pos = self.position
+
+                if self.stuck_timer > self.stuck_threshold:
+                    angle = self.rng.uniform(0, 2 * math.pi)
+                    self.change_x = math.cos(angle) * self.speed
+                    self.change_y = math.sin(angle) * self.speed
+                    self.stuck_timer = 0
+                    if routes is not None:
+                        # Путь перегородило тело — отходим в сторону и заново выходим на маршрут
+                        self.sidestep_timer = self.sidestep_duration
+                        self.route_node = None
+                        self.route_goal = None
+        elif self.state == "chase":
+            self._pursue(dt, player, flow)
+
+    def _route_update(self, routes: PatrolRoutes):
+        """Ведёт Бонни от узла к узлу маршрута патруля к случайно выбранной цели.
+
+        :param routes: маршруты патруля
+        :type routes: PatrolRoutes
+        :return: False, если отсюда на маршрут не выйти
+        :rtype: bool
+        """
+        if self.route_node is None:
+            point, node = routes.join(self.center_x, self.center_y)
+            if point is None:
+                return False
+            if node is None:
+                self._steer(point)
+                return True
+            self.route_node = node
+        target = routes.points[self.route_node]
+        if math.hypot(target[0] - self.center_x, target[1] - self.center_y) <= WAYPOINT_RADIUS:
+            node, goal = self.route_node, self.route_goal
+            following = None
+            # Цель из другой части графа недостижима — её заменяет новая
+            if goal is not None and goal != node and routes.component[goal] == routes.component[node]:
+                following = routes.step(node, goal)
+            if following is None:
+                members = routes.components[routes.component[node]]
+                if len(members) == 1:
+                    self.stop()
+                    return True
+                self.route_goal = node
+                while self.route_goal == node:
+                    self.route_goal = self.rng.choice(members)
+                following = routes.step(node, self.route_goal)
+            self.route_node = following
+            target = routes.points[self.route_node]
+        self._steer(target)
+        return True
+
+    def _patrol_update(self, dt: float):
+        """Случайное блуждание в режиме патруля.
+
+        :param dt: время шага
+        :type dt: float
+        """
+        self.patrol_timer += dt
+        if self.patrol_timer >= self.direction_change_interval:
+            angle = self.rng.uniform(0, 2 * math.pi)
+            self.change_x = math.cos(angle) * self.speed
+            self.change_y = math.sin(angle) * self.speed
+            self.patrol_timer = 0
+            self.direction_change_interval = self.rng.uniform(2.0, 5.0)
+
+
+class FoxyBody(Hunter):
+    """Фокси: крадётся по стадиям, затем атакует, если игрок не спрятался."""
+
+    def __init__(self, rng: random.Random):
+        """Задаёт шансы и интервалы активации и шагов.
+
+        :param rng: собственный генератор случайных чисел Фокси
+        :type rng: random.Random
+        """
+        super().__init__(FOXY_SIZE, FOXY_START, rng)
+        self.step_index = 0
+        self.activation_timer = 0.0
+        self.activation_interval = DEFAULT_PARAMS["foxy_activation_interval"]
+        self.activation_chance = DEFAULT_PARAMS["foxy_activation_chance"]
+        self.step_timer = 0.0
+        self.step_interval = DEFAULT_PARAMS["foxy_step_interval"]
+        self.step_chance = DEFAULT_PARAMS["foxy_step_chance"]
+        self.chase_speed = 8
+        self.stuck_path_threshold = 1.0
+
+    def update(self, dt: float, player: Body, stealth_mode: bool, flow: FlowField = None):
+        """Обновляет логику поведения: крадётся или преследует.
+
+        :param dt: время шага
+        :type dt: float
+        :param player: тело игрока
+        :type player: Body
+        :param stealth_mode: режим невидимости игрока
+        :type stealth_mode: bool
+        :param flow: поле расстояний до игрока
+        :type flow: FlowField
+        """
+        if self.state == "inactive":
+            self.activation_timer += dt
+            if self.activation_timer >= self.activation_interval:
+                self.activation_timer = 0
+                if self.rng.random() < self.activation_chance:
+                    self.state = "stalking"
+                    self.step_index = 0
+
+        elif self.state == "stalking":
+            self.step_timer += dt
+            if self.step_timer >= self.step_interval:
+                self.step_timer = 0
+                if self.rng.random() < self.step_chance:
+                    if self.step_index < 3:
+                        self.step_index += 1
+                    elif stealth_mode:
+                        self.step_index = 0
+                    else:
+                        self.state = "chasing"
+                        self.center_y -= 200
+                        self.speed = self.chase_speed
+                        self._chase_update(player, flow)
+
+        if self.state == "chasing":
+            self._pursue(dt, player, flow)
+
+    def _steer(self, target: tuple):
+        """Направляет движение к точке, останавливаясь, если уже стоит в ней.
+
+        :param target: мировые координаты точки
+        :type target: tuple[float, float]
+        """
+        if target == self.position:
+            self.stop()
+        else:
+            super()._steer(target)
+
+
+class Simulation:
+    """Одна ночь: состояние всех персонажей, таймеры и проверки смерти.
+
+    Ничего не рисует и не проигрывает звуки — представление читает состояние
+    и реагирует на изменение death_cause.
+    """
+
+    def __init__(self, level: Level = None, params: dict = None, seed: int = None):
+        """Создаёт персонажей и физику на карте.
+
+        :param level: загруженная карта (по умолчанию основная карта игры)
+        :type level: Level
+        :param params: переопределения параметров сложности из DEFAULT_PARAMS
+        :type params: dict
+        :param seed: сид ночи (по умолчанию выбирается случайно)
+        :type seed: int
+        """
+        self.level = level if level is not None else Level()
+        self._set_params(params)
+        # Один индекс карты на столкновения, укрытия, двери и места для кекса
+        self.collision = CollisionGrid(self.level)
+        self.hide_mask = self.collision.mask(("objects",))
+        self.wall_mask = self.collision.mask(("walls", "doors"))
+        self.floor_mask = self.collision.mask(("textures",))
+        self.cupcake_spots = self._find_cupcake_spots()
+        # Сетка строится под самый крупный хитбокс охотников — Бонни
+        self.nav = NavGrid(self.level, BONNIE_SIZE)
+        # Поле зависит только от клетки игрока, поэтому переживает сброс ночи
+        self.flow = FlowField(self.nav)
+        self.sight = LineOfSight(self.level)
+        self.portals = PortalGraph(self.level, self.collision)
+        self.routes = PatrolRoutes(self.level, self.portals, BONNIE_SIZE)
+        self.reset(seed)
+
+    def _set_params(self, params: dict = None):
+        """Проверяет переопределения параметров сложности и накладывает их на DEFAULT_PARAMS.
+
+        :param params: переопределения параметров из DEFAULT_PARAMS
+        :type params: dict
+        """
+        unknown = set(params or {}) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Неизвестные параметры симуляции: {', '.join(sorted(unknown))}")
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+
+    def reset(self, seed: int = None, params: dict = None):
+        """Возвращает ночь в начальное состояние.
+
+        Все случайные события ночи выводятся из сида, поэтому ночь с тем же сидом
+        и тем же вводом проходит одинаково. Карта, навигация и маршруты от параметров
+        не зависят, поэтому новую сложность можно задать сбросом, не собирая симуляцию заново.
+
+        :param seed: сид ночи (по умолчанию выбирается новый)
+        :type seed: int
+        :param params: новые переопределения параметров из DEFAULT_PARAMS (по умолчанию остаются прежние)
+        :type params: dict
+        """
+        if params is not None:
+            self._set_params(params)
+        params = self.params
+        self.seed = new_seed() if seed is None else seed
+        self.tick = 0
+        self.total_play_time = 0.0
+        self.game_over = False
+        self.death_cause = None
+
+        self.player = GuardBody()
+        self.stealth_mode = False
+        self.stealth_timer = 0
+        self.max_stealth_time = params["max_stealth_time"]
+
+        self.bonnie = BonnieBody(derive_rng(self.seed, "bonnie"))
+        self.activation_timer = 0
+        self.activation_interval = params["bonnie_activation_interval"]
+        self.bonnie_activation_chance = params["bonnie_activation_chance"]
+
+        self.chika = Body(CHIKA_SIZE, CHIKA_START)
+        self.cupcake = Body(CUPCAKE_SIZE)
+        self.chika_rng = derive_rng(self.seed, "chika")
+        self.cupcake_rng = derive_rng(self.seed, "cupcake")
+        self.chika_activated = False
+        self.chika_activation_timer = 0
+        self.chika_activation_interval = params["chika_activation_interval"]
+        self.chika_activation_chance = params["chika_activation_chance"]
+        self.cupcake_timer = 0
+        self.cupcake_interval = params["cupcake_interval"]
+
+        self.foxy = FoxyBody(derive_rng(self.seed, "foxy"))
+        self.foxy.activation_interval = params["foxy_activation_interval"]
+        self.foxy.activation_chance = params["foxy_activation_chance"]
+        self.foxy.step_interval = params["foxy_step_interval"]
+        self.foxy.step_chance = params["foxy_step_chance"]
+
+        self.freddy = Body(FREDDY_SIZE, FREDDY_START)
+        self.freddy_rng = derive_rng(self.seed, "freddy")
+        self.freddy_activated = False
+        self.freddy_activation_timer = 0
+        self.freddy_activation_interval = params["freddy_activation_interval"]
+        self.freddy_activation_chance = params["freddy_activation_chance"]
+        self.zone_size = 500
+        self.time_in_zone_threshold = params["time_in_zone_threshold"]
+        self.shake_duration = params["shake_duration"]
+        self.shake_timer = 0.0
+        self.shake_active = False
+        self.stationary_center = None
+        self.stationary_timer = 0.0
+
+        self.physics_engine = PhysicsEngine(self.player, self.collision, ("walls", "doors"))
+        self.bonnie_physics = PhysicsEngine(self.bonnie, self.collision, ("walls",), (self.cupcake, self.foxy))
+        self.foxy_physics = PhysicsEngine(self.foxy, self.collision, ("walls",), (self.cupcake, self.bonnie))
+
+    def key_press(self, control: int):
+        """Обрабатывает нажатие управляющей клавиши: движение, вход в укрытие.
+
+        :param control: одна из констант CONTROL_*
+        :type control: int
+        """
+        if self.game_over:
+            return
+        player = self.player
+        if not self.stealth_mode:
+            if control == CONTROL_UP:
+                player.change_y = player.speed
+            if control == CONTROL_DOWN:
+                player.change_y = -player.speed
+            if control == CONTROL_LEFT:
+                player.change_x = -player.speed
+            if control == CONTROL_RIGHT:
+                player.change_x = player.speed
+
+        if control == CONTROL_HIDE:
+            if self.collision.nearest(self.hide_mask, player.center_x, player.center_y,
+                                      INTERACTION_DISTANCE) is not None:
+                self.stealth_mode = True
+                player.stop()
+                self.stealth_timer = 0
+
+    def key_release(self, control: int):
+        """Обрабатывает отпускание управляющей клавиши: остановка, двери, выход из укрытия.
+
+        :param control: одна из констант CONTROL_*
+        :type control: int
+        """
+        if self.game_over:
+            return
+        player = self.player
+        if control in (CONTROL_UP, CONTROL_DOWN):
+            player.change_y = 0
+        if control in (CONTROL_LEFT, CONTROL_RIGHT):
+            player.change_x = 0
+        if control == CONTROL_DOOR:
+            doorway = self.portals.within(player.center_x, player.center_y, INTERACTION_DISTANCE)
+            if doorway is not None:
+                doorway.teleport(player)
+        if control == CONTROL_HIDE:
+            self.leave_hiding()
+
+    def leave_hiding(self):
+        """Выводит игрока из укрытия."""
+        self.stealth_mode = False
+
+    def _find_cupcake_spots(self):
+        """Находит при загрузке карты все точки, где может появиться кекс.
+
+        Точки стоят решёткой с шагом в долю клетки. Точка годится, если кекс, сдвинутый
+        от неё в любую сторону не больше чем на полшага, не задевает стен и дверей
+        и стоит на полу, поэтому позицию внутри ячейки решётки можно брать случайно.
+
+        :return: номера годных точек решётки
+        :rtype: array.array
+        """
+        level = self.level
+        index = self.collision
+        step = level.tile_size / SPAWN_STEPS
+        columns = round(level.world_width / step)
+        rows = round(level.world_height / step)
+        width, height = CUPCAKE_SIZE
+        # Наружу — чтобы не задеть стен при любом сдвиге, внутрь — чтобы пол был под кексом всегда
+        outer_x, outer_y = width / 2 + step / 2, height / 2 + step / 2
+        inner_x, inner_y = width / 2 - step / 2, height / 2 - step / 2
+        spots = array("I")
+        for row in range(rows):
+            y = (row + 0.5) * step
+            for column in range(columns):
+                x = (column + 0.5) * step
+                if index.overlaps(self.wall_mask, x - outer_x, y - outer_y, x + outer_x, y + outer_y):
+                    continue
+                if index.overlaps(self.floor_mask, x - inner_x, y - inner_y, x + inner_x, y + inner_y):
+                    spots.append(row * columns + column)
+        self.spot_columns = columns
+        self.spot_step = step
+        return spots
+
+    def place_cupcake_randomly(self):
+        """Размещает кекс в случайной заранее проверенной точке пола.
+
+        Если на карте нет ни одной годной точки, кекс остаётся на месте.
+        """
+        spots = self.cupcake_spots
+        if not spots:
+            return
+        rng = self.cupcake_rng
+        spot = spots[rng.randrange(len(spots))]
+        step = self.spot_step
+        row, column = divmod(spot, self.spot_columns)
+        self.cupcake.position = ((column + rng.random()) * step, (row + rng.random()) * step)
+
+    def _die(self, cause: str):
+        """Завершает ночь и останавливает игрока.
+
+        :param cause: кто убил игрока ("bonnie", "chika", "foxy", "freddy")
+        :type cause: str
+        """
+        if not self.game_over:
+            self.death_cause = cause
+        self.game_over = True
+        self.player.stop()
+
+    def step(self, dt: float = STEP):
+        """Продвигает ночь на один шаг.
+
+        :param dt: время шага в секундах (по умолчанию фиксированный шаг STEP)
+        :type dt: float
+        """
+        if self.game_over:
+            return
+
+        self.tick += 1
+        self.total_play_time += dt
+        player = self.player
+
+        self.bonnie.update(dt, player, self.stealth_mode, self.flow, self.sight, self.routes)
+        self.bonnie_physics.update(dt)
+        self.bonnie.check_doors(self.portals, dt)
+
+        self.foxy.update(dt, player, self.stealth_mode, self.flow)
+        self.foxy_physics.update(dt)
+        self.foxy.check_doors(self.portals, dt)
+
+        self.physics_engine.update(dt)
+
+        self._update_freddy(dt)
+
+        if not self.stealth_mode and player.overlaps(self.bonnie):
+            self._die("bonnie")
+            self.bonnie.stop()
+
+        self.activation_timer += dt
+        if self.activation_timer >= self.activation_interval:
+            self.activation_timer = 0
+            if self.bonnie.state == "inactive":
+                if self.bonnie.rng.random() < self.bonnie_activation_chance:
+                    self.bonnie.state = "patrol"
+                    self.bonnie.center_y = 2250
+
+        if not self.chika_activated:
+            self.chika_activation_timer += dt
+            if self.chika_activation_timer >= self.chika_activation_interval:
+                self.chika_activation_timer = 0
+                if self.chika_rng.random() < self.chika_activation_chance:
+                    self.chika_activated = True
+                    self.place_cupcake_randomly()
+        else:
+            self.cupcake_timer += dt
+            if self.cupcake_timer >= self.cupcake_interval:
+                self.cupcake_timer = 0
+                self.place_cupcake_randomly()
+
+        if self.chika_activated and not self.stealth_mode and player.overlaps(self.cupcake):
+            self._die("chika")
+
+        if self.foxy.state == "chasing" and player.overlaps(self.foxy):
+            self._die("foxy")
+            self.foxy.stop()
+
+        if self.stealth_mode:
+            self.stealth_timer += dt
+            if self.stealth_timer >= self.max_stealth_time:
+                self.leave_hiding()
+
+    def _update_freddy(self, dt: float):
+        """Активация Фредди и слежение за неподвижностью игрока.
+
+        :param dt: время шага
+        :type dt: float
+        """
+        if not self.freddy_activated:
+            self.freddy_activation_timer += dt
+            if self.freddy_activation_timer >= self.freddy_activation_interval:
+                self.freddy_activation_timer = 0
+                if self.freddy_rng.random() < self.freddy_activation_chance:
+                    self.freddy_activated = True
+
+        if not self.freddy_activated:
+            self.stationary_center = None
+            self.stationary_timer = 0.0
+            self.shake_active = False
+            self.shake_timer = 0.0
+            return
+
+        player = self.player
+        if self.stationary_center is None:
+            self.stationary_center = player.position
+            self.stationary_timer = 0.0
+        else:
+            dx = player.center_x - self.stationary_center[0]
+            dy = player.center_y - self.stationary_center[1]
+            if abs(dx) > self.zone_size / 2 or abs(dy) > self.zone_size / 2:
+                self.stationary_center = player.position
+                self.stationary_timer = 0.0
+                self.shake_active = False
+                self.shake_timer = 0.0
+            else:
+                self.stationary_timer += dt
+
+        if self.stationary_timer >= self.time_in_zone_threshold and not self.shake_active:
+            self.shake_active = True
+            self.shake_timer = 0.0
+
+        if self.shake_active:
+            self.shake_timer += dt
+            if self.shake_timer >= self.shake_duration:
+                self._die("freddy")
+
+    @property
+    def shake_progress(self):
+        """Доля пройденного времени тряски камеры от 0 до 1."""
+        if not self.shake_active:
+            return 0.0
+        return min(self.shake_timer / self.shake_duration, 1.0)
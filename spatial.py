@@ -0,0 +1,133 @@
+"""Модуль пространственного индекса карты.
+
+Слои карты упаковываются в один массив: байт на клетку, по биту на слой.
+Запросы «что есть в точке», «что пересекает прямоугольник» и «что ближе всего
+в радиусе» перебирают только клетки рядом с местом запроса, поэтому их время
+не растёт с размером карты.
+"""
+
+
+import math
+from level import Level
+from mapcache import MASK_LAYERS
+
+
+# Допуск, при котором касание края клетки ещё не считается пересечением
+EDGE_EPSILON = 1e-6
+# Слои, которые индекс собирает по умолчанию, — те же, что уже упакованы в пакет карты
+INDEX_LAYERS = MASK_LAYERS
+
+
+class SpatialIndex:
+    """Упакованная сетка слоёв карты с запросами по окрестности."""
+
+    def __init__(self, level: Level, layers: tuple = INDEX_LAYERS):
+        """Собирает байт слоёв для каждой клетки.
+
+        :param level: карта уровня
+        :type level: Level
+        :param layers: имена слоёв, не больше восьми
+        :type layers: tuple[str, ...]
+        """
+        self.level = level
+        self.width = level.width
+        self.height = level.height
+        self.tile_size = level.tile_size
+        self.bits = {layer: 1 << bit for bit, layer in enumerate(layers)}
+        if tuple(layers) == level.mask_layers:
+            # Маски этих слоёв уже собраны компилятором карты
+            self.cells = bytearray(level.masks)
+            return
+        self.cells = bytearray(level.width * level.height)
+        for bit, layer in enumerate(layers):
+            for index, gid in enumerate(level.layers[layer]):
+                if gid:
+                    self.cells[index] |= 1 << bit
+
+    def mask(self, layers: tuple):
+        """Маска битов для набора слоёв.
+
+        :rtype: int
+        """
+        mask = 0
+        for layer in layers:
+            mask |= self.bits[layer]
+        return mask
+
+    def _span(self, low: float, high: float, limit: int):
+        """Номера клеток, которые отрезок [low, high] пересекает не только краем.
+
+        :return: первая и последняя клетка в пределах карты (first > last — таких нет)
+        :rtype: tuple[int, int]
+        """
+        size = self.tile_size
+        first = max(0, math.floor(low / size + EDGE_EPSILON))
+        last = min(limit - 1, math.ceil(high / size - EDGE_EPSILON) - 1)
+        return first, last
+
+    def at(self, mask: int, x: float, y: float):
+        """Проверяет, лежит ли точка в клетке одного из слоёв маски.
+
+        :param mask: маска слоёв из mask
+        :type mask: int
+        :param x: координата X
+        :type x: float
+        :param y: координата Y
+        :type y: float
+        :return: False и для точки за пределами карты
+        :rtype: bool
+        """
+        tx, ty = int(x // self.tile_size), int(y // self.tile_size)
+        if 0 <= tx < self.width and 0 <= ty < self.height:
+            return bool(self.cells[ty * self.width + tx] & mask)
+        return False
+
+    def first(self, mask: int, left: float, bottom: float, right: float, top: float):
+        """Первая клетка слоёв маски, которую пересекает прямоугольник.
+
+        :return: клетка (tx, ty) в порядке строк снизу вверх или None
+        :rtype: tuple[int, int] | None
+        """
+        cells = self.cells
+        first_column, last_column = self._span(left, right, self.width)
+        first_row, last_row = self._span(bottom, top, self.height)
+        for row in range(first_row, last_row + 1):
+            start = row * self.width
+            for column in range(first_column, last_column + 1):
+                if cells[start + column] & mask:
+                    return column, row
+        return None
+
+    def overlaps(self, mask: int, left: float, bottom: float, right: float, top: float):
+        """Проверяет, пересекает ли прямоугольник клетку слоёв маски.
+
+        :rtype: bool
+        """
+        return self.first(mask, left, bottom, right, top) is not None
+
+    def nearest(self, mask: int, x: float, y: float, radius: float):
+        """Клетка слоёв маски с ближайшим к точке центром в пределах радиуса.
+
+        :return: клетка (tx, ty) или None
+        :rtype: tuple[int, int] | None
+        """
+        size = self.tile_size
+        cells = self.cells
+        best = None
+        best_distance = radius * radius
+        # Центр клетки tx лежит в (tx + 0.5) * size, поэтому диапазон смещён на половину клетки
+        first_column = max(0, math.ceil((x - radius) / size - 0.5))
+        last_column = min(self.width - 1, math.floor((x + radius) / size - 0.5))
+        first_row = max(0, math.ceil((y - radius) / size - 0.5))
+        last_row = min(self.height - 1, math.floor((y + radius) / size - 0.5))
+        for row in range(first_row, last_row + 1):
+            start = row * self.width
+            dy = (row + 0.5) * size - y
+            for column in range(first_column, last_column + 1):
+                if cells[start + column] & mask:
+                    dx = (column + 0.5) * size - x
+                    distance = dx * dx + dy * dy
+                    if distance <= best_distance and (best is None or distance < best_distance):
+                        best = (column, row)
+                        best_distance = distance
+        return best
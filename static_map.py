@@ -0,0 +1,152 @@
+"""Модуль заранее отрисованных слоёв карты.
+
+Стены, пол, укрытия и двери не меняются за ночь, поэтому при загрузке карты
+они один раз собираются в исходном размере тайлов в картинки кусков прямо из
+пакета карты, без разбора TMX и без отрисовки тайлов спрайтами.
+В кадре вместо тысяч спрайтов тайлов рисуются только куски, попавшие в камеру.
+"""
+
+
+import arcade
+from PIL import Image
+from level import Level
+
+
+# Сторона куска карты в клетках
+CHUNK_TILES = 10
+
+
+class _TileCutter:
+    """Картинки тайлов по gid, вырезаемые из изображений наборов по первому запросу."""
+
+    def __init__(self, tilesets: list):
+        """Запоминает описания наборов тайлов из пакета карты.
+
+        :param tilesets: наборы тайлов в порядке возрастания firstgid
+        :type tilesets: list[dict]
+        """
+        self.tilesets = sorted(tilesets, key=lambda tileset: tileset["firstgid"], reverse=True)
+        self.images = {}
+        self.tiles = {}
+
+    def get(self, gid: int):
+        """Картинка тайла или None, если у набора нет общего изображения.
+
+        :param gid: номер тайла
+        :type gid: int
+        :rtype: Image.Image | None
+        """
+        if gid in self.tiles:
+            return self.tiles[gid]
+        tileset = next(tileset for tileset in self.tilesets if tileset["firstgid"] <= gid)
+        tile = None
+        if tileset["image"] is not None and tileset["columns"]:
+            source = self.images.get(tileset["image"])
+            if source is None:
+                source = Image.open(tileset["image"]).convert("RGBA")
+                self.images[tileset["image"]] = source
+            index = gid - tileset["firstgid"]
+            column, row = index % tileset["columns"], index // tileset["columns"]
+            left = tileset["margin"] + column * (tileset["tilewidth"] + tileset["spacing"])
+            top = tileset["margin"] + row * (tileset["tileheight"] + tileset["spacing"])
+            tile = source.crop((left, top, left + tileset["tilewidth"], top + tileset["tileheight"]))
+        self.tiles[gid] = tile
+        return tile
+
+
+class StaticMap:
+    """Неизменные слои карты, разрезанные на куски-текстуры.
+
+    Куски хранятся сеткой, поэтому набор кусков в кадре находится по прямоугольнику
+    камеры без перебора всех кусков карты.
+    """
+
+    def __init__(self, level: Level, chunk_tiles: int = CHUNK_TILES):
+        """Собирает все слои карты в текстуры кусков.
+
+        Куски собираются в масштабе 1, по пикселю на пиксель тайла, прямо из картинки
+        набора тайлов и сеток слоёв пакета карты, а спрайты кусков растягиваются
+        до масштаба мира, поэтому текстуры занимают мало памяти.
+
+        :param level: карта уровня
+        :type level: Level
+        :param chunk_tiles: сторона куска в клетках
+        :type chunk_tiles: int
+        """
+        bundle = level.bundle
+        scaling = level.scaling
+        tile_width, tile_height = bundle.tile_width, bundle.tile_height
+        self.chunk_width = chunk_tiles * tile_width * scaling
+        self.chunk_height = chunk_tiles * tile_height * scaling
+        self.columns = -(-level.width // chunk_tiles)
+        self.rows = -(-level.height // chunk_tiles)
+
+        tiles = _TileCutter(bundle.tilesets)
+        layers = [grid for name, grid in bundle.layers.items() if bundle.layer_visible[name]]
+        self.chunks = []
+        for row in range(self.rows):
+            for column in range(self.columns):
+                tx0, ty0 = column * chunk_tiles, row * chunk_tiles
+                tx1 = min(level.width, tx0 + chunk_tiles)
+                ty1 = min(level.height, ty0 + chunk_tiles)
+                width, height = (tx1 - tx0) * tile_width, (ty1 - ty0) * tile_height
+
+                # Тайлы смешиваются с чёрным фоном в порядке слоёв карты
+                image = Image.new("RGBA", (width, height), (0, 0, 0, 255))
+                for grid in layers:
+                    for ty in range(ty0, ty1):
+                        start = ty * level.width
+                        # Строки мира идут снизу вверх, а изображения — сверху вниз
+                        y = (ty1 - 1 - ty) * tile_height
+                        for tx in range(tx0, tx1):
+                            gid = grid[start + tx]
+                            if gid:
+                                tile = tiles.get(gid)
+                                if tile is not None:
+                                    image.alpha_composite(tile, ((tx - tx0) * tile_width, y))
+
+                texture = arcade.Texture(image, hash=f"{level.path}:{scaling}:{column}:{row}")
+                chunk = arcade.Sprite(texture, scale=scaling)
+                chunk.position = ((tx0 * tile_width + width / 2) * scaling,
+                                  (ty0 * tile_height + height / 2) * scaling)
+                self.chunks.append(chunk)
+
+        # Буферы списка создаются при первой отрисовке, поэтому карту можно собрать в фоновом потоке
+        self.visible = arcade.SpriteList(lazy=True)
+        # Карта рисуется первой поверх чёрной очистки кадра, поэтому непрозрачные куски
+        # можно класть без смешивания — так заметно быстрее на программном OpenGL
+        self.visible.blend = False
+        self.visible_range = None
+
+    def _update_visible(self, camera: arcade.Camera2D):
+        """Собирает список кусков, пересекающих область камеры.
+
+        Список пересобирается, только когда камера переходит на другие куски.
+
+        :param camera: мировая камера
+        :type camera: arcade.Camera2D
+        """
+        x, y = camera.position
+        half_width = camera.viewport_width / camera.zoom / 2
+        half_height = camera.viewport_height / camera.zoom / 2
+        first_column = max(0, int((x - half_width) // self.chunk_width))
+        last_column = min(self.columns - 1, int((x + half_width) // self.chunk_width))
+        first_row = max(0, int((y - half_height) // self.chunk_height))
+        last_row = min(self.rows - 1, int((y + half_height) // self.chunk_height))
+        visible_range = (first_column, last_column, first_row, last_row)
+        if visible_range == self.visible_range:
+            return
+        self.visible_range = visible_range
+        self.visible.clear()
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                self.visible.append(self.chunks[row * self.columns + column])
+
+    def draw(self, camera: arcade.Camera2D):
+        """Рисует куски карты, видимые мировой камерой.
+
+        :param camera: мировая камера (уже включённая)
+        :type camera: arcade.Camera2D
+        """
+        self._update_visible(camera)
+        self.visible.draw()
@@ -0,0 +1,69 @@
+"""Пакет карты: сборка, проверка по исходным файлам и пересборка."""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import mapcache
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class MapCacheTest(unittest.TestCase):
+    """Пакет собирается из копии карты во временной папке."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        for name in ("maps", "tiles"):
+            os.mkdir(os.path.join(self.folder, name))
+        shutil.copy(os.path.join(ROOT, "maps", "fnaf.tmx"), os.path.join(self.folder, "maps"))
+        for name in os.listdir(os.path.join(ROOT, "tiles")):
+            if name.endswith(".tsx"):
+                shutil.copy(os.path.join(ROOT, "tiles", name), os.path.join(self.folder, "tiles"))
+        self.path = os.path.join(self.folder, "maps", "fnaf.tmx")
+
+    def touch(self, content: bytes = None):
+        """Сдвигает время изменения карты и при необходимости меняет её содержимое."""
+        if content is not None:
+            with open(self.path, "wb") as file:
+                file.write(content)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    def test_load_writes_valid_bundle(self):
+        bundle = mapcache.load_map(self.path)
+        self.assertTrue(os.path.exists(mapcache.cache_path(self.path)))
+        self.assertTrue(bundle.valid())
+        self.assertEqual(len(bundle.masks), bundle.width * bundle.height)
+        again = mapcache.load_map(self.path)
+        self.assertEqual(bytes(again.masks), bytes(bundle.masks))
+        self.assertEqual(set(again.layers), set(bundle.layers))
+
+    def test_resaved_map_keeps_bundle(self):
+        mapcache.load_map(self.path)
+        self.touch()
+        self.assertTrue(mapcache.load_map(self.path).valid())
+
+    def test_changed_map_rebuilds_bundle(self):
+        bundle = mapcache.load_map(self.path)
+        with open(self.path, "rb") as file:
+            content = file.read()
+        self.touch(content + b"\n")
+        self.assertFalse(bundle.valid())
+        rebuilt = mapcache.load_map(self.path)
+        self.assertTrue(rebuilt.valid())
+        self.assertEqual(bytes(rebuilt.masks), bytes(bundle.masks))
+
+    def test_corrupt_bundle_rebuilds(self):
+        mapcache.load_map(self.path)
+        with open(mapcache.cache_path(self.path), "wb") as file:
+            file.write(b"garbage")
+        self.assertTrue(mapcache.load_map(self.path).valid())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""Маршруты патруля: шаги по графу и обход карты через все дверные проёмы."""
+
+
+import itertools
+import math
+import unittest
+
+from horde import PATROL, HordeSimulation
+from level import Level
+from simulation import Simulation
+
+
+# Сколько шагов симуляции патрульный идёт после перехода через проём
+STEPS = 300
+
+
+def crossings(portals):
+    """Точки внутри каждого проёма чуть по обе стороны от его оси.
+
+    :rtype: list[tuple[int, int, tuple[float, float]]]
+    """
+    points = []
+    for doorway in portals.doorways:
+        for side, shift in ((0, -1), (1, 1)):
+            x, y = doorway.middle
+            if doorway.axis == "x":
+                x = doorway.center + shift
+            else:
+                y = doorway.center + shift
+            points.append((doorway.index, side, (x, y)))
+    return points
+
+
+def foreign_goal(routes, node):
+    """Узел из другой части графа, куда от узла маршрута нет.
+
+    :rtype: int
+    """
+    for members in routes.components:
+        if routes.component[members[0]] != routes.component[node]:
+            return members[0]
+    raise AssertionError("граф маршрутов связный")
+
+
+class PatrolRoutesTest(unittest.TestCase):
+    """Шаги по графу маршрутов."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.routes = Simulation(Level(), seed=1).routes
+
+    def test_step_leads_to_goal(self):
+        routes = self.routes
+        members = max(routes.components, key=len)
+        node, goal = members[0], members[-1]
+        for _ in range(len(routes.points)):
+            if node == goal:
+                break
+            node = routes.step(node, goal)
+            self.assertEqual(routes.component[node], routes.component[goal])
+        self.assertEqual(node, goal)
+
+    def test_step_across_groups(self):
+        routes = self.routes
+        self.assertGreater(len(routes.components), 1)
+        for members in routes.components:
+            goal = foreign_goal(routes, members[0])
+            for node in members:
+                self.assertIsNone(routes.step(node, goal))
+
+
+class DoorwayPatrolTest(unittest.TestCase):
+    """Бонни и орда продолжают патруль после перехода через любой проём."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.level = Level()
+        cls.sim = Simulation(cls.level, seed=1)
+        cls.horde = HordeSimulation(cls.level, seed=1)
+
+    def test_bonnie_crosses_every_doorway(self):
+        sim = self.sim
+        # Цель, выбранная с прежней стороны проёма, может оказаться в любой части графа
+        goals = [members[0] for members in sim.routes.components]
+        for (doorway, side, point), goal in itertools.product(crossings(sim.portals), goals):
+            with self.subTest(doorway=doorway, side=side, goal=goal):
+                sim.reset(1)
+                bonnie = sim.bonnie
+                bonnie.state = "patrol"
+                bonnie.speed = bonnie.patrol_speed
+                bonnie.position = point
+                bonnie.teleport_cooldown = 0
+                bonnie.route_goal = goal
+                path = 0.0
+                for _ in range(STEPS):
+                    before = bonnie.position
+                    sim.step()
+                    if sim.game_over:
+                        break
+                    path += math.dist(before, bonnie.position)
+                self.assertGreater(path, 0.0)
+
+    def test_bonnie_replaces_unreachable_goal(self):
+        sim = self.sim
+        sim.reset(1)
+        bonnie = sim.bonnie
+        bonnie.state = "patrol"
+        bonnie.speed = bonnie.patrol_speed
+        node = max(sim.routes.components, key=len)[0]
+        bonnie.position = sim.routes.points[node]
+        bonnie.route_node = node
+        bonnie.route_goal = foreign_goal(sim.routes, node)
+        sim.step()
+        self.assertEqual(sim.routes.component[bonnie.route_goal], sim.routes.component[node])
+        self.assertIsNotNone(bonnie.route_node)
+
+    def test_horde_crosses_every_doorway(self):
+        sim = self.horde
+        for doorway, side, point in crossings(sim.portals):
+            with self.subTest(doorway=doorway, side=side):
+                sim.reset(1)
+                horde = sim.horde
+                horde.x[0], horde.y[0] = point
+                horde.last_x[0], horde.last_y[0] = point
+                horde.teleport_cooldown[0] = 0
+                start = (horde.x[0], horde.y[0])
+                for _ in range(STEPS):
+                    sim.step()
+                    if sim.game_over:
+                        break
+                self.assertNotEqual((horde.x[0], horde.y[0]), start)
+
+    def test_horde_replaces_unreachable_goal(self):
+        sim = self.horde
+        sim.reset(1)
+        horde = sim.horde
+        routes = sim.routes
+        node = max(routes.components, key=len)[0]
+        horde.x[0], horde.y[0] = routes.points[node]
+        horde.state[0] = PATROL
+        horde.route_node[0] = node
+        horde.route_goal[0] = foreign_goal(routes, node)
+        sim.step()
+        self.assertEqual(routes.component[horde.route_goal[0]], routes.component[node])
+        self.assertNotEqual(horde.route_node[0], node)
+
+
+if __name__ == "__main__":
+    unittest.main()
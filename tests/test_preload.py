@@ -0,0 +1,67 @@
+"""Фоновая подготовка: учёт выполненных и неудавшихся заданий."""
+
+
+import unittest
+
+from preload import Preloader
+
+
+def fail():
+    """Задание, которое падает в фоновом потоке."""
+    raise RuntimeError("work")
+
+
+class PreloaderTest(unittest.TestCase):
+    """Завершение заданий в главном потоке."""
+
+    def run_jobs(self, preloader):
+        """Выполняет все задания и завершает их в главном потоке."""
+        preloader.start()
+        preloader.thread.join(5)
+        preloader.pump(5.0)
+
+    def test_finish_receives_result(self):
+        preloader = Preloader()
+        results = []
+        preloader.add("a", lambda: 1, results.append)
+        preloader.add("b", lambda: 2)
+        self.run_jobs(preloader)
+        self.assertEqual(results, [1])
+        self.assertFalse(preloader.busy)
+        self.assertEqual(preloader.progress, 1.0)
+        self.assertEqual(preloader.failed, [])
+
+    def test_failures_count_as_finished(self):
+        preloader = Preloader()
+        finished = []
+
+        def broken_finish(result):
+            raise ValueError(result)
+
+        preloader.add("work", fail, finished.append)
+        preloader.add("finish", lambda: 3, broken_finish)
+        preloader.add("ok", lambda: 4, finished.append)
+        self.run_jobs(preloader)
+        self.assertEqual(finished, [4])
+        self.assertEqual(preloader.finished, 3)
+        self.assertTrue(preloader.ready("work") and preloader.ready("finish"))
+        self.assertEqual([(name, type(error)) for name, error in preloader.failed],
+                         [("work", RuntimeError), ("finish", ValueError)])
+
+    def test_run_until_pauses_after_job(self):
+        preloader = Preloader()
+        preloader.add("first", lambda: 1)
+        preloader.add("second", lambda: 2)
+        preloader.run_until("first")
+        preloader.start()
+        preloader.thread.join(0.5)
+        preloader.pump(5.0)
+        self.assertTrue(preloader.ready("first"))
+        self.assertFalse(preloader.ready("second"))
+        preloader.resume()
+        self.run_jobs(preloader)
+        self.assertTrue(preloader.ready("second"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Запись ввода: формат чисел, упаковка событий и повтор ночи."""
+
+
+import unittest
+
+from replay import InputRecorder, _read_varint, _write_varint, decode, replay_headless
+from simulation import CONTROL_DOWN, CONTROL_LEFT, CONTROL_UP, Simulation
+
+
+class VarintTest(unittest.TestCase):
+    """Числа LEB128."""
+
+    def test_round_trip(self):
+        values = [0, 1, 127, 128, 255, 300, 16383, 16384, 2 ** 32 - 1, 2 ** 63 + 5]
+        out = bytearray()
+        for value in values:
+            _write_varint(out, value)
+        pos = 0
+        for value in values:
+            read, pos = _read_varint(out, pos)
+            self.assertEqual(read, value)
+        self.assertEqual(pos, len(out))
+
+    def test_small_values_take_one_byte(self):
+        out = bytearray()
+        _write_varint(out, 127)
+        self.assertEqual(len(out), 1)
+        _write_varint(out, 128)
+        self.assertEqual(len(out), 3)
+
+
+class RecordingTest(unittest.TestCase):
+    """Упаковка и повтор записи ввода."""
+
+    def test_decode_round_trip(self):
+        recorder = InputRecorder()
+        events = [(0, CONTROL_UP, True), (0, CONTROL_LEFT, True), (45, CONTROL_UP, False),
+                  (300, CONTROL_DOWN, True), (1000, CONTROL_DOWN, False)]
+        for event in events:
+            recorder.record(*event)
+        self.assertEqual(decode(recorder.to_bytes(123456789, 1200)), (123456789, 1200, events))
+
+    def test_bad_header(self):
+        with self.assertRaises(ValueError):
+            decode(b"XYZ\x01\x00\x00")
+
+    def test_replay_repeats_night(self):
+        sim = Simulation(seed=7)
+        recorder = InputRecorder()
+        script = {0: (CONTROL_UP, True), 200: (CONTROL_UP, False), 210: (CONTROL_LEFT, True),
+                  500: (CONTROL_LEFT, False)}
+        while not sim.game_over and sim.tick < 800:
+            if sim.tick in script:
+                control, pressed = script[sim.tick]
+                recorder.record(sim.tick, control, pressed)
+                if pressed:
+                    sim.key_press(control)
+                else:
+                    sim.key_release(control)
+            sim.step()
+        replayed = replay_headless(recorder.to_bytes(sim.seed, sim.tick))
+        self.assertEqual(replayed.tick, sim.tick)
+        self.assertEqual(replayed.player.position, sim.player.position)
+        self.assertEqual(replayed.bonnie.position, sim.bonnie.position)
+        self.assertEqual(replayed.death_cause, sim.death_cause)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,17 +4,76 @@
 """
 
 
-import random
 import arcade
-from pyglet.gl import GL_ONE
-from arcade import View, PhysicsEngineSimple, Camera2D
+import numpy as np
+from functools import partial
+from arcade import View, Camera2D
 from arcade.gui import UIManager, UIBoxLayout, UIFlatButton, UIAnchorLayout
+from assets import load_texture
 from charecters import NightGuard, Bonnie, Freddy, Chika, Foxy
 from database import init_db, save_result, get_top_results
+from horde import HordeSimulation, CHASE
+from hud import TextLayer
+from level import Level, MAP_PATH, MAP_SCALING
+from lighting import Light, LightingPass
+from replay import InputRecorder, InputPlayback, decode
+from static_map import StaticMap
+from visibility import WallSegments, VisibilityPolygon
+from simulation import (Simulation, STEP, derive_rng, CONTROL_UP, CONTROL_DOWN, CONTROL_LEFT, CONTROL_RIGHT,
+                        CONTROL_HIDE, CONTROL_DOOR)
+
+
+# Длинные подвисания не превращаются в лавину шагов симуляции
+MAX_FRAME_TIME = 0.25
+
+# Сеансы игры по режиму (обычный или орда), переживающие ночь
+_sessions = {}
+
+# Время кадра меню (в секундах) на фоновую подготовку: в простое и пока игрок ждёт запуска ночи
+PRELOAD_IDLE_BUDGET = 0.004
+PRELOAD_WAIT_BUDGET = 0.05
+# Дальше этого расстояния от игрока аниматроники не видны
+VIEW_RADIUS = 520
+
+CONTROLS = {
+    arcade.key.W: CONTROL_UP,
+    arcade.key.S: CONTROL_DOWN,
+    arcade.key.A: CONTROL_LEFT,
+    arcade.key.D: CONTROL_RIGHT,
+    arcade.key.SPACE: CONTROL_HIDE,
+    arcade.key.E: CONTROL_DOOR,
+}
+
+
+class SessionParts:
+    """Части сеанса игры, которым не нужен OpenGL: симуляция, куски карты и видимость.
+
+    Их можно собрать в фоновом потоке, пока открыто меню.
+    """
+
+    def __init__(self, horde: bool, seed: int = None):
+        """Загружает карту и собирает симуляцию режима, куски карты и многоугольник видимости.
+
+        :param horde: бесконечный режим орды
+        :type horde: bool
+        :param seed: сид ночи
+        :type seed: int
+        """
+        level = Level(MAP_PATH, MAP_SCALING)
+        simulation_class = HordeSimulation if horde else Simulation
+        self.sim = simulation_class(level, seed=seed)
+        # Слои карты не меняются, поэтому собираются один раз в текстуры кусков
+        self.static_map = StaticMap(level)
+        # Стены режут и свет, и обзор; многоугольник пересчитывается, когда игрок сдвинулся
+        self.visibility = VisibilityPolygon(WallSegments(level), VIEW_RADIUS)
+        self.visibility.update(*self.sim.player.position)
 
 
 class MainMenu(View):
-    """Главное меню игры с кнопками «Играть» и «Посмотреть статистику»."""
+    """Главное меню игры с кнопками «Играть», «Орда» и «Посмотреть статистику»."""
+
+    # Окно перерисовывает меню только после ввода или событий окна
+    render_on_demand = True
 
     def __init__(self):
         """Загружает фон, создаёт кнопки и настраивает управление с клавиатуры."""
@@ -22,7 +81,7 @@ class MainMenu(View):
         init_db()
 
         try:
-            self.background = arcade.load_texture("images/background.png")
+            self.background = load_texture("images/background.png")
         except FileNotFoundError:
             self.background = arcade.color.BLACK
 
@@ -35,6 +94,10 @@ class MainMenu(View):
         play_button.on_click = self.on_click_play
         v_box.add(play_button)
 
+        horde_button = UIFlatButton(text="Орда", width=250, height=60)
+        horde_button.on_click = self.on_click_horde
+        v_box.add(horde_button)
+
         stats_button = UIFlatButton(text="Посмотреть статистику", width=350, height=60)
         stats_button.on_click = self.on_click_stats
         v_box.add(stats_button)
@@ -43,10 +106,16 @@ class MainMenu(View):
         anchor_layout.add(v_box, anchor_x="center_x", anchor_y="center_y")
         self.manager.add(anchor_layout)
 
-        self.buttons = [play_button, stats_button]
+        self.buttons = [play_button, horde_button, stats_button]
         self.selected_index = 0
         self._update_selection()
 
+        # Режим, который игрок выбрал раньше, чем закончилась фоновая подготовка
+        self.pending_horde = None
+        self.text = TextLayer()
+        self.text.add("progress", "", 0, 0, color=arcade.color.WHITE, font_size=18, anchor_x="center")
+        self.text.show("progress", False)
+
     def on_show(self):
         """Вызывается при показе вида — включает менеджер и курсор."""
         self.manager.enable()
@@ -57,17 +126,72 @@ class MainMenu(View):
         self.manager.clear()
         self.manager.disable()
 
+    def on_show_view(self):
+        """Продолжает фоновую подготовку, пока открыто меню."""
+        self.window.preloader.resume()
+
+    def on_hide_view(self):
+        """Приостанавливает фоновую подготовку, чтобы она не отнимала время у других экранов."""
+        self.window.preloader.pause()
+
     def on_draw(self):
         """Отрисовывает фон и кнопки."""
         self.clear()
         arcade.draw_texture_rect(self.background,
                                  arcade.rect.XYWH(self.width // 2, self.height // 2, self.width, self.height))
         self.manager.draw()
+        self.text.draw()
+
+    def on_update(self, delta_time: float):
+        """Отдаёт часть кадра фоновой подготовке и запускает ночь, когда выбранный режим готов.
+
+        Пока игрок ждёт, подготовка получает больше времени кадра, а меню показывает прогресс.
+
+        :param delta_time: время с предыдущего кадра
+        :type delta_time: float
+        """
+        preloader = self.window.preloader
+        if preloader.busy:
+            waiting = self.pending_horde is not None
+            preloader.pump(PRELOAD_WAIT_BUDGET if waiting else PRELOAD_IDLE_BUDGET)
+        if self.pending_horde is None:
+            return
+        if preloader.ready(Game.preload_name(self.pending_horde)):
+            horde, self.pending_horde = self.pending_horde, None
+            self.text.show("progress", False)
+            self._start(horde)
+            return
+        progress = f"Загрузка... {int(preloader.progress * 100)}%"
+        if self.text.labels["progress"].text != progress:
+            self.text.set("progress", progress)
+            self.window.redraw_needed = True
 
     def on_click_play(self, event):
         """Переход в игровое окно."""
+        self._start(horde=False)
+
+    def on_click_horde(self, event):
+        """Переход в бесконечный режим орды."""
+        self._start(horde=True)
+
+    def _start(self, horde: bool):
+        """Запускает ночь режима или, если он ещё готовится в фоне, ждёт его с индикатором.
+
+        :param horde: бесконечный режим орды
+        :type horde: bool
+        """
         self.manager.disable()
-        self.window.show_view(Game())
+        preloader = self.window.preloader
+        name = Game.preload_name(horde)
+        if not preloader.ready(name):
+            self.pending_horde = horde
+            # Сеанс другого режима подождёт, а ресурсы, нужные обоим, остаются впереди
+            preloader.defer(Game.preload_name(not horde))
+            preloader.run_until(name)
+            self.text.move("progress", self.width / 2, self.height / 2 - 160)
+            self.text.show("progress", True)
+            return
+        self.window.show_view(Game.session(seed=self.window.seed, horde=horde))
 
     def on_click_stats(self, event):
         """Переход в окно статистики."""
@@ -75,6 +199,8 @@ class MainMenu(View):
 
     def on_key_release(self, symbol: int, modifiers: int):
         """Обрабатывает клавиши вверх/вниз для выбора кнопки и Enter для подтверждения."""
+        if self.pending_horde is not None:
+            return
         if symbol == arcade.key.UP:
             self.selected_index = (self.selected_index - 1) % len(self.buttons)
             self._update_selection()
@@ -82,10 +208,7 @@ class MainMenu(View):
             self.selected_index = (self.selected_index + 1) % len(self.buttons)
             self._update_selection()
         elif symbol == arcade.key.ENTER:
-            if self.selected_index == 0:
-                self.on_click_play(None)
-            else:
-                self.on_click_stats(None)
+            self.buttons[self.selected_index].on_click(None)
 
     def _update_selection(self):
         """Визуально выделяет выбранную кнопку."""
@@ -103,203 +226,380 @@ class MainMenu(View):
 class Game(View):
     """Основной игровой процесс.
 
-    Управляет игроком, аниматрониками, физикой, камерой, затемнением и сохранением результатов.
+    Рисует карту и персонажей, передаёт ввод в симуляцию ночи, управляет камерой,
+    затемнением и сохранением результатов. Вся игровая логика — в Simulation.
     """
 
-    def __init__(self):
-        """Загружает карту, создаёт игрока и всех аниматроников, настраивает камеры и физику."""
+    def __init__(self, seed: int = None, replay: bytes = None, horde: bool = False, parts: SessionParts = None):
+        """Загружает карту, создаёт симуляцию, спрайты персонажей и камеры.
+
+        Всё, что переживает ночь, собирается здесь, а состояние ночи задаёт reset.
+
+        :param seed: сид ночи (по умолчанию выбирается случайно)
+        :type seed: int
+        :param replay: запись ввода; если задана, ночь воспроизводится вместо управления с клавиатуры
+        :type replay: bytes
+        :param horde: бесконечный режим орды
+        :type horde: bool
+        :param parts: заранее собранные части сеанса нужного режима (например, фоновой подготовкой)
+        :type parts: SessionParts
+        """
         super().__init__()
 
-        self.result_saved = False
-        self.scene = None
-        self.map = None
-        self.wall_list = None
-        self.physics_engine = None
-        self.stealth_mode = False
-        self.game_over = False
-        self.game_over_timer = 0
         self.game_over_duration = 2.0
-        self.total_play_time = 0.0
-        self.game_initialized = False
         self.light_radius = 320
-        light_texture = arcade.make_circle_texture(self.light_radius * 2, (255, 255, 255, 255))
-        self.light_sprite = arcade.Sprite(light_texture)
-        self.light_sprite.alpha = 40
-
-        self.light_sprite_list = arcade.SpriteList()
-        self.light_sprite_list.append(self.light_sprite)
-
-        self.map = arcade.load_tilemap("maps/fnaf.tmx", scaling=3.7)
-        self.scene = arcade.Scene.from_tilemap(self.map)
-        self.world_width = self.map.width * self.map.tile_width * 3.7
-        self.world_height = self.map.height * self.map.tile_height * 3.7
+        # Затемнение и все источники света рисуются одним проходом шейдера
+        self.lighting = LightingPass(self.window.ctx, darkness=160 / 255)
+        self.player_light = Light((0, 0), self.light_radius, intensity=40 / 255)
+        self.lighting.lights.append(self.player_light)
+        # Свечение глаз преследователей; источники пула переиспользуются от кадра к кадру
+        self.eye_lights = []
+
+        if parts is None:
+            parts = SessionParts(horde, seed)
+        self.sim = parts.sim
+        self.static_map = parts.static_map
+        self.visibility = parts.visibility
+        self.world_width = self.sim.level.world_width
+        self.world_height = self.sim.level.world_height
 
         self.player = NightGuard()
-        self.player_list = arcade.SpriteList()
-        self.player.center_x = 2100
-        self.player.center_y = 1900
-
-        self.player_list.append(self.player)
-        self.wall_list = self.map.sprite_lists["walls"]
-        self.doors_list = self.map.sprite_lists["doors"]
-        self.objects_list = self.map.sprite_lists["objects"]
-        self.textures_list = self.map.sprite_lists["textures"]
-
-        self.physics_engine = PhysicsEngineSimple(self.player, (self.wall_list, self.doors_list))
 
         self.world_camera = Camera2D()
         self.gui_camera = Camera2D()
-        self.center_camera_on_player()
 
-        self.bonnie_list = arcade.SpriteList()
-        self.bonnie_physics = None
-        self.activation_timer = 0
-        self.activation_interval = 10.0
+        # Надписи создаются один раз, а раскладка пересобирается, только когда меняется строка
+        self.hud = TextLayer()
+        self.hud.add("timer", "", 0, 0, color=arcade.color.WHITE, font_size=20, anchor_x="right", anchor_y="top")
+        self.hud.add("seed", "", 20, 20, color=arcade.color.GRAY, font_size=12)
+        self.hud.add("horde", "", 0, 0, color=arcade.color.WHITE, font_size=16, anchor_x="right", anchor_y="top")
+        self.hud.show("horde", self.horde)
+        self.hud.add("stealth", "", 0, 60, color=arcade.color.WHITE, font_size=16, anchor_x="right", anchor_y="top")
+
         self.inner_radius = 320
-        self.outer_radius = 520
+        self.outer_radius = VIEW_RADIUS
 
         self.bonnie = Bonnie()
-        self.bonnie.center_x = 1600
-        self.bonnie.center_y = 2255
-        self.bonnie_list.append(self.bonnie)
-
         self.chika = Chika()
-        self.chika.center_x = 2100
-        self.chika.center_y = 2245
-        self.chika_list = arcade.SpriteList()
-        self.chika_list.append(self.chika)
-
         self.cupcake_sprite = arcade.Sprite(self.chika.cupcake, scale=0.05)
-        self.cupcake_sprite.alpha = 0
-        self.cupcake_list = arcade.SpriteList()
-        self.cupcake_list.append(self.cupcake_sprite)
+        self.foxy = Foxy()
 
-        self.chika_activation_timer = 0
-        self.chika_activation_interval = 15.0
-        self.chika_activated = False
+        # Спрайты орды берутся из пула, который только растёт; кадры анимации общие для всех
+        self.horde_list = arcade.SpriteList()
+        self.horde_textures = (self.bonnie.walk_right_textures + self.bonnie.walk_left_textures
+                               + self.bonnie.walk_up_textures + self.bonnie.walk_down_textures
+                               + [self.bonnie.idle_texture])
 
-        self.cupcake_timer = 0
-        self.cupcake_interval = 15.0
+        self.fade_speed = 255
+        self.freddy = Freddy()
 
-        self.foxy = Foxy()
-        self.foxy.center_x = 2100
-        self.foxy.center_y = 2245
-        self.foxy_list = arcade.SpriteList()
-        self.foxy_list.append(self.foxy)
+        # Все персонажи и кекс рисуются одним вызовом из общего списка
+        self.actor_list = arcade.SpriteList()
+        for sprite, _ in self._actors():
+            self.actor_list.append(sprite)
+
+        self.max_shake_amplitude = 10
+        self.reset(seed, replay)
+
+    @classmethod
+    def session(cls, seed: int = None, replay: bytes = None, horde: bool = False):
+        """Сеанс игры из пула процесса, подготовленный к новой ночи.
+
+        Карта, симуляция, спрайты и свет собираются при первом запуске режима,
+        а следующие ночи только сбрасывают состояние.
+
+        :param seed: сид ночи (по умолчанию выбирается случайно)
+        :type seed: int
+        :param replay: запись ввода для воспроизведения
+        :type replay: bytes
+        :param horde: бесконечный режим орды
+        :type horde: bool
+        :rtype: Game
+        """
+        game = _sessions.get(horde)
+        if game is None:
+            game = _sessions[horde] = cls(seed, replay, horde)
+        else:
+            game.reset(seed, replay)
+        return game
+
+    @classmethod
+    def preload(cls, preloader):
+        """Ставит в фоновую очередь сборку сеансов обоих режимов.
+
+        Карта, симуляция, куски карты и видимость собираются в фоновом потоке,
+        а свет и спрайты персонажей — в главном, когда эти части готовы.
+
+        :param preloader: очередь фоновой подготовки
+        :type preloader: preload.Preloader
+        """
+        for horde in (False, True):
+            if horde not in _sessions:
+                preloader.add(cls.preload_name(horde), partial(SessionParts, horde),
+                              partial(cls._pool_session, horde))
 
+    @staticmethod
+    def preload_name(horde: bool):
+        """Имя задания фоновой подготовки сеанса режима.
+
+        :rtype: str
+        """
+        return "session:horde" if horde else "session:night"
+
+    @classmethod
+    def _pool_session(cls, horde: bool, parts: SessionParts):
+        """Собирает сеанс режима из готовых частей и кладёт его в пул.
+
+        :param horde: бесконечный режим орды
+        :type horde: bool
+        :param parts: части сеанса, собранные фоновым потоком
+        :type parts: SessionParts
+        """
+        if horde not in _sessions:
+            _sessions[horde] = cls(horde=horde, parts=parts)
+
+    def reset(self, seed: int = None, replay: bytes = None):
+        """Возвращает ночь, спрайты, камеру и затемнение в начальное состояние.
+
+        :param seed: сид ночи (по умолчанию выбирается случайно)
+        :type seed: int
+        :param replay: запись ввода; если задана, ночь воспроизводится вместо управления с клавиатуры
+        :type replay: bytes
+        """
+        self.recorder = InputRecorder()
+        self.playback = None
+        self.replay_end_tick = None
+        if replay is not None:
+            seed, self.replay_end_tick, events = decode(replay)
+            self.playback = InputPlayback(events)
+        self.sim.reset(seed)
+        self.camera_rng = derive_rng(self.sim.seed, "camera")
+
+        self.result_saved = False
+        self.game_over_timer = 0
+        self.game_initialized = False
         self.fade_alpha = 0
-        self.fade_speed = 255
         self.fade_state = None
-        self.stealth_timer = 0
-        self.max_stealth_time = 7.0
+        self.was_hidden = False
+        self.hud_second = None
+        self.hud_stealth_tenths = None
+        self.accumulator = 0.0
+        # Время показа игры: кадры анимации орды и мигание света
+        self.clock = 0.0
+
+        for sprite in (self.player, self.bonnie, self.chika, self.foxy, self.freddy):
+            sprite.reset()
+        self.cupcake_sprite.alpha = 0
+        self.cupcake_sprite.visible = False
+        for sprite in self.horde_list:
+            sprite.alpha = 0
+        self.horde_shown = np.zeros(len(self.horde_list), dtype=bool)
+        # Многоугольник видимости строится заново от стартовой точки
+        self.visibility.origin = None
+
+        self.world_camera.position = self.world_camera.viewport.center
+        self._remember_positions()
+        self._sync_sprites()
+        self.camera_target = (self.player.center_x, self.player.center_y)
+        self.center_camera_on_player()
 
-        self.freddy = Freddy()
-        self.freddy.center_x = 1850
-        self.freddy.center_y = 2245
-        self.freddy_list = arcade.SpriteList()
-        self.freddy_list.append(self.freddy)
-
-        self.freddy_activated = False
-        self.freddy_activation_timer = 0
-        self.freddy_activation_interval = 20.0
-        self.freddy_activation_chance = 0.7
-
-        self.zone_size = 500
-        self.time_in_zone_threshold = 20.0
-        self.shake_duration = 5.0
-        self.max_shake_amplitude = 10
-        self.shake_timer = 0.0
-        self.shake_active = False
+    @property
+    def stealth_mode(self):
+        """Находится ли игрок в укрытии."""
+        return self.sim.stealth_mode
 
-        self.camera_target = (self.player.center_x, self.player.center_y)
-        self.stationary_center = None
-        self.stationary_timer = 0.0
+    @property
+    def game_over(self):
+        """Закончилась ли ночь."""
+        return self.sim.game_over
+
+    @property
+    def horde(self):
+        """Идёт ли бесконечный режим орды."""
+        return isinstance(self.sim, HordeSimulation)
 
-        self.chika_physics = PhysicsEngineSimple(self.chika, self.wall_list)
-        self.freddy_physics = PhysicsEngineSimple(self.freddy, self.wall_list)
-        self.bonnie_physics = PhysicsEngineSimple(self.bonnie,
-                                                  (self.wall_list, self.cupcake_list, self.foxy_list))
-        self.foxy_physics = PhysicsEngineSimple(self.foxy,
-                                                (self.wall_list, self.cupcake_list, self.bonnie_list))
+    @property
+    def total_play_time(self):
+        """Время выживания в секундах."""
+        return self.sim.total_play_time
 
     def save_result(self):
-        """Сохраняет текущее время игры в базу данных (только один раз)."""
-        if not self.result_saved:
-            save_result(self.total_play_time)
+        """Сохраняет текущее время игры и запись ввода в базу данных (только один раз).
+
+        Повторы ночей и ночи с ордой не сохраняются.
+        """
+        if not self.result_saved and self.playback is None and not self.horde:
+            save_result(self.total_play_time, self.sim.seed,
+                        self.recorder.to_bytes(self.sim.seed, self.sim.tick))
             self.result_saved = True
 
     def on_show_view(self):
-        """Вызывается при показе игрового окна — инициализирует или возобновляет игру."""
+        """Вызывается при показе игрового окна — начинает ночь или возобновляет игру после паузы."""
         if not self.game_initialized:
-            self.result_saved = False
-            self.total_play_time = 0.0
-            self.activation_timer = 0
-            self.bonnie.last_pos = (self.bonnie.center_x, self.bonnie.center_y)
-            self.bonnie.state = "inactive"
-            self.bonnie.texture = self.bonnie.not_activate
-
-            self.chika_activation_timer = 0
-            self.chika_activated = False
-            self.chika.alpha = 255
-            self.chika.texture = self.chika.not_activate
-            self.cupcake_sprite.alpha = 0
-            self.cupcake_timer = 0
-
-            self.foxy.state = "inactive"
-            self.foxy.activation_timer = 0
-            self.foxy.step_timer = 0
-            self.foxy.step_index = 0
-            self.foxy.texture = self.foxy.not_activate
-            self.foxy.center_x = 3350
-            self.foxy.center_y = 2200
-            self.foxy.change_x = 0
-            self.foxy.change_y = 0
-            self.foxy.last_pos = (self.foxy.center_x, self.foxy.center_y)
-
-            self.bonnie.last_dist_to_player = None
-            self.bonnie.stuck_path_timer = 0
-            self.foxy.last_dist_to_player = None
-            self.foxy.stuck_path_timer = 0
-
-            self.freddy.state = "inactive"
-            self.freddy.texture = self.freddy.not_activate
-            self.freddy.alpha = 255
-            self.freddy_activated = False
-            self.freddy_activation_timer = 0
-            self.stationary_center = None
-            self.stationary_timer = 0.0
-
+            # Ночь уже подготовлена в reset
             self.game_initialized = True
         else:
-            self.game_over = False
             self.game_over_timer = 0
-            self.stealth_mode = False
+            # Пауза выводит из укрытия — пишем это в запись ввода, чтобы повтор совпал
+            self._send_control(CONTROL_HIDE, False)
             self.player.alpha = 255
+            self.was_hidden = False
             self.fade_alpha = 0
             self.fade_state = None
 
-    def _place_cupcake_randomly(self):
-        """Размещает кекс в случайной позиции, не занятой стенами или дверями."""
-        for _ in range(100):
-            x = random.uniform(42, self.world_width - 42)
-            y = random.uniform(42, self.world_height - 42)
-            self.cupcake_sprite.position = (x, y)
-            if not arcade.check_for_collision_with_list(self.cupcake_sprite, self.wall_list):
-                if not arcade.check_for_collision_with_list(self.cupcake_sprite, self.doors_list):
-                    if arcade.check_for_collision_with_list(self.cupcake_sprite, self.textures_list):
-                        return
-
-        x = random.uniform(50, self.world_width - 50)
-        y = random.uniform(50, self.world_height - 50)
-        self.cupcake_sprite.position = (x, y)
+    def _fade_by_distance(self, sprite: arcade.Sprite):
+        """Плавно скрывает спрайт по мере удаления от игрока; за стеной спрайт не виден.
+
+        :param sprite: спрайт аниматроника или кекса
+        :type sprite: arcade.Sprite
+        """
+        if not self.visibility.contains(sprite.center_x, sprite.center_y):
+            sprite.alpha = 0
+            return
+        dist = arcade.get_distance_between_sprites(self.player, sprite)
+        if dist <= self.inner_radius:
+            sprite.alpha = 255
+        elif dist < self.outer_radius:
+            factor = (dist - self.inner_radius) / (self.outer_radius - self.inner_radius)
+            sprite.alpha = int(255 * (1 - factor))
+        else:
+            sprite.alpha = 0
+
+    def _actors(self):
+        """Возвращает пары (спрайт, тело симуляции) для всех персонажей и кекса.
+
+        :rtype: tuple[tuple[arcade.Sprite, Body], ...]
+        """
+        sim = self.sim
+        return ((self.player, sim.player), (self.bonnie, sim.bonnie), (self.chika, sim.chika),
+                (self.foxy, sim.foxy), (self.freddy, sim.freddy), (self.cupcake_sprite, sim.cupcake))
+
+    def _remember_positions(self):
+        """Запоминает позиции тел перед шагом симуляции для интерполяции."""
+        self.previous_positions = [body.position for _, body in self._actors()]
+        if self.horde:
+            store = self.sim.horde
+            self.previous_horde = (store.x[:store.count].copy(), store.y[:store.count].copy())
+
+    def _sync_sprites(self, alpha: float = 1.0):
+        """Переносит состояния из симуляции в спрайты, интерполируя позиции между шагами.
+
+        :param alpha: доля накопленного времени до следующего шага (0..1)
+        :type alpha: float
+        """
+        sim = self.sim
+        max_jump = sim.level.tile_size
+        for (sprite, body), (prev_x, prev_y) in zip(self._actors(), self.previous_positions):
+            x, y = body.position
+            # Телепорты через двери не сглаживаем
+            if abs(x - prev_x) < max_jump and abs(y - prev_y) < max_jump:
+                x = prev_x + (x - prev_x) * alpha
+                y = prev_y + (y - prev_y) * alpha
+            sprite.position = (x, y)
+            sprite.change_x = body.change_x
+            sprite.change_y = body.change_y
+
+        self.bonnie.set_state(sim.bonnie.state)
+        if sim.foxy.state == "stalking":
+            if self.foxy.state != "stalking" or self.foxy.step_index != sim.foxy.step_index:
+                self.foxy.set_stalking_step(sim.foxy.step_index)
+        self.foxy.state = sim.foxy.state
+        self.cupcake_sprite.visible = sim.chika_activated
+        # Вид сверху: кто стоит ниже на экране, тот ближе и рисуется поверх
+        self.actor_list.sort(key=lambda sprite: -sprite.center_y)
+        if self.visibility.update(self.player.center_x, self.player.center_y):
+            self.player_light.polygon = self.visibility.points
+        if self.horde:
+            self._sync_horde(alpha)
+        self._sync_hiding()
+
+    def _sync_horde(self, alpha: float):
+        """Переносит орду в спрайты пула: позиции, кадры анимации и прозрачность по расстоянию и видимости.
+
+        Всё считается массивами на всю орду, а спрайты трогаются только у тех патрульных,
+        которые видны сейчас или были видны в прошлом кадре.
+
+        :param alpha: доля накопленного времени до следующего шага (0..1)
+        :type alpha: float
+        """
+        store = self.sim.horde
+        n = store.count
+        sprites = self.horde_list
+        while len(sprites) < n:
+            sprite = arcade.Sprite(self.bonnie.idle_texture, scale=self.bonnie.scale_x)
+            sprite.alpha = 0
+            sprites.append(sprite)
+        if len(self.horde_shown) < len(sprites):
+            self.horde_shown = np.concatenate(
+                (self.horde_shown, np.zeros(len(sprites) - len(self.horde_shown), dtype=bool)))
+
+        x = store.x[:n].copy()
+        y = store.y[:n].copy()
+        prev_x, prev_y = self.previous_horde
+        m = min(len(prev_x), n)
+        x[:m] = prev_x[:m] + (x[:m] - prev_x[:m]) * alpha
+        y[:m] = prev_y[:m] + (y[:m] - prev_y[:m]) * alpha
+
+        dist = np.hypot(x - self.player.center_x, y - self.player.center_y)
+        fade = np.clip(255 * (self.outer_radius - dist) / (self.outer_radius - self.inner_radius), 0, 255)
+        fade = np.where(self.visibility.contains(x, y), fade, 0).astype(np.int64)
+
+        vx = store.vx[:n]
+        vy = store.vy[:n]
+        # Номера текстур: по четыре кадра вправо, влево, вверх, вниз и стойка
+        direction = np.where(vx != 0, np.where(vx > 0, 0, 4), np.where(vy != 0, np.where(vy > 0, 8, 12), 16))
+        patrol_frame = int(self.clock / self.bonnie.patrol_animation_time) % 4
+        chase_frame = int(self.clock / self.bonnie.chase_animation_time) % 4
+        frame = np.where(store.state[:n] == CHASE, chase_frame, patrol_frame)
+        texture_index = np.where(direction < 16, direction + frame, 16)
+
+        shown = np.zeros(len(sprites), dtype=bool)
+        shown[:n] = fade > 0
+        textures = self.horde_textures
+        for i in np.flatnonzero(shown | self.horde_shown):
+            sprite = sprites[i]
+            if shown[i]:
+                sprite.position = (x[i], y[i])
+                sprite.texture = textures[texture_index[i]]
+                sprite.alpha = fade[i]
+            else:
+                sprite.alpha = 0
+        self.horde_shown = shown
+
+    def _sync_hiding(self):
+        """Скрывает игрока и запускает затемнение при входе в укрытие и выходе из него."""
+        if self.stealth_mode != self.was_hidden:
+            self.was_hidden = self.stealth_mode
+            self.player.alpha = 0 if self.stealth_mode else 255
+            self.fade_state = "fade_out" if self.stealth_mode else "fade_in"
+
+    def _sync_eye_lights(self):
+        """Зажигает красное мигающее свечение глаз у преследующих игрока аниматроников.
+
+        Свечение гаснет вместе со спрайтом, поэтому за стеной и вдали от игрока его не видно.
+        """
+        chasers = [self.bonnie] if self.sim.bonnie.state == "chase" else []
+        if self.horde:
+            store = self.sim.horde
+            chasers.extend(self.horde_list[i] for i in np.flatnonzero(store.state[:store.count] == CHASE)
+                           if i < len(self.horde_list))
+        lights = [self.player_light]
+        for sprite in chasers:
+            if not sprite.alpha:
+                continue
+            if len(self.eye_lights) < len(lights):
+                self.eye_lights.append(Light((0, 0), 56, color=(255, 40, 30), softness=40, flicker=0.5))
+            light = self.eye_lights[len(lights) - 1]
+            light.position = (sprite.center_x, sprite.center_y + sprite.height / 4)
+            light.intensity = 0.3 * sprite.alpha / 255
+            lights.append(light)
+        self.lighting.lights = lights
 
     def center_camera_on_player(self):
         """Плавно перемещает мировую камеру так, чтобы игрок оставался в центре, с учётом границ."""
         dead_zone_h = int(self.window.height * 0.45)
         dead_zone_w = int(self.window.width * 0.35)
         camera_lerp = 1.1
-        self.world_width = int(self.map.width * self.map.tile_width * 3.7)
-        self.world_height = int(self.map.height * self.map.tile_height * 3.7)
 
         cam_x, cam_y = self.world_camera.position
         dz_left = cam_x - dead_zone_w // 2
@@ -330,74 +630,80 @@ class Game(View):
 
         self.camera_target = (self.cam_target[0], self.cam_target[1])
 
+    def _update_camera_shake(self):
+        """Ставит камеру в целевую точку, добавляя тряску, пока Фредди следит за игроком."""
+        amplitude = self.sim.shake_progress * self.max_shake_amplitude
+        if not amplitude:
+            self.world_camera.position = self.camera_target
+            return
+        base_x, base_y = self.camera_target
+        new_x = base_x + self.camera_rng.uniform(-amplitude, amplitude)
+        new_y = base_y + self.camera_rng.uniform(-amplitude, amplitude)
+        half_w = self.world_camera.viewport_width / 2
+        half_h = self.world_camera.viewport_height / 2
+        new_x = max(half_w, min(self.world_width - half_w, new_x))
+        new_y = max(half_h, min(self.world_height - half_h, new_y))
+        self.world_camera.position = (new_x, new_y)
+
     def on_draw(self):
         """Отрисовывает все игровые объекты, затемнение и свет."""
         self.clear()
 
         self.world_camera.use()
-        if self.scene:
-            self.scene.draw()
-        self.player_list.draw()
-        self.bonnie_list.draw()
-        self.chika_list.draw()
-        self.foxy_list.draw()
-        self.freddy_list.draw()
-        if self.chika_activated:
-            self.cupcake_list.draw()
+        self.static_map.draw(self.world_camera)
+        if self.horde:
+            self.horde_list.draw()
+        self.actor_list.draw()
 
         self.gui_camera.use()
 
-        arcade.draw_rect_filled(arcade.rect.LRBT(0, self.window.width, 0, self.window.height),
-                                (0, 0, 0, 160))
-
-        screen_pos = self.world_camera.project(self.player.position)
-        self.light_sprite.position = screen_pos
-
-        original_blend = self.window.ctx.blend_func
-        self.window.ctx.blend_func = (GL_ONE, GL_ONE)
-        self.light_sprite_list.draw()
-        self.window.ctx.blend_func = original_blend
-
-        if self.stealth_mode:
-            remaining = max(0, self.max_stealth_time - self.stealth_timer)
-            arcade.draw_text(f"Укрытие: {remaining:.1f}с",
-                             self.window.width - 20, 60,
-                             arcade.color.WHITE, font_size=16,
-                             anchor_x="right", anchor_y="top")
+        self.player_light.position = self.player.position
+        self._sync_eye_lights()
+        self.lighting.draw(self.world_camera, self.window.get_pixel_ratio(), self.clock)
 
         arcade.draw_rect_filled(arcade.rect.LRBT(0, self.window.width, 0, self.window.height),
                                 (0, 0, 0, self.fade_alpha))
 
         if not self.game_over:
-            minutes = int(self.total_play_time // 60)
-            seconds = int(self.total_play_time % 60)
-            time_str = f"{minutes:02d}:{seconds:02d}"
-            arcade.draw_text(
-                time_str,
-                self.window.width - 20,
-                self.window.height - 20,
-                arcade.color.WHITE,
-                font_size=20,
-                anchor_x="right",
-                anchor_y="top"
-            )
+            self._update_hud()
+            self.hud.draw()
 
         if self.game_over:
-            if arcade.check_for_collision_with_list(self.player, self.bonnie_list):
-                texture = self.bonnie.jumpscare
-            elif arcade.check_for_collision_with_list(self.player, self.cupcake_list):
-                texture = self.chika.jumpscare
-            elif arcade.check_for_collision_with_list(self.player, self.foxy_list):
-                texture = self.foxy.jumpscare
-            else:
-                texture = self.freddy.jumpscare
+            texture = {
+                "bonnie": self.bonnie.jumpscare,
+                "chika": self.chika.jumpscare,
+                "foxy": self.foxy.jumpscare,
+            }.get(self.sim.death_cause, self.freddy.jumpscare)
 
             arcade.draw_texture_rect(
                 texture, arcade.LBWH(0, 0, self.width, self.height),
             )
 
+    def _update_hud(self):
+        """Обновляет строки и места надписей; таймер меняется раз в секунду, укрытие — раз в десятую."""
+        seconds = int(self.total_play_time)
+        if seconds != self.hud_second:
+            self.hud_second = seconds
+            self.hud.set("timer", f"{seconds // 60:02d}:{seconds % 60:02d}")
+        self.hud.show("stealth", self.stealth_mode)
+        if self.stealth_mode:
+            tenths = round(max(0, self.sim.max_stealth_time - self.sim.stealth_timer) * 10)
+            if tenths != self.hud_stealth_tenths:
+                self.hud_stealth_tenths = tenths
+                self.hud.set("stealth", f"Укрытие: {tenths / 10:.1f}с")
+            self.hud.move("stealth", self.window.width - 20, 60)
+        self.hud.set("seed", f"Сид: {self.sim.seed}")
+        self.hud.move("timer", self.window.width - 20, self.window.height - 20)
+        if self.horde:
+            self.hud.set("horde", f"Орда: {self.sim.horde.count}")
+            self.hud.move("horde", self.window.width - 20, self.window.height - 55)
+
     def on_update(self, dt: float):
-        """Обновляет состояние игры: движение, аниматроников, камеру, тряску."""
+        """Продвигает симуляцию фиксированными шагами и обновляет спрайты, камеру, тряску и затемнение.
+
+        Время кадра копится и расходуется шагами STEP, поэтому скачки частоты кадров
+        не меняют ход ночи, а спрайты рисуются между двумя последними шагами.
+        """
         if self.game_over:
             self.save_result()
             self.game_over_timer += dt
@@ -405,181 +711,48 @@ class Game(View):
                 self.window.show_view(MainMenu())
             return
 
-        self.total_play_time += dt
+        if self.playback is not None and self.sim.tick >= self.replay_end_tick:
+            self.window.show_view(MainMenu())
+            return
 
-        self.bonnie.update(dt, self.player, self.stealth_mode)
-        self.bonnie_physics.update()
-        self.bonnie.check_doors(self.doors_list, dt)
-        self.bonnie.update_animation(dt)
-        dist = arcade.get_distance_between_sprites(self.player, self.bonnie)
-        if dist <= self.inner_radius:
-            self.bonnie.alpha = 255
-        elif dist < self.outer_radius:
-            factor = (dist - self.inner_radius) / (self.outer_radius - self.inner_radius)
-            self.bonnie.alpha = int(255 * (1 - factor))
-        else:
-            self.bonnie.alpha = 0
+        self.clock += dt
+        self.accumulator += min(dt, MAX_FRAME_TIME)
+        while self.accumulator >= STEP and not self.game_over:
+            self._remember_positions()
+            if self.playback is not None:
+                self.playback.apply(self.sim)
+            self.sim.step(STEP)
+            self.accumulator -= STEP
+        self._sync_sprites(self.accumulator / STEP)
 
-        self.foxy.update(dt, self.player, self.stealth_mode)
-        self.foxy_physics.update()
-        self.foxy.check_doors(self.doors_list, dt)
-        self.foxy.update_animation(dt)
-        dist = arcade.get_distance_between_sprites(self.player, self.foxy)
-        if dist <= self.inner_radius:
-            self.foxy.alpha = 255
-        elif dist < self.outer_radius:
-            factor = (dist - self.inner_radius) / (self.outer_radius - self.inner_radius)
-            self.foxy.alpha = int(255 * (1 - factor))
-        else:
-            self.foxy.alpha = 0
+        if self.game_over:
+            sound = {
+                "bonnie": self.bonnie.jumpscare_sound,
+                "chika": self.chika.jumpscare_sound,
+                "foxy": self.foxy.jumpscare_sound,
+            }.get(self.sim.death_cause, self.freddy.jumpscare_sound)
+            arcade.play_sound(sound)
+            self.game_over_timer = 0
 
-        self.physics_engine.update()
+        self.bonnie.update_animation(dt)
+        self.foxy.update_animation(dt)
         self.player.update_animation(dt)
         self.center_camera_on_player()
+        self._update_camera_shake()
 
-        self.chika_physics.update()
-
-        self.freddy_physics.update()
-        if not self.freddy_activated:
-            dist = arcade.get_distance_between_sprites(self.player, self.freddy)
-            if dist <= self.inner_radius:
-                self.freddy.alpha = 255
-            elif dist < self.outer_radius:
-                factor = (dist - self.inner_radius) / (self.outer_radius - self.inner_radius)
-                self.freddy.alpha = int(255 * (1 - factor))
-            else:
-                self.freddy.alpha = 0
+        # Проявляются вблизи игрока только видимые сейчас персонажи, скрытые гаснут сразу
+        fading = [self.bonnie, self.foxy]
+        if not self.sim.freddy_activated:
+            fading.append(self.freddy)
         else:
             self.freddy.alpha = 0
-
-        if not self.freddy_activated:
-            self.freddy_activation_timer += dt
-            if self.freddy_activation_timer >= self.freddy_activation_interval:
-                self.freddy_activation_timer = 0
-                if random.random() < self.freddy_activation_chance:
-                    self.freddy_activated = True
-                    self.freddy.alpha = 0
-
-        if self.freddy_activated:
-            if self.stationary_center is None:
-                self.stationary_center = (self.player.center_x, self.player.center_y)
-                self.stationary_timer = 0.0
-            else:
-                dx = self.player.center_x - self.stationary_center[0]
-                dy = self.player.center_y - self.stationary_center[1]
-                if abs(dx) > self.zone_size / 2 or abs(dy) > self.zone_size / 2:
-                    self.stationary_center = (self.player.center_x, self.player.center_y)
-                    self.stationary_timer = 0.0
-                    self.shake_active = False
-                    self.shake_timer = 0.0
-                else:
-                    self.stationary_timer += dt
-
-            if self.stationary_timer >= self.time_in_zone_threshold and not self.shake_active:
-                self.shake_active = True
-                self.shake_timer = 0.0
-
-            if self.shake_active:
-                self.shake_timer += dt
-                progress = min(self.shake_timer / self.shake_duration, 1.0)
-                amplitude = progress * self.max_shake_amplitude
-                offset_x = random.uniform(-amplitude, amplitude)
-                offset_y = random.uniform(-amplitude, amplitude)
-                base_x, base_y = self.camera_target
-                new_x = base_x + offset_x
-                new_y = base_y + offset_y
-                half_w = self.world_camera.viewport_width / 2
-                half_h = self.world_camera.viewport_height / 2
-                new_x = max(half_w, min(self.world_width - half_w, new_x))
-                new_y = max(half_h, min(self.world_height - half_h, new_y))
-                self.world_camera.position = (new_x, new_y)
-
-                if self.shake_timer >= self.shake_duration:
-                    self.game_over = True
-                    self.game_over_timer = 0
-                    arcade.play_sound(self.freddy.jumpscare_sound)
-                    self.player.change_x = 0
-                    self.player.change_y = 0
-            else:
-                self.world_camera.position = self.camera_target
-
-        else:
-            self.stationary_center = None
-            self.stationary_timer = 0.0
-            self.shake_active = False
-            self.shake_timer = 0.0
-            self.world_camera.position = self.camera_target
-
-        if not self.chika_activated:
-            dist_chika = arcade.get_distance_between_sprites(self.player, self.chika)
-            if dist_chika <= self.inner_radius:
-                self.chika.alpha = 255
-            elif dist_chika < self.outer_radius:
-                factor = (dist_chika - self.inner_radius) / (self.outer_radius - self.inner_radius)
-                self.chika.alpha = int(255 * (1 - factor))
-            else:
-                self.chika.alpha = 0
-
-        if self.chika_activated:
-            dist_cupcake = arcade.get_distance_between_sprites(self.player, self.cupcake_sprite)
-            if dist_cupcake <= self.inner_radius:
-                self.cupcake_sprite.alpha = 255
-            elif dist_cupcake < self.outer_radius:
-                factor = (dist_cupcake - self.inner_radius) / (self.outer_radius - self.inner_radius)
-                self.cupcake_sprite.alpha = int(255 * (1 - factor))
-            else:
-                self.cupcake_sprite.alpha = 0
-        else:
+        if not self.sim.chika_activated:
+            fading.append(self.chika)
             self.cupcake_sprite.alpha = 0
-
-        if not self.stealth_mode and arcade.check_for_collision(self.player, self.bonnie):
-            self.game_over = True
-            self.game_over_timer = 0
-            arcade.play_sound(self.bonnie.jumpscare_sound)
-            self.player.change_x = 0
-            self.player.change_y = 0
-            self.bonnie.change_x = 0
-            self.bonnie.change_y = 0
-
-        self.activation_timer += dt
-        if self.activation_timer >= self.activation_interval:
-            self.activation_timer = 0
-            if self.bonnie.state == "inactive":
-                if random.random() < 0.8:
-                    self.bonnie.state = "patrol"
-                    self.bonnie.texture = self.bonnie.idle_texture
-                    self.bonnie.center_y = 2250
-
-        if not self.chika_activated:
-            self.chika_activation_timer += dt
-            if self.chika_activation_timer >= self.chika_activation_interval:
-                self.chika_activation_timer = 0
-                if random.random() < 0.7:
-                    self.chika_activated = True
-                    self.chika.alpha = 0
-                    self._place_cupcake_randomly()
         else:
-            self.cupcake_timer += dt
-            if self.cupcake_timer >= self.cupcake_interval:
-                self.cupcake_timer = 0
-                self._place_cupcake_randomly()
-
-        if self.chika_activated and not self.stealth_mode:
-            if arcade.check_for_collision(self.player, self.cupcake_sprite):
-                self.game_over = True
-                self.game_over_timer = 0
-                arcade.play_sound(self.chika.jumpscare_sound)
-                self.player.change_x = 0
-                self.player.change_y = 0
-
-        if self.foxy.state == "chasing" and arcade.check_for_collision(self.player, self.foxy):
-            self.game_over = True
-            self.game_over_timer = 0
-            arcade.play_sound(self.foxy.jumpscare_sound)
-            self.player.change_x = 0
-            self.player.change_y = 0
-            self.foxy.change_x = 0
-            self.foxy.change_y = 0
+            fading.append(self.cupcake_sprite)
+        for sprite in fading:
+            self._fade_by_distance(sprite)
 
         if self.fade_state == "fade_out":
             self.fade_alpha = min(200, self.fade_alpha + self.fade_speed * dt)
@@ -590,76 +763,50 @@ class Game(View):
             if self.fade_alpha <= 0:
                 self.fade_state = None
 
-        if self.stealth_mode:
-            self.stealth_timer += dt
-            if self.stealth_timer >= self.max_stealth_time:
-                self.stealth_mode = False
-                self.player.alpha = 255
-                self.fade_state = "fade_in"
+    def _send_control(self, control: int, pressed: bool):
+        """Записывает нажатие или отпускание управляющей клавиши и передаёт его в симуляцию.
 
-    def on_key_press(self, symbol: int, modifiers: int):
-        """Обрабатывает нажатия клавиш: движение, вход в укрытие."""
-        if self.game_over:
+        Во время повтора живой ввод игнорируется.
+
+        :param control: одна из констант CONTROL_*
+        :type control: int
+        :param pressed: True — нажатие, False — отпускание
+        :type pressed: bool
+        """
+        if self.playback is not None or self.game_over:
             return
-        if not self.stealth_mode:
-            if symbol == arcade.key.W:
-                self.player.change_y = self.player.speed
-            if symbol == arcade.key.S:
-                self.player.change_y = -self.player.speed
-            if symbol == arcade.key.A:
-                self.player.change_x = -self.player.speed
-            if symbol == arcade.key.D:
-                self.player.change_x = self.player.speed
-
-        if symbol == arcade.key.SPACE:
-            activation_distance = 110
-            for obj in self.objects_list:
-                dist = arcade.get_distance_between_sprites(self.player, obj)
-                if dist <= activation_distance:
-                    self.stealth_mode = True
-                    self.player.alpha = 0
-                    self.player.change_x = 0
-                    self.player.change_y = 0
-                    self.fade_state = "fade_out"
-                    self.stealth_timer = 0
-                    break
+        self.recorder.record(self.sim.tick, control, pressed)
+        if pressed:
+            self.sim.key_press(control)
+        else:
+            self.sim.key_release(control)
+        self._sync_hiding()
+
+    def on_key_press(self, symbol: int, modifiers: int):
+        """Передаёт нажатия клавиш движения и укрытия в симуляцию."""
+        control = CONTROLS.get(symbol)
+        if control is not None:
+            self._send_control(control, True)
 
     def on_key_release(self, symbol: int, modifiers: int):
-        """Обрабатывает отпускание клавиш: остановка, пауза, выход из укрытия, проход через двери."""
+        """Обрабатывает отпускание клавиш: пауза, остановка, выход из укрытия, проход через двери."""
         if self.game_over:
             return
         if symbol == arcade.key.ESCAPE:
             self.window.show_view(PauseMenu(self))
-        if symbol == arcade.key.W or symbol == arcade.key.S:
-            self.player.change_y = 0
-        if symbol == arcade.key.A or symbol == arcade.key.D:
-            self.player.change_x = 0
-        if symbol == arcade.key.E:
-            activation_distance = 110
-            for door in self.doors_list:
-                dist = arcade.get_distance_between_sprites(self.player, door)
-                if dist <= activation_distance:
-                    orientation = door.properties.get("orientation", None)
-                    if orientation is not None:
-                        if self.player.center_y < door.center_y:
-                            self.player.center_y = door.center_y + door.height // 2 + self.player.height // 2 + 30
-                        else:
-                            self.player.center_y = door.center_y - door.height // 2 - self.player.height // 2 - 30
-                    else:
-                        if self.player.center_x < door.center_x:
-                            self.player.center_x = door.center_x + door.width // 2 + self.player.width // 2 + 30
-                        else:
-                            self.player.center_x = door.center_x - door.width // 2 - self.player.width // 2 - 30
-                    break
-        if symbol == arcade.key.SPACE:
-            if self.stealth_mode:
-                self.stealth_mode = False
-                self.player.alpha = 255
-                self.fade_state = "fade_in"
+        control = CONTROLS.get(symbol)
+        if control is not None:
+            self._send_control(control, False)
 
 
 class PauseMenu(View):
-    """Меню паузы, появляющееся при нажатии ESC."""
+    """Меню паузы, появляющееся при нажатии ESC.
+
+    Под меню рисуется снимок последнего кадра игры, сделанный при открытии паузы:
+    пока игра стоит, сцена, персонажи и свет заново не рисуются.
+    """
+
+    render_on_demand = True
 
     def __init__(self, game):
         """Создаёт кнопки и сохраняет ссылку на игровое окно.
@@ -670,6 +817,7 @@ class PauseMenu(View):
         super().__init__()
         self.ui_camera = None
         self.game = game
+        self.snapshot = None
 
         self.manager = UIManager()
 
@@ -704,9 +852,31 @@ class PauseMenu(View):
         """Отключает менеджер."""
         self.manager.disable()
 
+    def on_show_view(self):
+        """Снимает кадр игры при открытии паузы."""
+        self._capture()
+
+    def on_hide_view(self):
+        """Освобождает снимок кадра игры."""
+        self.snapshot = None
+
+    def on_resize(self, width: int, height: int):
+        """Переснимает кадр игры под новый размер окна (свёрнутое окно пропускается)."""
+        if width and height:
+            self._capture()
+
+    def _capture(self):
+        """Рисует кадр игры один раз во внеэкранный буфер размером с окно."""
+        ctx = self.window.ctx
+        self.snapshot = ctx.framebuffer(
+            color_attachments=[ctx.texture(self.window.get_framebuffer_size(), components=4)])
+        with self.snapshot.activate():
+            self.snapshot.clear()
+            self.game.on_draw()
+
     def on_draw(self):
-        """Рисует поверх игрового окна меню."""
-        self.game.on_draw()
+        """Копирует снимок игры на экран и рисует поверх меню."""
+        self.window.ctx.copy_framebuffer(self.snapshot, self.window.ctx.screen)
         self.manager.draw()
 
     def on_mouse_press(self, x: float, y: float, button: int, modifiers: int):
@@ -764,49 +934,60 @@ class PauseMenu(View):
 class StaticMenu(View):
     """Окно статистики, отображает лучшие результаты из базы данных."""
 
+    render_on_demand = True
+
     def __init__(self):
-        """Инициализирует пустой список результатов и цвет фона."""
+        """Инициализирует пустой список результатов, надписи таблицы и цвет фона."""
         super().__init__()
         self.results = []
         self.background_color = arcade.color.BLACK
+        self.text = TextLayer()
+        self.layout_size = None
 
     def on_show_view(self):
-        """Загружает результаты из БД при показе."""
+        """Загружает результаты из БД при показе и раскладывает таблицу."""
         self.results = get_top_results(10)
+        self._layout()
 
-    def on_draw(self):
-        """Рисует таблицу с результатами."""
-        self.clear()
+    def _layout(self):
+        """Создаёт надписи таблицы под текущий размер окна.
 
-        arcade.draw_text("Лучшие результаты",
-                         self.window.width // 2, self.window.height - 50,
-                         arcade.color.WHITE, font_size=30, anchor_x="center")
+        Таблица не меняется, пока окно открыто, поэтому надписи собираются один раз
+        и пересобираются только при смене размера окна.
+        """
+        self.layout_size = (self.window.width, self.window.height)
+        center, top = self.window.width // 2, self.window.height
+        self.text.clear()
+        self.text.add("title", "Лучшие результаты", center, top - 50,
+                      color=arcade.color.WHITE, font_size=30, anchor_x="center")
 
         if not self.results:
-            arcade.draw_text("Нет сохранённых результатов",
-                             self.window.width // 2, self.window.height // 2,
-                             arcade.color.WHITE, font_size=20, anchor_x="center")
+            self.text.add("empty", "Нет сохранённых результатов", center, self.window.height // 2,
+                          color=arcade.color.WHITE, font_size=20, anchor_x="center")
         else:
-            arcade.draw_text("Дата и время", self.window.width // 2 - 200, self.window.height - 100,
-                             arcade.color.WHITE, font_size=16, anchor_x="left")
-            arcade.draw_text("Время (сек)", self.window.width // 2 + 100, self.window.height - 100,
-                             arcade.color.WHITE, font_size=16, anchor_x="left")
-
-            y = self.window.height - 130
-            for i, (date, time_val) in enumerate(self.results, 1):
-                arcade.draw_text(f"{i}.", self.window.width // 2 - 250, y,
-                                 arcade.color.WHITE, font_size=14, anchor_x="left")
-                arcade.draw_text(date, self.window.width // 2 - 200, y,
-                                 arcade.color.WHITE, font_size=14, anchor_x="left")
-                arcade.draw_text(f"{time_val:.1f}", self.window.width // 2 + 100, y,
-                                 arcade.color.WHITE, font_size=14, anchor_x="left")
+            for name, column, x in (("date", "Дата и время", center - 200), ("time", "Время (сек)", center + 100),
+                                    ("seed", "Сид", center + 250)):
+                self.text.add(name, column, x, top - 100, color=arcade.color.WHITE, font_size=16, anchor_x="left")
+
+            y = top - 130
+            for i, (date, time_val, seed) in enumerate(self.results, 1):
+                row = (f"{i}.", date, f"{time_val:.1f}", "—" if seed is None else str(seed))
+                for column, (value, x) in enumerate(zip(row, (center - 250, center - 200, center + 100, center + 250))):
+                    self.text.add(f"{i}:{column}", value, x, y,
+                                  color=arcade.color.WHITE, font_size=14, anchor_x="left")
                 y -= 25
                 if y < 50:
                     break
 
-        arcade.draw_text("Нажмите ESC для выхода",
-                         self.window.width // 2, 30,
-                         arcade.color.WHITE, font_size=14, anchor_x="center")
+        self.text.add("hint", "Нажмите ESC для выхода", center, 30,
+                      color=arcade.color.WHITE, font_size=14, anchor_x="center")
+
+    def on_draw(self):
+        """Рисует таблицу с результатами."""
+        self.clear()
+        if self.layout_size != (self.window.width, self.window.height):
+            self._layout()
+        self.text.draw()
 
     def on_key_release(self, symbol: int, modifiers: int):
         """Возврат в главное меню по ESC."""
@@ -0,0 +1,181 @@
+"""Модуль видимости вокруг игрока.
+
+При загрузке карты грани стен, смотрящие на свободные клетки, собираются в
+длинные отрезки. Вокруг игрока из этих отрезков строится многоугольник видимости:
+лучи пускаются к концам ближних отрезков, и каждый луч обрывается на первой стене.
+Многоугольник пересчитывается, только когда игрок сдвинулся заметно, и служит
+одновременно маской света и проверкой, виден ли аниматроник.
+"""
+
+
+import math
+import numpy as np
+from level import Level
+
+
+# На сколько пикселей должен сместиться игрок, чтобы многоугольник пересчитался
+MOVE_THRESHOLD = 6.0
+# Лучи по обе стороны от угла стены, чтобы заглянуть за неё
+RAY_OFFSET = 1e-4
+
+
+class WallSegments:
+    """Грани стен карты, слитые в отрезки вдоль строк и столбцов клеток."""
+
+    def __init__(self, level: Level, layer: str = "walls"):
+        """Собирает грани клеток стен, за которыми нет стены, и сливает соседние.
+
+        :param level: карта уровня
+        :type level: Level
+        :param layer: слой, клетки которого заслоняют обзор
+        :type layer: str
+        """
+        size = level.tile_size
+        grid = level.layers[layer]
+        width, height = level.width, level.height
+
+        def solid(tx, ty):
+            return 0 <= tx < width and 0 <= ty < height and grid[ty * width + tx]
+
+        # Ключ — линия сетки и сторона, куда смотрит грань; значение — клетки вдоль линии по порядку
+        horizontal = {}
+        vertical = {}
+        for ty in range(height):
+            for tx in range(width):
+                if not solid(tx, ty):
+                    continue
+                if not solid(tx, ty - 1):
+                    horizontal.setdefault((ty, -1), []).append(tx)
+                if not solid(tx, ty + 1):
+                    horizontal.setdefault((ty + 1, 1), []).append(tx)
+                if not solid(tx - 1, ty):
+                    vertical.setdefault((tx, -1), []).append(ty)
+                if not solid(tx + 1, ty):
+                    vertical.setdefault((tx + 1, 1), []).append(ty)
+
+        segments = []
+        for (line, _), cells in horizontal.items():
+            for first, last in self._runs(cells):
+                segments.append((first * size, line * size, (last + 1) * size, line * size))
+        for (line, _), cells in vertical.items():
+            for first, last in self._runs(cells):
+                segments.append((line * size, first * size, line * size, (last + 1) * size))
+        self.segments = np.array(segments, dtype=float).reshape(-1, 4)
+
+    @staticmethod
+    def _runs(cells: list):
+        """Разбивает возрастающий список номеров клеток на непрерывные отрезки.
+
+        :return: пары (первая, последняя) клетка каждого отрезка
+        :rtype: list[tuple[int, int]]
+        """
+        runs = []
+        first = previous = cells[0]
+        for cell in cells[1:]:
+            if cell != previous + 1:
+                runs.append((first, previous))
+                first = cell
+            previous = cell
+        runs.append((first, previous))
+        return runs
+
+
+class VisibilityPolygon:
+    """Многоугольник видимости вокруг точки, ограниченный стенами и квадратом радиуса.
+
+    Вершины упорядочены по углу, поэтому многоугольник звёздный относительно
+    точки обзора и принадлежность точки проверяется поиском сектора.
+    """
+
+    def __init__(self, walls: WallSegments, radius: float, threshold: float = MOVE_THRESHOLD):
+        """Запоминает отрезки стен.
+
+        :param walls: отрезки стен карты
+        :type walls: WallSegments
+        :param radius: дальность обзора в пикселях мира
+        :type radius: float
+        :param threshold: смещение точки обзора, после которого многоугольник пересчитывается
+        :type threshold: float
+        """
+        self.segments = walls.segments
+        self.radius = radius
+        self.threshold = threshold
+        self.origin = None
+        self.angles = np.zeros(0)
+        self.points = np.zeros((0, 2))
+
+    def update(self, x: float, y: float):
+        """Пересчитывает многоугольник, если точка обзора ушла дальше порога.
+
+        :return: True, если многоугольник пересчитан
+        :rtype: bool
+        """
+        if self.origin is not None and math.hypot(x - self.origin[0], y - self.origin[1]) < self.threshold:
+            return False
+        self.origin = (x, y)
+        self._cast(x, y)
+        return True
+
+    def _cast(self, ox: float, oy: float):
+        """Пускает лучи к концам ближних отрезков и находит, где каждый луч упирается в стену."""
+        r = self.radius
+        segments = self.segments
+        near = segments[(np.minimum(segments[:, 0], segments[:, 2]) <= ox + r)
+                        & (np.maximum(segments[:, 0], segments[:, 2]) >= ox - r)
+                        & (np.minimum(segments[:, 1], segments[:, 3]) <= oy + r)
+                        & (np.maximum(segments[:, 1], segments[:, 3]) >= oy - r)]
+        # Отрезки идут вдоль осей, поэтому обрезка координат по квадрату обрезает и сами отрезки;
+        # иначе место, где стена выходит за квадрат, оказалось бы между лучами
+        near = np.column_stack((np.clip(near[:, 0::2], ox - r, ox + r), np.clip(near[:, 1::2], oy - r, oy + r)))
+        near = near[:, (0, 2, 1, 3)]
+        # Квадрат радиуса замыкает многоугольник там, где стен нет
+        box = np.array(((ox - r, oy - r, ox + r, oy - r), (ox + r, oy - r, ox + r, oy + r),
+                        (ox + r, oy + r, ox - r, oy + r), (ox - r, oy + r, ox - r, oy - r)))
+        segments = np.vstack((near, box))
+
+        ends = segments.reshape(-1, 2)
+        angles = np.unique(np.arctan2(ends[:, 1] - oy, ends[:, 0] - ox))
+        rays = np.concatenate((angles - RAY_OFFSET, angles, angles + RAY_OFFSET))
+        rays.sort()
+        dx = np.cos(rays)[:, None]
+        dy = np.sin(rays)[:, None]
+
+        # Точка луча o + t·d совпадает с точкой отрезка p + u·s
+        px = (segments[:, 0] - ox)[None, :]
+        py = (segments[:, 1] - oy)[None, :]
+        sx = (segments[:, 2] - segments[:, 0])[None, :]
+        sy = (segments[:, 3] - segments[:, 1])[None, :]
+        denominator = dx * sy - dy * sx
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (px * sy - py * sx) / denominator
+            u = (px * dy - py * dx) / denominator
+        hits = (denominator != 0) & (t > 0) & (u >= 0) & (u <= 1)
+        distance = np.where(hits, t, np.inf).min(axis=1)
+
+        self.angles = rays
+        self.points = np.column_stack((ox + dx[:, 0] * distance, oy + dy[:, 0] * distance))
+
+    def contains(self, x, y):
+        """Проверяет, видны ли точки из точки обзора.
+
+        :param x: координаты X точек (число или массив)
+        :param y: координаты Y точек (число или массив)
+        :return: маска видимых точек
+        :rtype: numpy.ndarray
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if self.origin is None or not len(self.angles):
+            return np.zeros(np.shape(x), dtype=bool)
+        ox, oy = self.origin
+        dx, dy = x - ox, y - oy
+        angle = np.arctan2(dy, dx)
+        # Сектор между соседними вершинами; за последней вершиной сектор замыкается на первую
+        after = np.searchsorted(self.angles, angle) % len(self.angles)
+        before = after - 1
+        ax, ay = self.points[before, 0] - ox, self.points[before, 1] - oy
+        bx, by = self.points[after, 0] - ox, self.points[after, 1] - oy
+        # Точка видна, если лежит по ту же сторону ребра сектора, что и точка обзора
+        edge = (bx - ax) * (dy - ay) - (by - ay) * (dx - ax)
+        origin_side = (bx - ax) * (-ay) - (by - ay) * (-ax)
+        return edge * origin_side >= 0
@@ -1,27 +1,72 @@
 """Главный модуль окна приложения.
 
-Запускает игру, устанавливает главное меню.
+Запускает игру, устанавливает главное меню и фоновую подготовку игры за ним.
+Меню перерисовываются только после событий окна и ввода, а между ними кадры пропускаются.
 """
 
 
+import argparse
 from arcade import Window, run
-from views import MainMenu
+from assets import preload_assets
+from preload import Preloader
+from views import MainMenu, Game
+
+
+# События, которые идут каждый кадр и сами по себе картинку меню не меняют
+FRAME_EVENTS = frozenset(("on_update", "on_fixed_update", "on_draw", "on_refresh"))
 
 
 class MainWindow(Window):
     """Основное окно игры, содержит виды (экраны)."""
 
-    def __init__(self, width: int, height: int, title: str) -> None:
-        """Создаёт окно с заданными размерами и заголовком."""
-        super().__init__(width, height, title)
+    def __init__(self, width: int, height: int, title: str, fps: float = 60, seed: int = None) -> None:
+        """Создаёт окно с заданными размерами, заголовком и частотой отрисовки.
+
+        Логика игры идёт фиксированными шагами, поэтому пониженная частота отрисовки
+        экономит энергию, не меняя хода ночи. Если задан сид, каждая ночь начинается с него.
+        """
+        super().__init__(width, height, title, draw_rate=1 / fps)
+        self.seed = seed
+        self.redraw_needed = True
+        # Подготовка игры в фоне, пока открыто меню; запускается в setup
+        self.preloader = Preloader()
         self.main_menu: MainMenu = MainMenu()
 
+    def dispatch_event(self, event_type: str, *args):
+        """Передаёт событие обработчикам; ввод и события окна требуют перерисовки меню."""
+        if event_type not in FRAME_EVENTS:
+            self.redraw_needed = True
+        return super().dispatch_event(event_type, *args)
+
+    def show_view(self, new_view) -> None:
+        """Показывает вид и перерисовывает его в ближайший кадр."""
+        self.redraw_needed = True
+        super().show_view(new_view)
+
+    def draw(self, dt: float) -> None:
+        """Рисует кадр; вид с отрисовкой по требованию без изменений кадр пропускает.
+
+        Пропущенный кадр не переключает буферы, поэтому на экране остаётся последний нарисованный.
+        """
+        if getattr(self.current_view, "render_on_demand", False) and not self.redraw_needed:
+            return
+        self.redraw_needed = False
+        super().draw(dt)
+
     def setup(self) -> None:
-        """Устанавливает начальный вид — главное меню."""
+        """Запускает фоновую подготовку ресурсов и сеансов и показывает главное меню."""
+        preload_assets(self.preloader, self.ctx.default_atlas)
+        Game.preload(self.preloader)
+        self.preloader.start()
         self.show_view(self.main_menu)
 
 
 if __name__ == "__main__":
-    window = MainWindow(1550, 850, "Five Nights at Freddy's")
+    parser = argparse.ArgumentParser(description="Five Nights at Freddy's")
+    parser.add_argument("--fps", type=float, default=60, help="частота отрисовки кадров")
+    parser.add_argument("--seed", type=int, default=None, help="сид ночи для воспроизведения")
+    args = parser.parse_args()
+
+    window = MainWindow(1550, 850, "Five Nights at Freddy's", fps=args.fps, seed=args.seed)
     window.setup()
     run()